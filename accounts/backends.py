@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+UserModel = get_user_model()
+
+
+def user_cache_key(user_id):
+    return f'accounts:user:{user_id}'
+
+
+def user_cache():
+    return caches[getattr(settings, 'ACCOUNTS_USER_CACHE_ALIAS', 'default')]
+
+
+def user_cache_timeout():
+    # Con una caché en memoria cada proceso guardaría su copia y no vería la
+    # invalidación hecha en otro: la caché de usuarios queda desactivada.
+    if isinstance(user_cache(), LocMemCache):
+        return None
+    return getattr(settings, 'ACCOUNTS_USER_CACHE_TIMEOUT', None)
+
+
+def invalidate_cached_user(user_id):
+    if user_cache_timeout():
+        user_cache().delete(user_cache_key(user_id))
+
+
+class ProfileModelBackend(ModelBackend):
+    # Carga el usuario de la sesión junto con su perfil en una sola consulta
+    # (el navbar de base.html usa user.profile en cada página autenticada).
+    # Si ACCOUNTS_USER_CACHE_TIMEOUT está definido y ACCOUNTS_USER_CACHE_ALIAS
+    # es una caché compartida, el par se guarda en caché y se invalida al
+    # guardar el User o el Profile.
+
+    def get_user(self, user_id):
+        timeout = user_cache_timeout()
+        if timeout:
+            user = user_cache().get(user_cache_key(user_id))
+            if user is not None:
+                return user if self.user_can_authenticate(user) else None
+
+        try:
+            user = UserModel._default_manager.select_related('profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+
+        if timeout:
+            user_cache().set(user_cache_key(user_id), user, timeout)
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        # Versión async para request.auser() en las vistas async (ASGI).
+        timeout = user_cache_timeout()
+        if timeout:
+            user = await user_cache().aget(user_cache_key(user_id))
+            if user is not None:
+                return user if self.user_can_authenticate(user) else None
+
+        try:
+            user = await UserModel._default_manager.select_related('profile').aget(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+
+        if timeout:
+            await user_cache().aset(user_cache_key(user_id), user, timeout)
+        return user if self.user_can_authenticate(user) else None
@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save 
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver 
 
 
@@ -11,6 +11,8 @@ class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     
     avatar = models.ImageField(upload_to=user_avatar_path, null=True, blank=True, default='avatars/default_avatar.png')
+    # Anchos de los derivados generados del avatar; vacío mientras no existan.
+    avatar_widths = models.JSONField(default=list, blank=True, editable=False, verbose_name="Anchos del avatar")
 
 
     bio = models.TextField(max_length=500, blank=True, null=True, verbose_name="Biografía")
@@ -41,14 +43,50 @@ class Profile(models.Model):
             return f"{settings.MEDIA_URL}avatars/default_avatar.png"
 
 
-@receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
-    if created:
-        Profile.objects.create(user=instance)
+def get_profile(user):
+    # Devuelve el perfil del usuario sin escribir en la base de datos: si todavía
+    # no existe (ej. usuarios creados con bulk_create) se construye en memoria y
+    # se guarda recién cuando el usuario edita su perfil.
     try:
-        instance.profile.save()
+        return user.profile
     except Profile.DoesNotExist:
+        return Profile(user=user)
+
+
+@receiver(post_save, sender=User)
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    # Sólo se escribe al crear el usuario; los guardados posteriores del User
+    # (ej. last_login en cada login) no tocan la tabla de perfiles.
+    if created and not raw:
         Profile.objects.create(user=instance)
-    except Exception as e:
-        print(f"Error al guardar el perfil para {instance.username}: {e}")
 
+
+@receiver(pre_save, sender=Profile)
+def reset_avatar_widths(sender, instance, raw=False, **kwargs):
+    # Los anchos guardados son los del avatar anterior.
+    if raw or not instance.pk or not instance.avatar_widths:
+        return
+    previous = Profile.objects.filter(pk=instance.pk).values_list('avatar', flat=True).first()
+    if (previous or '') != (instance.avatar.name or ''):
+        instance.avatar_widths = []
+
+
+@receiver(post_save, sender=Profile)
+def generate_avatar_derivatives(sender, instance, raw=False, **kwargs):
+    if raw or not instance.avatar or instance.avatar_widths:
+        return
+    from blog_app.images import schedule_derivatives, AVATAR_WIDTHS
+    schedule_derivatives(instance.avatar.name, AVATAR_WIDTHS, record_avatar_widths)
+
+
+def record_avatar_widths(name, widths):
+    return Profile.objects.filter(avatar=name).update(avatar_widths=widths)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_user_cache(sender, instance, **kwargs):
+    from .backends import invalidate_cached_user
+    invalidate_cached_user(instance.pk if sender is User else instance.user_id)
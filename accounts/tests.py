@@ -1,2 +1,185 @@
-from django.test import TestCase
+import tempfile
 
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog_app.testing import QueryBudgetMixin
+from .models import Profile
+
+
+class ProfileWriteTests(TestCase):
+    password = 'clave-segura-123'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('julian', 'julian@example.com', cls.password)
+        cls.other = User.objects.create_user('juana', 'juana@example.com', cls.password)
+
+    def assertNoProfileWrites(self, captured):
+        writes = [
+            query['sql'] for query in captured.captured_queries
+            if 'accounts_profile' in query['sql'] and not query['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(writes, [])
+
+    def test_user_creation_creates_profile_once(self):
+        with CaptureQueriesContext(connection) as captured:
+            user = User.objects.create_user('nuevo', 'nuevo@example.com', self.password)
+        inserts = [q['sql'] for q in captured.captured_queries if q['sql'].startswith('INSERT INTO "accounts_profile"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+
+    def test_login_does_not_touch_profile(self):
+        # Sesión (existe + alta + rotación), usuario, last_login y savepoints.
+        with self.assertNumQueries(9) as captured:
+            response = self.client.post(reverse('accounts:login'), {'username': 'julian', 'password': self.password})
+        self.assertEqual(response.status_code, 302)
+        self.assertNoProfileWrites(captured)
+
+    def test_user_save_does_not_touch_profile(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.user.first_name = 'Julián'
+            self.user.save()
+        self.assertNoProfileWrites(captured)
+
+    def test_registration(self):
+        data = {
+            'username': 'nuevo', 'email': 'nuevo@example.com',
+            'password1': 'Otra-Clave-987', 'password2': 'Otra-Clave-987',
+        }
+        # 3 validaciones de unicidad, alta del usuario y alta del perfil.
+        with self.assertNumQueries(5):
+            response = self.client.post(reverse('accounts:register'), data)
+        self.assertRedirects(response, reverse('accounts:login'), fetch_redirect_response=False)
+
+    def test_profile_view_other_user(self):
+        self.client.force_login(self.user)
+        url = reverse('accounts:profile_view_user', kwargs={'username': 'juana'})
+        # Sesión, usuario actual con su perfil, usuario+perfil consultado y posts.
+        with self.assertNumQueries(4) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNoProfileWrites(captured)
+
+    def test_profile_view_self(self):
+        self.client.force_login(self.user)
+        with self.assertNumQueries(3) as captured:
+            response = self.client.get(reverse('accounts:profile_view_self'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNoProfileWrites(captured)
+
+    def test_profile_view_without_profile_row_is_read_only(self):
+        Profile.objects.filter(user=self.other).delete()
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('accounts:profile_view_user', kwargs={'username': 'juana'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertNoProfileWrites(captured)
+        self.assertFalse(Profile.objects.filter(user=self.other).exists())
+
+    def test_unchanged_profile_update_does_not_write(self):
+        self.client.force_login(self.user)
+        data = {'email': self.user.email, 'first_name': '', 'last_name': ''}
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(reverse('accounts:profile_update'), data)
+        self.assertRedirects(response, reverse('accounts:profile_view_self'), fetch_redirect_response=False)
+        self.assertNoProfileWrites(captured)
+        self.assertFalse(any(q['sql'].startswith('UPDATE "auth_user"') for q in captured.captured_queries))
+
+
+class UserLoadingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('julian', 'julian@example.com', 'clave-segura-123')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def shared_user_cache(self):
+        # Caché en archivos: la comparten todos los procesos.
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        shared = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tmp.name}
+        self.enterContext(override_settings(
+            CACHES={**settings.CACHES, 'users': shared},
+            ACCOUNTS_USER_CACHE_ALIAS='users', ACCOUNTS_USER_CACHE_TIMEOUT=300,
+        ))
+        self.addCleanup(lambda: caches['users'].close())
+
+    def test_identity_is_one_query_after_session(self):
+        # Sesión + usuario con perfil (el navbar no consulta el avatar aparte).
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('blog:about'))
+        self.assertContains(response, self.user.profile.get_avatar_url)
+
+    def test_cached_user_skips_user_query(self):
+        self.shared_user_cache()
+        self.client.get(reverse('blog:about'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('blog:about'))
+
+    @override_settings(ACCOUNTS_USER_CACHE_TIMEOUT=300)
+    def test_per_process_cache_is_not_used(self):
+        # Con LocMemCache cada proceso tendría su copia: se consulta siempre.
+        self.client.get(reverse('blog:about'))
+        with self.assertNumQueries(2):
+            self.client.get(reverse('blog:about'))
+
+    def test_profile_update_invalidates_cached_user(self):
+        self.shared_user_cache()
+        self.client.get(reverse('blog:about'))
+        data = {'email': self.user.email, 'first_name': '', 'last_name': '', 'location': 'Rosario'}
+        self.client.post(reverse('accounts:profile_update'), data)
+        response = self.client.get(reverse('blog:about'))
+        self.assertEqual(response.wsgi_request.user.profile.location, 'Rosario')
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    password = 'clave-segura-123'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('julian', 'julian@example.com', cls.password)
+        cls.other = User.objects.create_user('juana', 'juana@example.com', cls.password)
+
+    def test_anonymous_views(self):
+        self.assertWithinQueryBudget(reverse('accounts:login'), status_code=200)
+        self.assertWithinQueryBudget(reverse('accounts:register'), status_code=200)
+        data = {'username': 'julian', 'password': self.password}
+        self.assertWithinQueryBudget(reverse('accounts:login'), 'post', data, status_code=302)
+
+    def test_registration(self):
+        data = {
+            'username': 'nuevo',
+            'email': 'nuevo@example.com',
+            'password1': 'Clave-muy-segura-987',
+            'password2': 'Clave-muy-segura-987',
+        }
+        self.assertWithinQueryBudget(reverse('accounts:register'), 'post', data, status_code=302)
+
+    def test_authenticated_views(self):
+        self.client.force_login(self.user)
+        self.assertWithinQueryBudget(reverse('accounts:profile_view_self'), status_code=200)
+        self.assertWithinQueryBudget(reverse('accounts:profile_view_user', kwargs={'username': 'juana'}), status_code=200)
+        self.assertWithinQueryBudget(reverse('accounts:profile_update'), status_code=200)
+        self.assertWithinQueryBudget(reverse('accounts:password_change'), status_code=200)
+        self.assertWithinQueryBudget(reverse('accounts:password_change_done'), status_code=200)
+
+    def test_authenticated_writes(self):
+        self.client.force_login(self.user)
+        data = {'email': self.user.email, 'first_name': 'Julián', 'last_name': '', 'location': 'Rosario'}
+        self.assertWithinQueryBudget(reverse('accounts:profile_update'), 'post', data, status_code=302)
+        data = {
+            'old_password': self.password,
+            'new_password1': 'Clave-muy-segura-987',
+            'new_password2': 'Clave-muy-segura-987',
+        }
+        self.assertWithinQueryBudget(reverse('accounts:password_change'), 'post', data, status_code=302)
+        self.assertWithinQueryBudget(reverse('accounts:logout'), 'post', status_code=302)
@@ -7,34 +7,43 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import CreateView, DetailView, UpdateView, FormView
 from django.contrib import messages 
 from django.http import HttpResponseRedirect
-from django.utils import timezone 
 from .forms import CustomUserCreationForm, UserUpdateForm, ProfileUpdateForm, CustomPasswordChangeForm
-from .models import Profile
+from .models import get_profile
 from django.contrib.auth.models import User
 from blog_app.models import Post 
+from blog_app.instrumentation import query_budget
+from blog_app.mixins import RetryOnLockedMixin
+from blog_app.pagination import cursor_pagination_enabled, paginate_by_cursor
+from blog_app.routers import replica_reads
 
 
-class RegisterView(CreateView):
+PROFILE_POSTS_PER_PAGE = 10
+
+
+class RegisterView(RetryOnLockedMixin, CreateView):
+    query_budget = 5
     form_class = CustomUserCreationForm
     template_name = 'accounts/register.html'
     success_url = reverse_lazy('accounts:login')
 
     def form_valid(self, form):
-        user = form.save()
-        messages.success(self.request, f"¡Cuenta creada para {user.username}! Ahora puedes iniciar sesión.")
-        return super().form_valid(form)
+        self.object = form.save()
+        messages.success(self.request, f"¡Cuenta creada para {self.object.username}! Ahora puedes iniciar sesión.")
+        return HttpResponseRedirect(self.get_success_url())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["page_title"] = "Registro de Nuevo Usuario"
         return context
 
-class CustomLoginView(AuthLoginView):
+class CustomLoginView(RetryOnLockedMixin, AuthLoginView):
+    query_budget = 9
     template_name = 'accounts/login.html'
 
     def form_valid(self, form):
+        response = super().form_valid(form)
         messages.success(self.request, f"¡Bienvenido de nuevo, {form.get_user().username}!")
-        return super().form_valid(form)
+        return response
     
     def form_invalid(self, form):
         messages.error(self.request, "Nombre de usuario o contraseña incorrectos. Por favor, inténtalo de nuevo.")
@@ -47,28 +56,30 @@ class CustomLoginView(AuthLoginView):
 
 
 class CustomLogoutView(LoginRequiredMixin, AuthLogoutView):
+    query_budget = 4
     def dispatch(self, request, *args, **kwargs):
         if request.user.is_authenticated:
             messages.info(request, f"Has cerrado sesión. ¡Hasta pronto, {request.user.username}!")
         return super().dispatch(request, *args, **kwargs)
 
 
+@query_budget(4)
+@replica_reads
 @login_required 
 def profile_view(request, username=None):
 
     if username:
-        profile_user = get_object_or_404(User, username=username)
-        user_posts = Post.objects.filter(
-            author=profile_user, 
-            status='published',
-            published_date__lte=timezone.now()
-        ).order_by('-published_date')
+        profile_user = get_object_or_404(User.objects.select_related('profile'), username=username)
+        user_posts = Post.objects.published().filter(author=profile_user).order_by('-published_date')
     else:
         profile_user = request.user
         user_posts = Post.objects.filter(author=profile_user).order_by('-published_date')
+
+    if cursor_pagination_enabled():
+        user_posts = paginate_by_cursor(request, user_posts, PROFILE_POSTS_PER_PAGE)
     
     
-    profile, created = Profile.objects.get_or_create(user=profile_user)
+    profile = get_profile(profile_user)
 
     context = {
         'profile_user': profile_user, 
@@ -79,7 +90,8 @@ def profile_view(request, username=None):
     return render(request, 'accounts/profile.html', context)
 
 
-class ProfileUpdateView(LoginRequiredMixin, UpdateView):
+class ProfileUpdateView(RetryOnLockedMixin, LoginRequiredMixin, UpdateView):
+    query_budget = 5
     model = User 
     form_class = UserUpdateForm  
     template_name = 'accounts/profile_form.html'
@@ -98,7 +110,7 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
 
 
         if 'profile_form' not in context:
-            context['profile_form'] = ProfileUpdateForm(instance=self.request.user.profile)
+            context['profile_form'] = ProfileUpdateForm(instance=get_profile(self.request.user))
         
         context['page_title'] = "Editar Perfil"
         return context
@@ -109,11 +121,13 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
         
 
         user_form = UserUpdateForm(request.POST, instance=self.request.user)
-        profile_form = ProfileUpdateForm(request.POST, request.FILES, instance=self.request.user.profile)
+        profile_form = ProfileUpdateForm(request.POST, request.FILES, instance=get_profile(self.request.user))
 
         if user_form.is_valid() and profile_form.is_valid():
-            user_form.save()
-            profile_form.save()
+            if user_form.has_changed():
+                user_form.save()
+            if profile_form.has_changed():
+                profile_form.save()
             messages.success(request, '¡Tu perfil ha sido actualizado exitosamente!')
             return HttpResponseRedirect(self.get_success_url())
         else:
@@ -126,14 +140,16 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
         return reverse('accounts:profile_view_self')
 
 
-class CustomPasswordChangeView(LoginRequiredMixin, AuthPasswordChangeView):
+class CustomPasswordChangeView(RetryOnLockedMixin, LoginRequiredMixin, AuthPasswordChangeView):
+    query_budget = 12
     form_class = CustomPasswordChangeForm
     template_name = 'accounts/password_change_form.html'
     success_url = reverse_lazy('accounts:password_change_done')
 
     def form_valid(self, form):
+        response = super().form_valid(form)
         messages.success(self.request, '¡Tu contraseña ha sido cambiada exitosamente!')
-        return super().form_valid(form)
+        return response
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -141,6 +157,7 @@ class CustomPasswordChangeView(LoginRequiredMixin, AuthPasswordChangeView):
         return context
 
 class CustomPasswordChangeDoneView(LoginRequiredMixin, AuthPasswordChangeDoneView):
+    query_budget = 2
     template_name = 'accounts/password_change_done.html'
 
     def get_context_data(self, **kwargs):
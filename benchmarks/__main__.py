@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(database):
+    if database:
+        os.environ['BLOG_DATABASE_NAME'] = str(Path(database).resolve())
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog.settings')
+    sys.path.insert(0, str(BASE_DIR))
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', interactive=False, verbosity=0)
+
+
+def run_seed(args):
+    from .seed import seed
+    seed(posts=args.posts, users=args.users, images=args.images, batch_size=args.batch_size,
+         seed_value=args.seed, stdout=sys.stdout)
+
+
+def run_benchmarks(args):
+    from django.test.utils import override_settings, setup_test_environment
+    from blog_app.models import Post
+    from django.contrib.auth.models import User
+    from .report import build_report, format_results, save_report
+    from .scenarios import build_scenarios, measure
+
+    setup_test_environment()
+    overrides = {
+        'ALLOWED_HOSTS': ['localhost'],
+        'BLOG_IMAGE_ASYNC': False,
+        'BLOG_CURSOR_PAGINATION': args.cursor,
+    }
+    if not args.page_cache:
+        overrides['CACHES'] = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'pages': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+        }
+
+    with override_settings(**overrides):
+        scenarios = build_scenarios()
+        if args.only:
+            scenarios = [scenario for scenario in scenarios if scenario.name in args.only]
+        results = {}
+        for scenario in scenarios:
+            results[scenario.name] = measure(scenario, args.iterations, warmup=args.warmup)
+            print(f"  {scenario.name}: p50 {results[scenario.name]['p50_ms']} ms", file=sys.stderr)
+
+    dataset = {
+        'posts': Post.objects.count(),
+        'users': User.objects.count(),
+        'page_cache': args.page_cache,
+        'cursor_pagination': args.cursor,
+    }
+    report = build_report(results, dataset)
+    print(format_results(report))
+    if args.output:
+        save_report(report, args.output)
+        print(f"Resultados guardados en {args.output}")
+
+
+def run_concurrency(args):
+    from . import concurrency
+
+    if args.mode:
+        results = concurrency.run_mode(args.mode, args.levels, args.requests, args.page_cache)
+        print(json.dumps(results))
+        return
+    if args.url:
+        results = {'server': concurrency.run_against_server(
+            args.url, concurrency.public_paths(), args.levels, args.requests,
+        )}
+    else:
+        results = concurrency.run_in_subprocesses(args.db, args.levels, args.requests, args.page_cache)
+    print(concurrency.format_comparison(results))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+        print(f"Resultados guardados en {args.output}")
+
+
+def run_stress(args):
+    from . import stress
+
+    if args.in_process:
+        print(json.dumps(stress.run_profile(args.duration, args.readers, args.writers)))
+        return
+    results = stress.run_in_subprocesses(args.db, args.duration, args.readers, args.writers)
+    print(stress.format_results(results))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+        print(f"Resultados guardados en {args.output}")
+
+
+def run_compare(args):
+    from .report import compare_reports, load_report
+
+    lines, regressions = compare_reports(load_report(args.baseline), load_report(args.current), args.threshold)
+    print('\n'.join(lines))
+    if regressions:
+        print(f"Regresiones (> {args.threshold}%): {', '.join(regressions)}")
+        if args.fail:
+            sys.exit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Benchmarks de las vistas del blog.")
+    parser.add_argument('--db', help="Archivo SQLite a usar (por defecto, el de settings).")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = subparsers.add_parser('seed', help="Cargar un conjunto de datos sintético.")
+    seed_parser.add_argument('--posts', type=int, default=10000)
+    seed_parser.add_argument('--users', type=int, default=1000)
+    seed_parser.add_argument('--images', type=int, default=20)
+    seed_parser.add_argument('--batch-size', type=int, default=1000)
+    seed_parser.add_argument('--seed', type=int, default=42)
+    seed_parser.set_defaults(handler=run_seed)
+
+    run_parser = subparsers.add_parser('run', help="Medir las vistas principales.")
+    run_parser.add_argument('--iterations', type=int, default=50)
+    run_parser.add_argument('--warmup', type=int, default=3)
+    run_parser.add_argument('--only', nargs='+', help="Ejecutar solo estos escenarios.")
+    run_parser.add_argument('--page-cache', action='store_true', help="Medir con la caché de páginas activa.")
+    run_parser.add_argument('--cursor', action='store_true', help="Medir con paginación por cursor.")
+    run_parser.add_argument('--output', '-o', help="Guardar los resultados en este archivo JSON.")
+    run_parser.set_defaults(handler=run_benchmarks)
+
+    concurrency_parser = subparsers.add_parser(
+        'concurrency', help="Comparar el rendimiento WSGI y ASGI con conexiones concurrentes.",
+    )
+    concurrency_parser.add_argument('--levels', type=int, nargs='+', default=[1, 8, 32],
+                                    help="Número de conexiones concurrentes a probar.")
+    concurrency_parser.add_argument('--requests', type=int, default=400, help="Peticiones por nivel.")
+    concurrency_parser.add_argument('--page-cache', action='store_true')
+    concurrency_parser.add_argument('--url', help="Medir contra un servidor ya levantado en esta URL.")
+    concurrency_parser.add_argument('--mode', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    concurrency_parser.add_argument('--output', '-o')
+    concurrency_parser.set_defaults(handler=run_concurrency)
+
+    stress_parser = subparsers.add_parser(
+        'sqlite-stress', help="Comparar lecturas y escrituras concurrentes con y sin el perfil sqlite-production.",
+    )
+    stress_parser.add_argument('--duration', type=float, default=10.0, help="Segundos por perfil.")
+    stress_parser.add_argument('--readers', type=int, default=8, help="Hilos que leen las vistas públicas.")
+    stress_parser.add_argument('--writers', type=int, default=2, help="Hilos que editan posts.")
+    stress_parser.add_argument('--in-process', action='store_true', help=argparse.SUPPRESS)
+    stress_parser.add_argument('--output', '-o')
+    stress_parser.set_defaults(handler=run_stress)
+
+    compare_parser = subparsers.add_parser('compare', help="Comparar dos resultados JSON.")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=10.0)
+    compare_parser.add_argument('--fail', action='store_true', help="Salir con error si hay regresiones.")
+    compare_parser.set_defaults(handler=run_compare, db=None)
+
+    args = parser.parse_args(argv)
+    if args.handler is not run_compare:
+        setup_django(args.db)
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from .scenarios import percentile
+
+
+# Compara el rendimiento con N conexiones concurrentes entre el handler WSGI
+# (un hilo por conexión, como gunicorn --threads) y el ASGI (un event loop,
+# como uvicorn) sobre las vistas públicas de lectura. Cada modo se ejecuta en
+# su propio proceso porque BLOG_ASYNC_VIEWS se lee al importar las URLs.
+
+
+def public_paths(sample_size=20):
+    from django.urls import reverse
+    from django.utils import timezone
+    from blog_app.models import Post
+
+    slugs = list(
+        Post.objects.filter(status='published', published_date__lte=timezone.now())
+        .order_by('-published_date').values_list('slug', flat=True)[:sample_size]
+    )
+    post_list = reverse('blog:post_list')
+    paths = [reverse('blog:home'), post_list, f'{post_list}?page=2', f'{post_list}?q=python']
+    paths.extend(reverse('blog:post_detail', kwargs={'slug': slug}) for slug in slugs)
+    return paths
+
+
+def summarize(latencies, elapsed, errors):
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+    }
+
+
+def run_wsgi(paths, concurrency, total):
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+
+    handler = WSGIHandler()
+    factory = RequestFactory(HTTP_HOST='localhost')
+
+    def request(i):
+        environ = factory.get(paths[i % len(paths)]).environ
+        status = []
+        start = time.perf_counter()
+        body = handler(environ, lambda code, headers, exc_info=None: status.append(code))
+        b''.join(body)
+        body.close()
+        return (time.perf_counter() - start) * 1000, not status[0].startswith('200')
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(request, range(total)))
+    elapsed = time.perf_counter() - start
+    return summarize([latency for latency, _ in results], elapsed, sum(error for _, error in results))
+
+
+def run_asgi(paths, concurrency, total):
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+
+    async def request(path):
+        url = urlsplit(path)
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': url.path, 'raw_path': url.path.encode(),
+            'query_string': url.query.encode(), 'root_path': '',
+            'headers': [(b'host', b'localhost')],
+            'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+        }
+        messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        status = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # El handler espera aquí una desconexión que nunca llega.
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        start = time.perf_counter()
+        await handler(scope, receive, send)
+        return (time.perf_counter() - start) * 1000, status[0] != 200
+
+    async def worker(queue, results):
+        while not queue.empty():
+            results.append(await request(queue.get_nowait()))
+
+    async def main():
+        queue = asyncio.Queue()
+        for i in range(total):
+            queue.put_nowait(paths[i % len(paths)])
+        results = []
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(queue, results) for _ in range(concurrency)))
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(main())
+    return summarize([latency for latency, _ in results], elapsed, sum(error for _, error in results))
+
+
+def run_mode(mode, levels, total, page_cache):
+    from django.test.utils import override_settings
+
+    overrides = {'ALLOWED_HOSTS': ['localhost']}
+    if not page_cache:
+        overrides['CACHES'] = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'pages': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+        }
+    runner = run_asgi if mode == 'asgi' else run_wsgi
+    with override_settings(**overrides):
+        paths = public_paths()
+        # Calentamiento: plantillas compiladas y conexiones abiertas.
+        runner(paths, 1, len(paths))
+        return {str(level): runner(paths, level, total) for level in levels}
+
+
+def run_in_subprocesses(database, levels, total, page_cache):
+    results = {}
+    for mode in ('wsgi', 'asgi'):
+        env = dict(os.environ, BLOG_ASYNC_VIEWS='1' if mode == 'asgi' else '0')
+        command = [sys.executable, '-m', 'benchmarks']
+        if database:
+            command += ['--db', database]
+        command += ['concurrency', '--mode', mode, '--requests', str(total), '--levels', *map(str, levels)]
+        if page_cache:
+            command.append('--page-cache')
+        output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+    return results
+
+
+async def _http_worker(host, port, paths, counter, total, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while counter[0] < total:
+            path = paths[counter[0] % len(paths)]
+            counter[0] += 1
+            start = time.perf_counter()
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode())
+            await writer.drain()
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if b' 200 ' not in status_line:
+                errors.append(status_line)
+    finally:
+        writer.close()
+
+
+def run_against_server(url, paths, levels, total):
+    # Servidor ya levantado, p. ej. `gunicorn blog.wsgi -w 1 --threads 8` o
+    # `uvicorn blog.asgi:application`; usa conexiones keep-alive.
+    target = urlsplit(url)
+    results = {}
+    for level in levels:
+        counter, latencies, errors = [0], [], []
+
+        async def main():
+            await asyncio.gather(*(
+                _http_worker(target.hostname, target.port or 80, paths, counter, total, latencies, errors)
+                for _ in range(level)
+            ))
+
+        start = time.perf_counter()
+        asyncio.run(main())
+        results[str(level)] = summarize(latencies, time.perf_counter() - start, len(errors))
+    return results
+
+
+def format_comparison(results):
+    modes = list(results)
+    levels = list(results[modes[0]])
+    header = f"{'conexiones':>10} " + ' '.join(f"{mode + ' req/s':>12} {mode + ' p95':>10}" for mode in modes)
+    lines = [header]
+    for level in levels:
+        cells = ' '.join(
+            f"{results[mode][level]['throughput_rps']:>12.1f} {results[mode][level]['p95_ms']:>10.2f}" for mode in modes
+        )
+        lines.append(f"{level:>10} {cells}")
+    return '\n'.join(lines)
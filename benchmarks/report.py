@@ -0,0 +1,78 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+
+
+METRICS = ('p50_ms', 'p95_ms', 'queries_per_request', 'peak_memory_kb')
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(results, dataset):
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'database': str(settings.DATABASES['default']['NAME']),
+            'dataset': dataset,
+        },
+        'scenarios': results,
+    }
+
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def format_results(report):
+    lines = [f"{'escenario':<18} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'mem KB':>9}"]
+    for name, metrics in report['scenarios'].items():
+        lines.append(
+            f"{name:<18} {metrics['p50_ms']:>9.2f} {metrics['p95_ms']:>9.2f} "
+            f"{metrics['queries_per_request']:>8} {metrics['peak_memory_kb']:>9.1f}"
+        )
+    return '\n'.join(lines)
+
+
+# Devuelve (líneas del reporte, regresiones) comparando contra un baseline;
+# una métrica es regresión si empeora más de `threshold` por ciento.
+def compare_reports(baseline, current, threshold=10.0):
+    lines = [f"baseline {baseline['meta'].get('revision')} -> actual {current['meta'].get('revision')}"]
+    regressions = []
+    for name, metrics in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            lines.append(f"{name:<18} (nuevo)")
+            continue
+        cells = []
+        for metric in METRICS:
+            old, new = before.get(metric), metrics.get(metric)
+            if old in (None, 0) or new is None:
+                cells.append(f"{metric}={new}")
+                continue
+            change = (new - old) / old * 100
+            cells.append(f"{metric}={old}->{new} ({change:+.1f}%)")
+            # Cualquier consulta extra es una regresión, sin importar el umbral.
+            if change > threshold or (metric == 'queries_per_request' and new > old):
+                regressions.append(f"{name}.{metric}")
+        lines.append(f"{name:<18} " + '  '.join(cells))
+    return lines, regressions
@@ -0,0 +1,124 @@
+import gc
+import itertools
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import slugify
+
+from blog_app.models import Post
+from .seed import BENCH_PASSWORD, WORDS
+
+
+HOST = 'localhost'
+
+
+class Scenario:
+
+    def __init__(self, name, requests, client=None, setup=None):
+        self.name = name
+        self.requests = requests
+        self.client = client or Client(HTTP_HOST=HOST)
+        self.setup = setup
+
+    def __call__(self):
+        method, url, data = next(self.requests)
+        if method == 'POST':
+            response = self.client.post(url, data)
+        else:
+            response = self.client.get(url)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{self.name}: {url} respondió {response.status_code}")
+        if self.setup:
+            self.setup(self.client)
+        return response
+
+
+def cycle_get(urls):
+    return itertools.cycle([('GET', url, None) for url in urls])
+
+
+def build_scenarios(sample_size=50):
+    visible = Post.objects.filter(status='published', published_date__lte=timezone.now())
+    total = visible.count()
+    if not total:
+        raise RuntimeError("No hay posts publicados: ejecutar primero 'python -m benchmarks seed'.")
+
+    from blog_app.views import PostListView
+    last_page = max(1, (total - 1) // PostListView.paginate_by + 1)
+    deep_page = max(1, int(last_page * 0.9))
+    slugs = list(visible.order_by('?').values_list('slug', flat=True)[:sample_size])
+    usernames = list(
+        User.objects.filter(username__startswith='bench_user_').order_by('?').values_list('username', flat=True)[:sample_size]
+    )
+    if not usernames:
+        raise RuntimeError("No hay usuarios de benchmark: ejecutar primero 'python -m benchmarks seed'.")
+
+    post_list = reverse('blog:post_list')
+    profile_client = Client(HTTP_HOST=HOST)
+    profile_client.force_login(User.objects.get(username=usernames[0]))
+
+    login_requests = itertools.cycle([
+        ('POST', reverse('accounts:login'), {'username': username, 'password': BENCH_PASSWORD})
+        for username in usernames
+    ])
+
+    return [
+        Scenario('home', cycle_get([reverse('blog:home')])),
+        Scenario('post_list', cycle_get([post_list])),
+        Scenario('post_list_deep', cycle_get([f'{post_list}?page={deep_page}'])),
+        Scenario('post_list_search', cycle_get([f'{post_list}?q={word}' for word in WORDS[:20]])),
+        Scenario('post_detail', cycle_get([reverse('blog:post_detail', kwargs={'slug': slug}) for slug in slugs])),
+        Scenario('tag_detail', cycle_get([reverse('blog:tag_detail', kwargs={'slug': slugify(word)}) for word in WORDS[:20]])),
+        Scenario('profile_view', cycle_get([
+            reverse('accounts:profile_view_user', kwargs={'username': username}) for username in usernames
+        ]), client=profile_client),
+        Scenario('login', login_requests, setup=lambda client: client.logout()),
+    ]
+
+
+def percentile(samples, pct):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def measure(scenario, iterations, warmup=3, memory_iterations=5):
+    for _ in range(warmup):
+        scenario()
+
+    timings = []
+    queries = []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            scenario()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured))
+
+    # La memoria se mide aparte: tracemalloc distorsiona los tiempos.
+    peaks = []
+    gc.collect()
+    tracemalloc.start()
+    for _ in range(memory_iterations):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        scenario()
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries_per_request': statistics.median(queries),
+        'max_queries': max(queries),
+        'peak_memory_kb': round(statistics.median(peaks) / 1024, 1),
+    }
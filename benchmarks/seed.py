@@ -0,0 +1,145 @@
+import io
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from PIL import Image, ImageDraw
+
+from accounts.models import Profile
+from blog_app.models import Post
+from blog_app.related import update_related_posts
+from blog_app.search import get_search_backend
+from blog_app.tags import rebuild_tags
+
+
+BENCH_PASSWORD = 'bench-password-123'
+IMAGE_DIR = 'bench'
+
+WORDS = (
+    "python django blog servidor consulta índice caché plantilla vista modelo usuario perfil "
+    "seguridad red paquete script automatizar análisis amenaza detección registro archivo "
+    "rendimiento memoria proceso hilo base datos tabla columna búsqueda texto imagen página "
+    "desarrollo prueba código función clase módulo error excepción respuesta petición sesión "
+    "el la los las un una de del en con por para sobre entre desde hasta muy más menos también"
+).split()
+
+
+def sentence(rng, low=6, high=18):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(low, high))]
+    return ' '.join(words).capitalize() + '.'
+
+
+def paragraph(rng):
+    parts = []
+    for _ in range(rng.randint(2, 5)):
+        text = sentence(rng)
+        roll = rng.random()
+        if roll < 0.15:
+            text = f'<strong>{text}</strong>'
+        elif roll < 0.25:
+            text = f'<em>{text}</em>'
+        elif roll < 0.32:
+            text = f'<a href="https://example.com/{rng.choice(WORDS)}" target="_blank">{text}</a>'
+        parts.append(text)
+    return '<p>' + ' '.join(parts) + '</p>'
+
+
+# Cuerpo HTML con la variedad de etiquetas que produce CKEditor.
+def ckeditor_body(rng, paragraphs):
+    blocks = []
+    for i in range(paragraphs):
+        if i and i % 4 == 0:
+            blocks.append(f'<h2>{sentence(rng, 2, 5)}</h2>')
+        roll = rng.random()
+        if roll < 0.1:
+            items = ''.join(f'<li>{sentence(rng, 3, 8)}</li>' for _ in range(rng.randint(3, 6)))
+            blocks.append(f'<ul>{items}</ul>')
+        elif roll < 0.15:
+            blocks.append(f'<blockquote><p>{sentence(rng)}</p></blockquote>')
+        elif roll < 0.18:
+            blocks.append(f'<p><img alt="" src="/media/uploads/{rng.choice(WORDS)}.jpg" style="height:300px; width:400px" /></p>')
+        blocks.append(paragraph(rng))
+    return '\n'.join(blocks)
+
+
+def create_images(rng, count):
+    names = []
+    for i in range(count):
+        image = Image.new('RGB', (1600, 900), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+        draw = ImageDraw.Draw(image)
+        for _ in range(40):
+            x, y = rng.randrange(1600), rng.randrange(900)
+            draw.ellipse((x, y, x + rng.randint(20, 300), y + rng.randint(20, 300)), fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=85)
+        name = f'{IMAGE_DIR}/imagen_{i}.jpg'
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        names.append(default_storage.save(name, ContentFile(buffer.getvalue())))
+    return names
+
+
+def seed(posts=10000, users=1000, images=20, batch_size=1000, seed_value=42, stdout=None):
+    rng = random.Random(seed_value)
+    log = stdout.write if stdout else (lambda message: None)
+    now = timezone.now()
+    password = make_password(BENCH_PASSWORD)
+
+    with transaction.atomic():
+        start = User.objects.count()
+        User.objects.bulk_create(
+            [User(username=f'bench_user_{start + i}', email=f'bench_user_{start + i}@example.com', password=password, date_joined=now)
+             for i in range(users)],
+            batch_size=batch_size,
+        )
+        created_users = list(User.objects.filter(username__startswith='bench_user_').exclude(profile__isnull=False))
+        Profile.objects.bulk_create([Profile(user=user, bio=sentence(rng)) for user in created_users], batch_size=batch_size)
+    log(f"Usuarios creados: {users}\n")
+
+    author_ids = list(User.objects.filter(username__startswith='bench_user_').values_list('pk', flat=True))
+    image_names = create_images(rng, images) if images else []
+    log(f"Imágenes creadas: {len(image_names)}\n")
+
+    offset = Post.objects.count()
+    created = 0
+    while created < posts:
+        batch = []
+        for i in range(min(batch_size, posts - created)):
+            number = offset + created + i
+            title = sentence(rng, 3, 9).rstrip('.')
+            roll = rng.random()
+            if roll < 0.05:
+                status, published_date = 'draft', now - timedelta(minutes=rng.randint(0, 60 * 24 * 365 * 5))
+            elif roll < 0.10:
+                status, published_date = 'published', now + timedelta(minutes=rng.randint(60, 60 * 24 * 60))
+            else:
+                status, published_date = 'published', now - timedelta(minutes=rng.randint(0, 60 * 24 * 365 * 5))
+            post = Post(
+                title=title,
+                slug=f'{slugify(title)[:200]}-{number}',
+                author_id=rng.choice(author_ids),
+                summary=paragraph(rng),
+                content=ckeditor_body(rng, rng.randint(4, 30)),
+                status=status,
+                published_date=published_date,
+                keywords=', '.join(rng.sample(WORDS, 4)),
+                featured_image=rng.choice(image_names) if image_names and rng.random() < 0.6 else None,
+            )
+            post.refresh_derived_fields()
+            batch.append(post)
+        with transaction.atomic():
+            Post.objects.bulk_create(batch)
+        created += len(batch)
+        log(f"  {created}/{posts} posts\n")
+
+    with transaction.atomic():
+        indexed = get_search_backend().rebuild(Post.objects.select_related('author').iterator(chunk_size=batch_size))
+    log(f"Índice de búsqueda: {indexed} posts\n")
+    log(f"Etiquetas: {rebuild_tags(batch_size)} asignaciones\n")
+    log(f"Posts relacionados: {update_related_posts(full=True)['lists']} listas\n")
@@ -0,0 +1,177 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from .concurrency import public_paths, summarize
+
+
+# Carga concurrente de lecturas (vistas públicas) y escrituras (edición de
+# posts) sobre SQLite, para comparar la configuración por defecto con el
+# perfil sqlite-production (WAL, pragmas, conexiones persistentes y
+# BEGIN IMMEDIATE). Cada perfil se ejecuta en su propio proceso, porque
+# DATABASES se lee al arrancar, y sobre su propia copia de la base.
+PROFILES = ('default', 'sqlite-production')
+
+
+def copy_database(source, target):
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+        # WAL queda guardado en el archivo; cada perfil parte del modo por defecto.
+        dst.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        src.close()
+        dst.close()
+
+
+def writer_setup(writers):
+    from django.contrib.auth.models import User
+    from django.db.models import Count
+    from django.test import Client
+    from django.utils.crypto import get_random_string
+
+    author = User.objects.annotate(total=Count('blog_posts')).order_by('-total').first()
+    posts = list(author.blog_posts.order_by('pk')[:writers])
+    if len(posts) < writers:
+        raise RuntimeError("No hay suficientes posts de un mismo autor: ejecutar primero 'python -m benchmarks seed'.")
+    client = Client()
+    client.force_login(author)
+    # Un mismo secreto en la cookie y en el formulario pasa la validación CSRF.
+    token = get_random_string(32)
+    cookie = f"{client.cookies['sessionid'].key}={client.cookies['sessionid'].value}; csrftoken={token}"
+    return posts, cookie, token
+
+
+def update_data(post, token, iteration):
+    return {
+        'csrfmiddlewaretoken': token,
+        'title': f"{post.title.split(' #')[0]} #{iteration}",
+        'slug': post.slug,
+        'summary': post.summary,
+        'content': post.content,
+        'status': post.status,
+        'published_date': post.published_date.strftime('%Y-%m-%dT%H:%M'),
+        'meta_description': post.meta_description or '',
+        'keywords': post.keywords or '',
+    }
+
+
+def run_profile(duration, readers, writers):
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+    from django.test.utils import override_settings
+    from django.urls import reverse
+
+    handler = WSGIHandler()
+    factory = RequestFactory(HTTP_HOST='localhost')
+
+    def call(environ, expected):
+        status = []
+        start = time.perf_counter()
+        body = handler(environ, lambda code, headers, exc_info=None: status.append(code))
+        b''.join(body)
+        body.close()
+        return (time.perf_counter() - start) * 1000, not status[0].startswith(expected)
+
+    results = {'reads': [], 'writes': []}
+    errors = {'reads': 0, 'writes': 0}
+    lock = threading.Lock()
+    deadline = None
+
+    def reader(index, paths):
+        latencies, failed = [], 0
+        i = index
+        while time.perf_counter() < deadline:
+            latency, error = call(factory.get(paths[i % len(paths)]).environ, '200')
+            latencies.append(latency)
+            failed += error
+            i += 1
+        with lock:
+            results['reads'].extend(latencies)
+            errors['reads'] += failed
+
+    def writer(post, cookie, token):
+        url = reverse('blog:post_update', kwargs={'slug': post.slug})
+        latencies, failed = [], 0
+        iteration = 0
+        while time.perf_counter() < deadline:
+            iteration += 1
+            environ = factory.post(url, update_data(post, token, iteration), HTTP_COOKIE=cookie).environ
+            latency, error = call(environ, '302')
+            latencies.append(latency)
+            failed += error
+        with lock:
+            results['writes'].extend(latencies)
+            errors['writes'] += failed
+
+    overrides = {
+        'ALLOWED_HOSTS': ['localhost'],
+        'BLOG_IMAGE_ASYNC': False,
+        # Se mide la base de datos, no la caché de páginas.
+        'CACHES': {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'pages': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+        },
+    }
+    with override_settings(**overrides):
+        paths = public_paths()
+        posts, cookie, token = writer_setup(writers) if writers else ([], '', '')
+        threads = [threading.Thread(target=reader, args=(i, paths)) for i in range(readers)]
+        threads += [threading.Thread(target=writer, args=(post, cookie, token)) for post in posts]
+        start = time.perf_counter()
+        deadline = start + duration
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+    database = settings.DATABASES['default']
+    return {
+        'profile': os.environ.get('BLOG_DATABASE_PROFILE', 'default'),
+        'conn_max_age': database.get('CONN_MAX_AGE', 0),
+        'reads': summarize(results['reads'], elapsed, errors['reads']) if results['reads'] else None,
+        'writes': summarize(results['writes'], elapsed, errors['writes']) if results['writes'] else None,
+    }
+
+
+def run_in_subprocesses(database, duration, readers, writers):
+    from django.conf import settings
+
+    source = Path(database or settings.DATABASES['default']['NAME'])
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in PROFILES:
+            copy = Path(tmp) / f'{profile}.sqlite3'
+            copy_database(source, copy)
+            env = dict(os.environ, BLOG_DATABASE_PROFILE=profile)
+            command = [
+                sys.executable, '-m', 'benchmarks', '--db', str(copy), 'sqlite-stress', '--in-process',
+                '--duration', str(duration), '--readers', str(readers), '--writers', str(writers),
+            ]
+            output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+            results[profile] = json.loads(output.strip().splitlines()[-1])
+            for path in Path(tmp).glob(f'{profile}.sqlite3*'):
+                path.unlink()
+    return results
+
+
+def format_results(results):
+    header = (f"{'perfil':>18} {'lecturas/s':>11} {'lect. p95':>10} {'err':>5} "
+              f"{'escrit./s':>10} {'escr. p95':>10} {'err':>5}")
+    lines = [header]
+    for profile, result in results.items():
+        reads = result['reads'] or {'throughput_rps': 0.0, 'p95_ms': 0.0, 'errors': 0}
+        writes = result['writes'] or {'throughput_rps': 0.0, 'p95_ms': 0.0, 'errors': 0}
+        lines.append(
+            f"{profile:>18} {reads['throughput_rps']:>11.1f} {reads['p95_ms']:>10.2f} {reads['errors']:>5} "
+            f"{writes['throughput_rps']:>10.1f} {writes['p95_ms']:>10.2f} {writes['errors']:>5}"
+        )
+    return '\n'.join(lines)
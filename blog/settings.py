@@ -33,10 +33,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog_app.instrumentation.InstrumentationMiddleware',
+    'blog_app.routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog_app.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -64,10 +67,46 @@ WSGI_APPLICATION = 'blog.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3', 
+        'NAME': os.environ.get('BLOG_DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+# Réplicas de sólo lectura (rutas separadas por comas). Las vistas públicas
+# leen de ellas; las escrituras y el resto de vistas usan 'default'.
+for i, name in enumerate(filter(None, os.environ.get('BLOG_DATABASE_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{i}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+BLOG_DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['blog_app.routers.ReplicaRouter']
+# Segundos que las lecturas de un usuario van a la primaria después de escribir;
+# durante el mismo plazo no se guardan en la caché páginas leídas de una réplica.
+BLOG_REPLICA_STICKY_SECONDS = 10
+
+PAGE_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blog-pages',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'pages'),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('BLOG_REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': PAGE_CACHE_BACKENDS[os.environ.get('BLOG_PAGE_CACHE_BACKEND', 'locmem')],
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -99,6 +138,7 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
@@ -141,3 +181,104 @@ MESSAGE_TAGS = {
     messages.WARNING: 'alert-warning',
     messages.ERROR: 'alert-danger',
 }
+
+# None: FTS5 en SQLite y búsqueda con icontains en otros motores.
+BLOG_SEARCH_BACKEND = None
+BLOG_SEARCH_MAX_RESULTS = 200
+
+BLOG_PAGE_CACHE_ALIAS = 'pages'
+BLOG_PAGE_CACHE_TIMEOUT = 600
+BLOG_CURSOR_PAGINATION = False
+
+BLOG_IMAGE_WORKERS = 2
+BLOG_IMAGE_ASYNC = True
+
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.ProfileModelBackend',
+    'django.contrib.auth.backends.ModelBackend',  # sesiones iniciadas antes del cambio
+]
+# Caché del usuario de la sesión con su perfil (segundos; None la desactiva).
+# Sólo se usa si ACCOUNTS_USER_CACHE_ALIAS es compartida entre procesos
+# (redis, archivos); con LocMemCache queda desactivada.
+ACCOUNTS_USER_CACHE_TIMEOUT = None
+ACCOUNTS_USER_CACHE_ALIAS = 'default'
+BLOG_HTTP_MAX_AGE = 60
+
+# Métricas por petición (consultas SQL, tiempos) en cabeceras Server-Timing.
+BLOG_INSTRUMENTATION = os.environ.get('BLOG_INSTRUMENTATION') == '1'
+
+# Vistas públicas async; blog/asgi.py lo activa al servir con ASGI.
+BLOG_ASYNC_VIEWS = os.environ.get('BLOG_ASYNC_VIEWS') == '1'
+
+# Contador de lecturas: se acumula en memoria y se vuelca a los N segundos de
+# la primera lectura pendiente (None: sólo al salir o con flush_views()).
+BLOG_VIEW_COUNTER = True
+BLOG_VIEW_FLUSH_INTERVAL = 30
+BLOG_POPULAR_POSTS_SIZE = 20
+
+# Cantidad de posts relacionados por post (ver blog_app/related.py).
+BLOG_RELATED_POSTS = 5
+
+# Perfiles cProfile: a pedido del staff (?_profile=1 o cabecera X-Profile) y
+# por muestreo de una fracción de las peticiones. Se guardan los N más recientes.
+BLOG_PROFILING = True
+BLOG_PROFILE_SAMPLE_RATE = float(os.environ.get('BLOG_PROFILE_SAMPLE_RATE', '0'))
+BLOG_PROFILE_DIR = BASE_DIR / 'profiles'
+BLOG_PROFILE_KEEP = 50
+
+# Perfil de producción para SQLite (BLOG_DATABASE_PROFILE=sqlite-production):
+# WAL para que las lecturas no esperen a las escrituras, pragmas aplicados al
+# abrir cada conexión, conexiones persistentes con comprobación de salud y
+# BEGIN IMMEDIATE, para que una escritura espere el lock (busy_timeout) al
+# empezar en lugar de fallar al promocionar una transacción de lectura.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,  # en KiB: 64 MB por conexión
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+SQLITE_PRODUCTION_OPTIONS = {
+    'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+    'transaction_mode': 'IMMEDIATE',
+}
+BLOG_DATABASE_PROFILE = os.environ.get('BLOG_DATABASE_PROFILE', 'default')
+if BLOG_DATABASE_PROFILE == 'sqlite-production':
+    for database in DATABASES.values():
+        database.update({
+            'OPTIONS': SQLITE_PRODUCTION_OPTIONS,
+            # Bajo ASGI Django no reutiliza conexiones entre peticiones.
+            'CONN_MAX_AGE': 0 if BLOG_ASYNC_VIEWS else int(os.environ.get('BLOG_CONN_MAX_AGE', '600')),
+            'CONN_HEALTH_CHECKS': True,
+        })
+
+# Reintentos de las vistas que escriben ante "database is locked".
+BLOG_DB_LOCK_RETRIES = 3
+BLOG_DB_LOCK_RETRY_DELAY = 0.05
+
+# Feeds RSS/Atom y sitemap (ver blog_app/feeds.py). Las URLs absolutas se
+# arman con BLOG_SITE_URL porque se generan fuera de una petición concreta.
+BLOG_SITE_URL = os.environ.get('BLOG_SITE_URL', 'http://localhost:8000')
+BLOG_FEED_ITEMS = 20
+BLOG_SITEMAP_PAGE_SIZE = 1000
+
+# Estáticos en producción: collectstatic minifica el CSS, agrega el hash del
+# contenido a cada nombre (manifiesto en STATIC_ROOT/staticfiles.json) y
+# genera variantes .gz y .br (ver blog_app/staticfiles.py). Con DEBUG se
+# sirven sin procesar desde STATICFILES_DIRS.
+if not DEBUG:
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'blog_app.staticfiles.PrecompressedManifestStorage'},
+    }
+# Cache-Control de los archivos con hash (inmutables): un año.
+BLOG_STATIC_MAX_AGE = 365 * 24 * 60 * 60
+
+# Archivos subidos (ver blog_app/media.py). Con BLOG_MEDIA_SENDFILE el envío
+# se delega al servidor web después de comprobar el acceso: 'x-accel-redirect'
+# (nginx, con una location internal en BLOG_MEDIA_ACCEL_PREFIX que apunte a
+# MEDIA_ROOT) o 'x-sendfile' (Apache con mod_xsendfile, lighttpd).
+BLOG_MEDIA_SENDFILE = os.environ.get('BLOG_MEDIA_SENDFILE', '')
+BLOG_MEDIA_ACCEL_PREFIX = '/protected-media/'
+BLOG_MEDIA_MAX_AGE = 24 * 60 * 60
@@ -1,16 +1,27 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from blog_app.media import serve as serve_media
+from blog_app.staticfiles import serve as serve_static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('blog_app.urls', namespace='blog')), 
     path('accounts/', include('accounts.urls', namespace='accounts')), 
     path('ckeditor/', include('ckeditor_uploader.urls')),
+    # También sin DEBUG: aplica las reglas de acceso de los borradores.
+    re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media),
 ]
 
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+else:
+    # Sin DEBUG, los archivos generados por collectstatic (con hash y
+    # precomprimidos) se sirven con caché de larga duración.
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), serve_static),
+    ]
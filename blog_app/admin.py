@@ -1,10 +1,10 @@
 from django.contrib import admin
-from .models import Post
+from .models import Post, Tag
 
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('title', 'author', 'status', 'published_date', 'created_at', 'updated_at', 'is_published')
+    list_display = ('title', 'author', 'status', 'published_date', 'created_at', 'updated_at', 'is_published', 'view_count')
     list_filter = ('status', 'author', 'published_date', 'created_at')
     search_fields = ('title', 'summary', 'content', 'author__username')
     
@@ -27,8 +27,15 @@ class PostAdmin(admin.ModelAdmin):
         }),
     )
 
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'view_count')
 
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('author')
 
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'post_count')
+    search_fields = ('name', 'slug')
+    readonly_fields = ('post_count',)
+
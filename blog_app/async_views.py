@@ -0,0 +1,183 @@
+from django.core.paginator import InvalidPage
+from django.http import Http404
+from django.template.response import TemplateResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
+
+from . import cache as page_cache
+from . import counters
+from . import views
+from .instrumentation import query_budget
+from .models import Post
+from .pagination import CURSOR_PARAM, apaginate_by_cursor
+from .search import asearch_posts
+
+
+# Versiones async de las vistas públicas de lectura, usadas bajo ASGI
+# (BLOG_ASYNC_VIEWS). Reutilizan el contexto de las vistas síncronas, pero
+# las consultas, la caché de páginas y el ETag se resuelven con await; la
+# plantilla la renderiza el handler de Django una vez resuelto todo.
+class AsyncPageMixin:
+
+    async def aget_conditional_validators(self):
+        raise NotImplementedError
+
+    async def aget_page_cache_key(self):
+        raise NotImplementedError
+
+    async def aget_context_data(self, **kwargs):
+        raise NotImplementedError
+
+    def dispatch(self, request, *args, **kwargs):
+        # Sin los dispatch() síncronos de ConditionalGetMixin y AnonymousPageCacheMixin.
+        return View.dispatch(self, request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        # El usuario se carga una sola vez; la plantilla reutiliza el mismo objeto.
+        request.user = await request.auser()
+
+        etag = timestamp = None
+        if 'messages' not in request.COOKIES:
+            validators = await self.aget_conditional_validators()
+            if validators is not None:
+                parts, last_modified = page_cache.combine_validators(*validators, request.user)
+                etag = page_cache.make_etag(request.get_full_path(), *parts)
+                timestamp = page_cache.to_timestamp(last_modified) if last_modified else None
+                response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+                if response is not None:
+                    return self.set_validators(response, etag, timestamp)
+
+        response = await self.aget_cached_or_render(request, **kwargs)
+        if etag is None or response.status_code != 200:
+            return response
+        return self.set_validators(response, etag, timestamp)
+
+    def set_validators(self, response, etag, timestamp):
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        self.patch_http_cache_headers(response)
+        return response
+
+    async def aget_cached_or_render(self, request, **kwargs):
+        key = None
+        if page_cache.is_cacheable_request(request, self.page_cache_params):
+            key = await self.aget_page_cache_key()
+        if key:
+            cached = await page_cache.aget_cached_response(key)
+            if cached is not None:
+                return cached
+
+        response = self.render_to_response(await self.aget_context_data(**kwargs))
+        if key:
+            page_cache.cache_response_on_render(key, response, await page_cache.apage_cache_timeout())
+        return response
+
+
+class HomeView(AsyncPageMixin, views.HomeView):
+
+    async def aget_conditional_validators(self):
+        return await page_cache.alisting_validators()
+
+    async def aget_page_cache_key(self):
+        return page_cache.home_key()
+
+    async def aget_context_data(self, **kwargs):
+        context = self.get_context_data(**kwargs)
+        context['recent_posts'] = [post async for post in context['recent_posts']]
+        return context
+
+
+class PostListView(AsyncPageMixin, views.PostListView):
+
+    async def aget_conditional_validators(self):
+        return await page_cache.alisting_validators()
+
+    async def aget_page_cache_key(self):
+        query = self.request.GET.get('q')
+        if self.use_cursor_pagination():
+            page = self.request.GET.get(CURSOR_PARAM, '')
+        else:
+            page = self.request.GET.get('page') or '1'
+            if not page.isdigit():
+                return None
+        if query:
+            return page_cache.search_key(query, page, await page_cache.alisting_version())
+        if self.use_cursor_pagination():
+            return page_cache.cursor_list_key(page, await page_cache.alisting_version())
+        return page_cache.list_key(page)
+
+    async def aget_queryset(self):
+        queryset = self.get_published_queryset()
+        query = self.request.GET.get('q')
+        if query:
+            queryset, self.search_truncated = await asearch_posts(queryset, query)
+        return queryset
+
+    async def apaginate_queryset(self, queryset, page_size):
+        if self.use_cursor_pagination():
+            page = await apaginate_by_cursor(self.request, queryset, page_size)
+            return (None, page, page.object_list, page.has_other_pages())
+
+        paginator = self.get_paginator(queryset, page_size, allow_empty_first_page=self.get_allow_empty())
+        # Paginator.count es una cached_property: se resuelve antes con acount().
+        paginator.count = await queryset.acount()
+        page_number = self.kwargs.get(self.page_kwarg) or self.request.GET.get(self.page_kwarg) or 1
+        try:
+            page_number = paginator.num_pages if page_number == 'last' else int(page_number)
+        except ValueError:
+            raise Http404("La página no es 'last' ni un número entero.")
+        try:
+            page = paginator.page(page_number)
+        except InvalidPage as e:
+            raise Http404(f"Página inválida ({page_number}): {e}")
+        page.object_list = [post async for post in page.object_list]
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def paginate_queryset(self, queryset, page_size):
+        return self._pagination
+
+    async def aget_context_data(self, **kwargs):
+        self.object_list = await self.aget_queryset()
+        self._pagination = await self.apaginate_queryset(self.object_list, self.paginate_by)
+        return self.get_context_data(**kwargs)
+
+
+class PostDetailView(AsyncPageMixin, views.PostDetailView):
+
+    async def get(self, request, *args, **kwargs):
+        response = await super().get(request, *args, **kwargs)
+        if self.count_views and request.method == 'GET' and response.status_code in (200, 304):
+            counters.record_view(self.get_viewed_post_id())
+        return response
+
+    async def aget_conditional_validators(self):
+        validators = await page_cache.apost_validators(self.get_queryset(), self.kwargs['slug'])
+        if validators is not None:
+            self.validated_post_id = validators[0][0]
+        return validators
+
+    async def aget_page_cache_key(self):
+        return page_cache.detail_key(self.kwargs['slug'])
+
+    async def aget_object(self):
+        if not hasattr(self, '_post'):
+            queryset = self.get_queryset().select_related('author')
+            try:
+                self._post = await queryset.aget(slug=self.kwargs[self.slug_url_kwarg])
+            except Post.DoesNotExist:
+                raise Http404("El post que buscas no está disponible o no existe.")
+        return self._post
+
+    async def aget_context_data(self, **kwargs):
+        self.object = await self.aget_object()
+        context = self.get_context_data(object=self.object)
+        context['related_posts'] = [post async for post in context['related_posts']]
+        return context
+
+
+@query_budget(views.about_view.query_budget)
+async def about_view(request):
+    request.user = await request.auser()
+    return TemplateResponse(request, 'blog_app/about.html', views.about_context())
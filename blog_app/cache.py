@@ -0,0 +1,308 @@
+import hashlib
+from calendar import timegm
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .routers import reading_from_replica, replica_aliases, sticky_seconds
+
+
+KEY_PREFIX = 'blog:page'
+
+
+def get_page_cache():
+    return caches[getattr(settings, 'BLOG_PAGE_CACHE_ALIAS', 'pages')]
+
+
+def make_key(*parts):
+    return ':'.join([KEY_PREFIX] + [str(part) for part in parts])
+
+
+def home_key():
+    return make_key('home')
+
+
+def list_key(page):
+    return make_key('list', page)
+
+
+def detail_key(slug):
+    return make_key('detail', slug)
+
+
+def listing_version():
+    return get_page_cache().get(make_key('listing-version'), 0)
+
+
+async def alisting_version():
+    return await get_page_cache().aget(make_key('listing-version'), 0)
+
+
+def search_key(query, page, version=None):
+    if version is None:
+        version = listing_version()
+    digest = hashlib.md5(query.encode('utf-8')).hexdigest()
+    return make_key('search', version, digest, page)
+
+
+def cursor_list_key(cursor, version=None):
+    if version is None:
+        version = listing_version()
+    return make_key('cursor', version, cursor or 'first')
+
+
+def tag_key(slug, cursor, version=None):
+    if version is None:
+        version = listing_version()
+    return make_key('tag', version, slug, cursor or 'first')
+
+
+def is_cacheable_request(request, allowed_params=()):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if any(param not in allowed_params for param in request.GET):
+        return False
+    # Los mensajes pendientes (ej. "Has cerrado sesión") no deben quedar en la caché.
+    if 'messages' in request.COOKIES:
+        return False
+    return not request.user.is_authenticated
+
+
+def _scheduled_publications():
+    from .models import Post
+    return Post.objects.filter(
+        status='published',
+        published_date__gt=timezone.now()
+    ).order_by('published_date').values_list('published_date', flat=True)
+
+
+def next_scheduled_publication():
+    return _scheduled_publications().first()
+
+
+def _timeout_until(next_publication):
+    timeout = getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 600)
+    if next_publication is not None:
+        seconds = int((next_publication - timezone.now()).total_seconds())
+        timeout = max(1, min(timeout, seconds))
+    return timeout
+
+
+def page_cache_timeout():
+    return _timeout_until(next_scheduled_publication())
+
+
+async def apage_cache_timeout():
+    return _timeout_until(await _scheduled_publications().afirst())
+
+
+def _cached_response(entry):
+    if entry is None:
+        return None
+    content, content_type = entry
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Page-Cache'] = 'HIT'
+    return response
+
+
+def get_cached_response(key):
+    return _cached_response(get_page_cache().get(key))
+
+
+async def aget_cached_response(key):
+    return _cached_response(await get_page_cache().aget(key))
+
+
+def mark_written():
+    # Tras invalidar páginas, una réplica atrasada todavía puede devolver los
+    # datos anteriores: durante BLOG_REPLICA_STICKY_SECONDS no se guardan las
+    # páginas generadas con lecturas de una réplica.
+    if replica_aliases():
+        get_page_cache().set(make_key('written'), True, sticky_seconds())
+
+
+def _replica_may_be_stale():
+    return reading_from_replica() and get_page_cache().get(make_key('written')) is not None
+
+
+def cache_response_on_render(key, response, timeout=None):
+    def store(rendered):
+        if rendered.status_code != 200 or rendered.cookies or _replica_may_be_stale():
+            return
+        cache_timeout = timeout if timeout is not None else page_cache_timeout()
+        get_page_cache().set(key, (rendered.content, rendered['Content-Type']), cache_timeout)
+        rendered['X-Page-Cache'] = 'MISS'
+
+    if hasattr(response, 'add_post_render_callback') and not response.is_rendered:
+        response.add_post_render_callback(store)
+    else:
+        store(response)
+    return response
+
+
+def _is_visible(status, published_date, now):
+    return status == 'published' and published_date is not None and published_date <= now
+
+
+def _list_page(published_date, pk, per_page, now):
+    from .models import Post
+    newer = Post.objects.filter(
+        status='published',
+        published_date__lte=now,
+    ).exclude(pk=pk).filter(published_date__gte=published_date).count()
+    return newer // per_page + 1
+
+
+def purge_post(post, previous=None):
+    from .models import Post
+    from .views import PostListView
+
+    cache = get_page_cache()
+    now = timezone.now()
+    per_page = PostListView.paginate_by
+    keys = [home_key(), detail_key(post.slug)]
+
+    current = (post.status, post.published_date)
+    if previous is not None:
+        if previous['slug'] != post.slug:
+            keys.append(detail_key(previous['slug']))
+        previous_state = (previous['status'], previous['published_date'])
+    else:
+        previous_state = None
+
+    # Páginas del listado donde estaba y donde está ahora el post.
+    pages = []
+    for state in (previous_state, current):
+        if state is not None and _is_visible(state[0], state[1], now):
+            pages.append(_list_page(state[1], post.pk, per_page, now))
+
+    if pages:
+        first_page = min(pages)
+        if previous_state == current:
+            # Sólo cambió el contenido: el orden del listado se mantiene.
+            last_page = first_page
+        else:
+            # Altas, bajas o cambios de fecha desplazan todas las páginas siguientes.
+            total = Post.objects.filter(status='published', published_date__lte=now).count()
+            last_page = total // per_page + 1
+        keys.extend(list_key(page) for page in range(first_page, last_page + 1))
+
+    mark_written()
+    cache.delete_many(keys)
+    _bump_listing_version(cache)
+
+
+def _bump_listing_version(cache):
+    # Las búsquedas y las páginas por cursor no se pueden enumerar: se
+    # invalidan todas cambiando la versión de sus claves.
+    try:
+        cache.incr(make_key('listing-version'))
+    except ValueError:
+        cache.set(make_key('listing-version'), 1, None)
+
+
+def purge_author(user_id):
+    # El nombre del autor aparece en el inicio, en el listado y en sus posts.
+    from .models import Post
+    from .views import PostListView
+
+    cache = get_page_cache()
+    per_page = PostListView.paginate_by
+    total = Post.objects.filter(status='published', published_date__lte=timezone.now()).count()
+    keys = [home_key()]
+    keys.extend(detail_key(slug) for slug in Post.objects.filter(author_id=user_id).values_list('slug', flat=True))
+    keys.extend(list_key(page) for page in range(1, total // per_page + 2))
+    mark_written()
+    cache.delete_many(keys)
+    _bump_listing_version(cache)
+
+
+def make_etag(*parts):
+    digest = hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+    return f'W/"{digest}"'
+
+
+def to_timestamp(value):
+    return timegm(value.utctimetuple())
+
+
+def viewer_validators(user):
+    # La navbar muestra el nombre y el avatar del usuario: cambian el HTML sin
+    # que cambie el contenido. El perfil ya viene con el usuario (select_related).
+    if not user.is_authenticated:
+        return ('anon',), None
+    from accounts.models import get_profile
+
+    profile = get_profile(user)
+    updated_at = profile.updated_at
+    return (user.pk, user.username, updated_at and updated_at.isoformat(), profile.avatar_widths), updated_at
+
+
+def combine_validators(parts, last_modified, user):
+    viewer_parts, viewer_modified = viewer_validators(user)
+    if viewer_modified is not None and (last_modified is None or viewer_modified > last_modified):
+        last_modified = viewer_modified
+    return (*parts, *viewer_parts), last_modified
+
+
+def _listing_state():
+    # Agregado resuelto con el índice (status, published_date, updated_at),
+    # sin leer las filas completas.
+    from .models import Post
+    return Post.objects.filter(
+        status='published',
+        published_date__lte=timezone.now(),
+    ), {'count': Count('pk'), 'last_published': Max('published_date'), 'last_updated': Max('updated_at')}
+
+
+def _listing_validators(state):
+    if not state['count']:
+        return (0,), None
+    last_modified = max(state['last_published'], state['last_updated'])
+    return (state['count'], state['last_published'].isoformat(), state['last_updated'].isoformat()), last_modified
+
+
+def listing_validators():
+    queryset, aggregates = _listing_state()
+    return _listing_validators(queryset.aggregate(**aggregates))
+
+
+async def alisting_validators():
+    queryset, aggregates = _listing_state()
+    return _listing_validators(await queryset.aaggregate(**aggregates))
+
+
+def purge_related(slugs):
+    # Los posts relacionados cambian sin que cambie el post: se borran sus
+    # páginas. El ETag de los detalles cambia con RelatedPost.computed_at.
+    mark_written()
+    get_page_cache().delete_many([detail_key(slug) for slug in slugs])
+
+
+def _post_state(queryset, slug):
+    # Una consulta: el post y la fecha de su lista de relacionados, guardada
+    # en la base para que todos los procesos calculen el mismo ETag.
+    from .models import RelatedPost
+    related_at = RelatedPost.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(
+        last=Max('computed_at'),
+    ).values('last')
+    return queryset.filter(slug=slug).annotate(related_at=Subquery(related_at)).values('pk', 'updated_at', 'related_at')
+
+
+def _post_validators(state):
+    if state is None:
+        return None
+    related_at = state['related_at']
+    last_modified = max(state['updated_at'], related_at) if related_at else state['updated_at']
+    return (state['pk'], state['updated_at'].isoformat(), related_at and related_at.isoformat()), last_modified
+
+
+def post_validators(queryset, slug):
+    return _post_validators(_post_state(queryset, slug).first())
+
+
+async def apost_validators(queryset, slug):
+    return _post_validators(await _post_state(queryset, slug).afirst())
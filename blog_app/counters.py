@@ -0,0 +1,213 @@
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = {
+    'day': timedelta(days=1),
+    'week': timedelta(days=7),
+}
+
+# Lecturas pendientes de escribir: (post_id, hora) -> cantidad. Cada proceso
+# tiene su propio buffer; como las escrituras son incrementos, varios workers
+# pueden volcar sus buffers sin coordinarse.
+_buffer = Counter()
+_lock = threading.Lock()
+_timer = None
+_executor = None
+
+
+def counter_enabled():
+    return getattr(settings, 'BLOG_VIEW_COUNTER', True)
+
+
+def flush_interval():
+    # None desactiva el volcado automático (sólo flush_views() explícito).
+    return getattr(settings, 'BLOG_VIEW_FLUSH_INTERVAL', 30)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='post-views')
+    return _executor
+
+
+def truncate_to_hour(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def record_view(post_id, when=None):
+    if not counter_enabled():
+        return
+    hour = truncate_to_hour(when or timezone.now())
+    with _lock:
+        _buffer[(post_id, hour)] += 1
+        _start_timer()
+
+
+def _start_timer():
+    # Con _lock tomado. La primera lectura pendiente programa el volcado para
+    # dentro de BLOG_VIEW_FLUSH_INTERVAL segundos, aunque no lleguen más.
+    global _timer
+    interval = flush_interval()
+    if _timer is not None or interval is None:
+        return
+    _timer = threading.Timer(interval, _flush_from_timer)
+    _timer.daemon = True
+    _timer.start()
+
+
+def _flush_from_timer():
+    global _timer
+    with _lock:
+        _timer = None
+    # El hilo del executor conserva su conexión entre volcados.
+    get_executor().submit(_flush_safely)
+
+
+def pending_views():
+    with _lock:
+        return sum(_buffer.values())
+
+
+def _take_buffer():
+    with _lock:
+        events = dict(_buffer)
+        _buffer.clear()
+    return events
+
+
+def _restore_buffer(events):
+    with _lock:
+        _buffer.update(events)
+        _start_timer()
+
+
+def _write_views(events):
+    from .models import Post, PostViewBucket
+
+    totals = Counter()
+    for (post_id, _), views in events.items():
+        totals[post_id] += views
+    # Los posts eliminados desde la lectura se descartan.
+    existing = set(Post.objects.filter(pk__in=totals).values_list('pk', flat=True))
+
+    # Un único UPDATE por cada incremento distinto, no uno por lectura.
+    by_increment = defaultdict(list)
+    for post_id, views in totals.items():
+        if post_id in existing:
+            by_increment[views].append(post_id)
+
+    table = PostViewBucket._meta.db_table
+    rows = [
+        (post_id, connection.ops.adapt_datetimefield_value(hour), views)
+        for (post_id, hour), views in events.items() if post_id in existing
+    ]
+    with transaction.atomic():
+        for views, post_ids in by_increment.items():
+            Post.objects.filter(pk__in=post_ids).update(view_count=F('view_count') + views)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {table} (post_id, hour, views) VALUES (%s, %s, %s) "
+                f"ON CONFLICT (post_id, hour) DO UPDATE SET views = {table}.views + excluded.views",
+                rows,
+            )
+    return sum(views for (post_id, _), views in events.items() if post_id in existing)
+
+
+def flush_views(refresh=True):
+    events = _take_buffer()
+    if not events:
+        return 0
+    try:
+        written = _write_views(events)
+    except Exception:
+        # Se reintentan en el siguiente volcado.
+        _restore_buffer(events)
+        raise
+    if refresh:
+        refresh_popular_posts()
+    return written
+
+
+def _flush_safely():
+    try:
+        flush_views()
+    except Exception:
+        logger.exception("No se pudieron guardar las lecturas de los posts")
+
+
+def _flush_at_exit():
+    # Al terminar el proceso (p. ej. un worker que se recicla) se vuelca lo
+    # pendiente; sólo se pierde si el proceso muere sin salir (SIGKILL).
+    if _timer is not None:
+        _timer.cancel()
+    try:
+        flush_views(refresh=False)
+    except Exception:
+        logger.exception("No se pudieron guardar las lecturas de los posts al salir")
+
+
+atexit.register(_flush_at_exit)
+
+
+def clear_buffer():
+    global _timer
+    _take_buffer()
+    with _lock:
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+
+
+def refresh_popular_posts(now=None):
+    from .models import PopularPost, PostViewBucket
+
+    now = now or timezone.now()
+    size = getattr(settings, 'BLOG_POPULAR_POSTS_SIZE', 20)
+    for window, length in WINDOWS.items():
+        ranking = (
+            PostViewBucket.objects
+            .filter(hour__gte=truncate_to_hour(now - length), post__status='published', post__published_date__lte=now)
+            .values('post')
+            .annotate(total=Sum('views'))
+            .order_by('-total', 'post')[:size]
+        )
+        entries = [
+            PopularPost(window=window, rank=rank, post_id=row['post'], views=row['total'], computed_at=now)
+            for rank, row in enumerate(ranking, start=1)
+        ]
+        with transaction.atomic():
+            PopularPost.objects.filter(window=window).delete()
+            PopularPost.objects.bulk_create(entries)
+
+    # Las horas fuera de la ventana más larga ya no se consultan.
+    oldest = truncate_to_hour(now - max(WINDOWS.values()))
+    PostViewBucket.objects.filter(hour__lt=oldest).delete()
+
+
+def popular_posts(window='day', limit=10):
+    from .models import PopularPost
+
+    entries = (
+        PopularPost.objects
+        .filter(window=window, post__status='published', post__published_date__lte=timezone.now())
+        .select_related('post__author')
+        .order_by('rank')[:limit]
+    )
+    posts = []
+    for entry in entries:
+        entry.post.window_views = entry.views
+        posts.append(entry.post)
+    return posts
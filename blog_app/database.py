@@ -0,0 +1,87 @@
+import itertools
+import logging
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, models, transaction
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Archivos subidos que guarda el intento en curso de retry_on_locked.
+_stored_files = ContextVar('blog_stored_files', default=None)
+
+
+def lock_retries():
+    return getattr(settings, 'BLOG_DB_LOCK_RETRIES', 3)
+
+
+def lock_retry_delay():
+    return getattr(settings, 'BLOG_DB_LOCK_RETRY_DELAY', 0.05)
+
+
+def is_locked_error(exc):
+    # "database is locked" (otra conexión tiene el lock de escritura y venció
+    # busy_timeout) o "database table is locked" (caché compartida).
+    message = str(exc)
+    return isinstance(exc, OperationalError) and (
+        'database is locked' in message or 'database table is locked' in message
+    )
+
+
+@receiver(pre_save)
+def track_stored_files(sender, instance, raw=False, **kwargs):
+    # Los FileField sin guardar se escriben en el almacenamiento al guardar el
+    # modelo, fuera de la transacción: se anotan para borrarlos si se revierte.
+    stored = _stored_files.get()
+    if stored is None or raw:
+        return
+    for field in instance._meta.concrete_fields:
+        if isinstance(field, models.FileField) and field.attname in instance.__dict__:
+            file = getattr(instance, field.attname)
+            if file and not file._committed:
+                stored.append(file)
+
+
+def _delete_stored_files(stored):
+    for file in stored:
+        if file._committed and file.name:
+            try:
+                file.storage.delete(file.name)
+            except OSError:
+                logger.exception("No se pudo borrar %s de un intento revertido", file.name)
+
+
+# Repite la función en su propia transacción mientras SQLite responda que la
+# base está bloqueada, con espera exponencial. Dentro de una transacción ya
+# abierta no se puede repetir sólo una parte, así que se ejecuta una vez. Los
+# archivos subidos en un intento que se revierte se borran: el reintento los
+# vuelve a guardar.
+def retry_on_locked(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if transaction.get_connection().in_atomic_block:
+            return func(*args, **kwargs)
+        retries = lock_retries()
+        for attempt in itertools.count():
+            stored = []
+            token = _stored_files.set(stored)
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except Exception as exc:
+                _delete_stored_files(stored)
+                if attempt >= retries or not is_locked_error(exc):
+                    raise
+                logger.warning("Base de datos bloqueada en %s; reintento %s de %s", func.__qualname__, attempt + 1, retries)
+            finally:
+                _stored_files.reset(token)
+            time.sleep(lock_retry_delay() * 2 ** attempt * random.uniform(0.5, 1.5))
+    return wrapper
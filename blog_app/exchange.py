@@ -0,0 +1,220 @@
+import json
+import os
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .slugs import allocate_slugs, slug_base
+
+
+# Formatos de intercambio de posts: JSONL (un post por línea) y Markdown con
+# front matter (un archivo .md por post; el cuerpo es el contenido HTML, que es
+# Markdown válido). Ambos se leen y escriben de a un post, en memoria constante.
+
+FIELDS = (
+    'title', 'slug', 'author', 'status', 'published_date', 'meta_description',
+    'keywords', 'featured_image', 'summary', 'content',
+)
+FRONT_MATTER = '---'
+SLUG_RETRIES = 3
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def post_record(post):
+    return {
+        'title': post.title,
+        'slug': post.slug,
+        'author': post.author.username,
+        'status': post.status,
+        'published_date': post.published_date.isoformat(),
+        'meta_description': post.meta_description or '',
+        'keywords': post.keywords or '',
+        'featured_image': post.featured_image.name or '',
+        'summary': post.summary or '',
+        'content': post.content,
+    }
+
+
+def iter_records(queryset, chunk_size=500):
+    for post in queryset.select_related('author').order_by('pk').iterator(chunk_size=chunk_size):
+        yield post_record(post)
+
+
+def write_jsonl(record, stream):
+    stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def read_jsonl(stream):
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, InvalidRecord(f"JSON inválido: {e}")
+
+
+def render_markdown(record):
+    # Cada valor del front matter va como JSON, que también es YAML válido.
+    lines = [FRONT_MATTER]
+    lines.extend(f'{key}: {json.dumps(record[key], ensure_ascii=False)}' for key in FIELDS if key != 'content')
+    lines.append(FRONT_MATTER)
+    return '\n'.join(lines) + '\n\n' + record['content'] + '\n'
+
+
+def parse_markdown(text):
+    lines = text.splitlines()
+    if not lines or lines[0].strip() != FRONT_MATTER:
+        raise InvalidRecord("Falta el front matter (---) al inicio del archivo.")
+    record = {}
+    for i, line in enumerate(lines[1:], start=1):
+        if line.strip() == FRONT_MATTER:
+            record['content'] = '\n'.join(lines[i + 1:]).strip('\n')
+            return record
+        key, sep, value = line.partition(':')
+        if not sep:
+            continue
+        value = value.strip()
+        try:
+            record[key.strip()] = json.loads(value)
+        except json.JSONDecodeError:
+            record[key.strip()] = value.strip('"\'')
+    raise InvalidRecord("El front matter no está cerrado con ---.")
+
+
+def markdown_filename(record):
+    return f"{record['published_date'][:10]}-{record['slug']}.md"
+
+
+def read_markdown(path):
+    if os.path.isdir(path):
+        names = sorted(name for name in os.listdir(path) if name.endswith('.md'))
+        paths = (os.path.join(path, name) for name in names)
+    else:
+        paths = [path]
+    for file_path in paths:
+        with open(file_path, encoding='utf-8') as f:
+            try:
+                yield file_path, parse_markdown(f.read())
+            except InvalidRecord as e:
+                yield file_path, e
+
+
+class AuthorMap:
+    # Usuarios por username, cargados de a lote con una consulta y reutilizados.
+
+    def __init__(self, default=None):
+        self.users = {}
+        self.default = default
+
+    def load(self, usernames):
+        missing = set(usernames) - set(self.users)
+        if missing:
+            found = {user.username: user for user in User.objects.filter(username__in=missing)}
+            for username in missing:
+                self.users[username] = found.get(username)
+
+    def get(self, username):
+        return self.users.get(username) or self.default
+
+
+def build_post(record, authors):
+    from .models import Post
+
+    if not isinstance(record, dict):
+        raise InvalidRecord("El registro no es un objeto.")
+    for key in FIELDS:
+        if record.get(key) is not None and not isinstance(record[key], str):
+            raise InvalidRecord(f"El campo '{key}' no es texto.")
+    title = (record.get('title') or '').strip()
+    if not title or not record.get('content'):
+        raise InvalidRecord("Faltan el título o el contenido.")
+    author = authors.get(record.get('author'))
+    if author is None:
+        raise InvalidRecord(f"No existe el autor '{record.get('author')}'.")
+
+    published_date = timezone.now()
+    if record.get('published_date'):
+        try:
+            # None si el formato no es válido; ValueError si la fecha no existe.
+            published_date = parse_datetime(record['published_date'])
+        except ValueError:
+            published_date = None
+        if published_date is None:
+            raise InvalidRecord(f"Fecha inválida: {record['published_date']}")
+        if timezone.is_naive(published_date):
+            published_date = timezone.make_aware(published_date)
+
+    status = record.get('status')
+    post = Post(
+        title=title[:200],
+        author=author,
+        summary=record.get('summary') or '',
+        content=record['content'],
+        status=status if status in dict(Post.STATUS_CHOICES) else 'draft',
+        published_date=published_date,
+        meta_description=(record.get('meta_description') or '')[:160] or None,
+        keywords=(record.get('keywords') or '')[:255] or None,
+        featured_image=record.get('featured_image') or None,
+    )
+    post.refresh_derived_fields()
+    # El slug del archivo se respeta si está libre; si no, se le añade un sufijo.
+    post._slug_base = slug_base(record.get('slug') or title)
+    return post
+
+
+def _create_batch(posts):
+    from .models import Post
+    from .search import get_search_backend
+    from .tags import tag_new_posts
+
+    for attempt in range(SLUG_RETRIES):
+        for post, slug in zip(posts, allocate_slugs([post._slug_base for post in posts])):
+            post.slug = slug
+        try:
+            with transaction.atomic():
+                Post.objects.bulk_create(posts)
+                tag_new_posts(posts)
+                backend = get_search_backend()
+                for post in posts:
+                    backend.index_post(post)
+            return
+        except IntegrityError:
+            # Otro proceso tomó alguno de los slugs entre la asignación y el INSERT.
+            if attempt == SLUG_RETRIES - 1:
+                raise
+            for post in posts:
+                post.pk = None
+
+
+def import_records(records, batch_size=500, default_author=None, on_error=None):
+    authors = AuthorMap(default_author)
+    imported = 0
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            break
+        authors.load(
+            record['author'] for _, record in chunk
+            if isinstance(record, dict) and record.get('author') and isinstance(record['author'], str)
+        )
+        posts = []
+        for origin, record in chunk:
+            try:
+                if isinstance(record, InvalidRecord):
+                    raise record
+                posts.append(build_post(record, authors))
+            except InvalidRecord as e:
+                if on_error:
+                    on_error(origin, e)
+        if posts:
+            _create_batch(posts)
+            imported += len(posts)
+    return imported
@@ -0,0 +1,298 @@
+import gzip
+import hashlib
+import io
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils import feedgenerator, timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from .cache import make_etag, to_timestamp
+from .staticfiles import accepted_encodings
+
+
+# Feeds RSS/Atom (generales y por autor) y sitemap paginado. Se guardan ya
+# generados y comprimidos en FeedArtifact; guardar o borrar un post invalida
+# sólo los artefactos que cambian, que se regeneran en la siguiente petición.
+# Los que dependen de un post programado vencen cuando éste se publica.
+FEED_TITLE = "Mi Blog"
+FEED_FORMATS = {
+    'rss': feedgenerator.Rss201rev2Feed,
+    'atom': feedgenerator.Atom1Feed,
+}
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+SITEMAP_PAGE_PREFIX = 'sitemap:'
+
+
+def site_url():
+    return getattr(settings, 'BLOG_SITE_URL', 'http://localhost:8000').rstrip('/')
+
+
+def feed_items():
+    return getattr(settings, 'BLOG_FEED_ITEMS', 20)
+
+
+def sitemap_page_size():
+    return getattr(settings, 'BLOG_SITEMAP_PAGE_SIZE', 1000)
+
+
+def absolute_url(path):
+    return f'{site_url()}{path}'
+
+
+def feed_key(feed_format, author_id=None):
+    if author_id is None:
+        return f'feed:{feed_format}'
+    return f'feed:author:{author_id}:{feed_format}'
+
+
+def sitemap_key(page=None):
+    return 'sitemap' if page is None else f'{SITEMAP_PAGE_PREFIX}{page}'
+
+
+def _next_scheduled(queryset):
+    return queryset.filter(
+        status='published', published_date__gt=timezone.now(),
+    ).order_by('published_date').values_list('published_date', flat=True).first()
+
+
+def _last_modified(dates):
+    return max(dates, default=None)
+
+
+def build_feed(feed_format, author=None):
+    from .models import Post
+
+    posts = Post.objects.all()
+    if author is not None:
+        posts = posts.filter(author=author)
+        link = reverse('accounts:profile_view_user', kwargs={'username': author.username})
+        feed_url = reverse(f'blog:author_feed_{feed_format}', kwargs={'username': author.username})
+        title = f"{FEED_TITLE} - {author.get_full_name() or author.username}"
+        description = f"Últimos posts de {author.username}"
+    else:
+        link = reverse('blog:home')
+        feed_url = reverse(f'blog:feed_{feed_format}')
+        title = FEED_TITLE
+        description = "Últimos posts publicados"
+
+    items = list(posts.published().select_related('author').order_by('-published_date', '-pk')[:feed_items()])
+    feed = FEED_FORMATS[feed_format](
+        title=title, link=absolute_url(link), description=description,
+        language=settings.LANGUAGE_CODE, feed_url=absolute_url(feed_url),
+    )
+    for post in items:
+        url = absolute_url(post.get_absolute_url())
+        feed.add_item(
+            title=post.title, link=url, unique_id=url, description=post.excerpt,
+            author_name=post.author.get_full_name() or post.author.username,
+            pubdate=post.published_date, updateddate=post.updated_at,
+            categories=[name for _, name in post.keyword_tags],
+        )
+    content = feed.writeString('utf-8').encode('utf-8')
+    last_modified = _last_modified(max(post.published_date, post.updated_at) for post in items)
+    return content, feed.content_type, last_modified, _next_scheduled(posts)
+
+
+def _write_sitemap(root, entries):
+    stream = io.StringIO()
+    handler = SimplerXMLGenerator(stream, 'utf-8')
+    handler.startDocument()
+    handler.startElement(root, {'xmlns': SITEMAP_NS})
+    tag = 'url' if root == 'urlset' else 'sitemap'
+    for loc, lastmod in entries:
+        handler.startElement(tag, {})
+        handler.addQuickElement('loc', loc)
+        if lastmod is not None:
+            handler.addQuickElement('lastmod', lastmod.isoformat(timespec='seconds'))
+        handler.endElement(tag)
+    handler.endElement(root)
+    return stream.getvalue().encode('utf-8')
+
+
+# El sitemap ordena los posts del más antiguo al más nuevo: un post programado
+# que se publica siempre queda al final, así que sólo cambian la última página
+# y el índice.
+def _sitemap_posts():
+    from .models import Post
+    return Post.objects.published().order_by('published_date', 'pk')
+
+
+def build_sitemap_index():
+    from .models import Post
+
+    size = sitemap_page_size()
+    rows = list(_sitemap_posts().values_list('published_date', 'updated_at'))
+    chunks = [rows[i:i + size] for i in range(0, len(rows), size)] or [[]]
+    entries = [
+        (absolute_url(reverse('blog:sitemap_page', kwargs={'page': number})),
+         _last_modified(max(row) for row in chunk))
+        for number, chunk in enumerate(chunks, start=1)
+    ]
+    last_modified = _last_modified(lastmod for _, lastmod in entries if lastmod is not None)
+    return _write_sitemap('sitemapindex', entries), 'application/xml', last_modified, _next_scheduled(Post.objects.all())
+
+
+def build_sitemap_page(page):
+    from .models import Post
+
+    size = sitemap_page_size()
+    posts = list(
+        _sitemap_posts().only('slug', 'published_date', 'updated_at')[(page - 1) * size:page * size]
+    )
+    if not posts and page > 1:
+        return None
+    entries = [
+        (absolute_url(post.get_absolute_url()), max(post.published_date, post.updated_at))
+        for post in posts
+    ]
+    # Una página completa no cambia cuando se publica un post programado.
+    expires_at = _next_scheduled(Post.objects.all()) if len(posts) < size else None
+    last_modified = _last_modified(lastmod for _, lastmod in entries)
+    return _write_sitemap('urlset', entries), 'application/xml', last_modified, expires_at
+
+
+def _artifact_fields(built):
+    content, content_type, last_modified, expires_at = built
+    return {
+        'content': gzip.compress(content, compresslevel=9, mtime=0),
+        'content_type': content_type,
+        'etag': make_etag(hashlib.sha256(content).hexdigest()),
+        'last_modified': last_modified,
+        'expires_at': expires_at,
+        'generated_at': timezone.now(),
+    }
+
+
+def get_artifact(key, build, attempts=3):
+    from .models import FeedArtifact
+
+    for _ in range(attempts):
+        artifact = FeedArtifact.objects.filter(key=key).first()
+        if artifact is None:
+            # Se reserva la fila antes de leer los posts, para que una
+            # invalidación concurrente cambie su versión.
+            FeedArtifact.objects.bulk_create([FeedArtifact(key=key)], ignore_conflicts=True)
+            artifact = FeedArtifact(key=key)
+        elif artifact.is_current():
+            return artifact
+        built = build()
+        if built is None:
+            # La página ya no existe (ej. sitemap más allá del final): no se
+            # deja la fila reservada ni la de una versión anterior.
+            FeedArtifact.objects.filter(key=key).delete()
+            return None
+        fields = _artifact_fields(built)
+        # Si un post cambió mientras se generaba, la versión ya no coincide:
+        # no se guarda y se vuelve a generar con los datos nuevos.
+        if FeedArtifact.objects.filter(key=key, version=artifact.version).update(version=F('version') + 1, **fields):
+            return FeedArtifact(key=key, version=artifact.version + 1, **fields)
+    # Invalidado en cada intento: se responde sin guardarlo.
+    return FeedArtifact(key=key, **fields)
+
+
+def get_feed(feed_format, author=None):
+    return get_artifact(
+        feed_key(feed_format, author.pk if author is not None else None),
+        lambda: build_feed(feed_format, author),
+    )
+
+
+def get_sitemap(page=None):
+    if page is None:
+        return get_artifact(sitemap_key(), build_sitemap_index)
+    return get_artifact(sitemap_key(page), lambda: build_sitemap_page(page))
+
+
+def artifact_response(request, artifact):
+    timestamp = to_timestamp(artifact.last_modified) if artifact.last_modified else None
+    response = get_conditional_response(request, etag=artifact.etag, last_modified=timestamp)
+    if response is None:
+        content = bytes(artifact.content)
+        if 'gzip' in accepted_encodings(request.headers.get('Accept-Encoding', '')):
+            response = HttpResponse(content, content_type=artifact.content_type)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(content), content_type=artifact.content_type)
+        response['Content-Length'] = len(response.content)
+    response['ETag'] = artifact.etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'BLOG_HTTP_MAX_AGE', 60))
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def invalidate(artifacts):
+    # Se vacían en lugar de borrarse: la nueva versión impide que una
+    # generación en curso, con los datos anteriores, las reemplace.
+    return artifacts.update(content=b'', etag='', version=F('version') + 1)
+
+
+def _is_visible(status, published_date, now):
+    return status == 'published' and published_date <= now
+
+
+def _sitemap_page_of(published_date, pk, now):
+    from .models import Post
+    before = Post.objects.filter(status='published', published_date__lte=now).filter(
+        Q(published_date__lt=published_date) | Q(published_date=published_date, pk__lt=pk)
+    ).count()
+    return before // sitemap_page_size() + 1
+
+
+def purge_post_feeds(post, previous=None):
+    from .models import FeedArtifact, Post
+
+    current = (post.status, post.published_date)
+    states = [current]
+    authors = {post.author_id}
+    if previous is not None:
+        states.append((previous['status'], previous['published_date']))
+        authors.add(previous['author'])
+    # Los borradores no aparecen en ningún artefacto.
+    if all(status != 'published' for status, _ in states):
+        return
+
+    now = timezone.now()
+    keys = [feed_key(feed_format) for feed_format in FEED_FORMATS]
+    keys += [feed_key(feed_format, author_id) for author_id in authors for feed_format in FEED_FORMATS]
+
+    pages = [_sitemap_page_of(published_date, post.pk, now) for status, published_date in states
+             if _is_visible(status, published_date, now)]
+    stale = Q(key__in=keys)
+    if pages:
+        first_page = min(pages)
+        stale |= Q(key=sitemap_key())
+        if len(states) == 2 and states[0] == states[1]:
+            # Sólo cambió el contenido: el post sigue en la misma página.
+            stale |= Q(key=sitemap_key(first_page))
+        else:
+            # Altas, bajas o cambios de fecha desplazan las páginas siguientes.
+            stale |= Q(key__startswith=SITEMAP_PAGE_PREFIX) & ~Q(
+                key__in=[sitemap_key(page) for page in range(1, first_page)]
+            )
+    invalidate(FeedArtifact.objects.filter(stale))
+
+    # Un post programado entrará al final del sitemap al publicarse: vencen el
+    # índice y la última página, si no está completa.
+    scheduled = [published_date for status, published_date in states
+                 if status == 'published' and published_date > now]
+    if scheduled:
+        total = Post.objects.filter(status='published', published_date__lte=now).count()
+        FeedArtifact.objects.filter(
+            key__in=[sitemap_key(), sitemap_key(total // sitemap_page_size() + 1)],
+        ).filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=min(scheduled))
+        ).update(expires_at=min(scheduled), version=F('version') + 1)
+
+
+def purge_author_feeds(user_id):
+    # Los feeds generales muestran el autor de cada post y los del autor,
+    # además, enlazan a su perfil.
+    from .models import FeedArtifact
+    invalidate(FeedArtifact.objects.filter(key__startswith='feed:'))
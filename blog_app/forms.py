@@ -1,5 +1,6 @@
 from django import forms
 from .models import Post
+from .slugs import slug_taken
 from ckeditor_uploader.widgets import CKEditorUploadingWidget 
 
 class PostForm(forms.ModelForm):
@@ -69,11 +70,7 @@ class PostForm(forms.ModelForm):
 
     def clean_slug(self):
         slug = self.cleaned_data.get('slug')
-        if slug: 
-            queryset = Post.objects.filter(slug=slug)
-            if self.instance and self.instance.pk:
-                queryset = queryset.exclude(pk=self.instance.pk)
-            if queryset.exists():
-                raise forms.ValidationError("Este slug ya está en uso. Por favor, elige otro o déjalo en blanco para que se genere automáticamente.")
+        if slug and slug_taken(slug, self.instance.pk):
+            raise forms.ValidationError("Este slug ya está en uso. Por favor, elige otro o déjalo en blanco para que se genere automáticamente.")
         return slug
 
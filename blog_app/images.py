@@ -0,0 +1,106 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = 'derivatives'
+POST_IMAGE_WIDTHS = (320, 640, 1024, 1600)
+AVATAR_WIDTHS = (48, 150, 300)
+
+# Extensión de la imagen original -> (formato de Pillow, extensión del derivado).
+_FORMATS = {
+    '.jpg': ('JPEG', '.jpg'),
+    '.jpeg': ('JPEG', '.jpeg'),
+    '.png': ('PNG', '.png'),
+    '.webp': ('WEBP', '.webp'),
+}
+_DEFAULT_FORMAT = ('JPEG', '.jpg')
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'BLOG_IMAGE_WORKERS', 2),
+            thread_name_prefix='image-derivatives',
+        )
+    return _executor
+
+
+def derivative_name(name, width, webp=False):
+    base, ext = os.path.splitext(name)
+    if webp:
+        ext = '.webp'
+    else:
+        ext = _FORMATS.get(ext.lower(), _DEFAULT_FORMAT)[1]
+    return f'{DERIVATIVES_DIR}/{base}.{width}w{ext}'
+
+
+def derivative_widths(image_width, widths):
+    # Anchos que realmente se generan: la imagen no se amplía, los anchos
+    # mayores que el original se reemplazan por el ancho del original.
+    return sorted({min(width, image_width) for width in widths})
+
+
+def _encode(image, pillow_format):
+    buffer = BytesIO()
+    if pillow_format == 'JPEG':
+        image = image.convert('RGB')
+        image.save(buffer, 'JPEG', quality=82, optimize=True, progressive=True)
+    elif pillow_format == 'PNG':
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        image.save(buffer, 'WEBP', quality=80, method=4)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_derivatives(name, widths, storage=default_storage):
+    # Devuelve los anchos generados, que se guardan junto a la imagen para
+    # armar el srcset sin consultar el almacenamiento.
+    with storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    pillow_format = _FORMATS.get(os.path.splitext(name)[1].lower(), _DEFAULT_FORMAT)[0]
+
+    generated = derivative_widths(image.width, widths)
+    for width in generated:
+        resized = image.copy()
+        resized.thumbnail((width, image.height), Image.LANCZOS)
+        for webp, fmt in ((False, pillow_format), (True, 'WEBP')):
+            target = derivative_name(name, width, webp=webp)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, _encode(resized, fmt))
+    return generated
+
+
+def _generate_safely(name, widths, record):
+    try:
+        record(name, generate_derivatives(name, widths))
+    except Exception:
+        logger.exception("No se pudieron generar los derivados de %s", name)
+
+
+def schedule_derivatives(name, widths, record):
+    # record(name, anchos) guarda los anchos generados en las filas que usan
+    # la imagen.
+    if not name:
+        return
+    if getattr(settings, 'BLOG_IMAGE_ASYNC', True):
+        transaction.on_commit(lambda: get_executor().submit(_generate_safely, name, widths, record))
+    else:
+        _generate_safely(name, widths, record)
@@ -0,0 +1,208 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('blog_request_metrics', default=None)
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def instrumentation_enabled():
+    return getattr(settings, 'BLOG_INSTRUMENTATION', False)
+
+
+# Presupuesto de consultas SQL de una vista; lo leen el middleware y los tests.
+def query_budget(budget):
+    def decorator(view):
+        view.query_budget = budget
+        return view
+    return decorator
+
+
+def get_query_budget(view):
+    view = getattr(view, 'view_class', view)
+    return getattr(view, 'query_budget', None)
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_sql_time = 0.0
+        self.rendering = False
+
+    def add_query(self, elapsed):
+        self.queries += 1
+        self.sql_time += elapsed
+        if self.rendering:
+            self.template_sql_time += elapsed
+
+    def timings(self):
+        total = time.perf_counter() - self.start
+        # Las consultas lanzadas desde la plantilla (querysets perezosos) cuentan como SQL.
+        template = max(0.0, self.template_time - self.template_sql_time)
+        return {
+            'total_ms': total * 1000,
+            'sql_ms': self.sql_time * 1000,
+            'template_ms': template * 1000,
+            'python_ms': max(0.0, total - self.sql_time - template) * 1000,
+        }
+
+
+# Envoltorio permanente de cada conexión: funciona también con DEBUG = False y,
+# al leer la métrica de un ContextVar, con las consultas que el ORM async
+# ejecuta en otro hilo (sync_to_async copia el contexto).
+def _execute_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(time.perf_counter() - start)
+
+
+def _install_execute_wrapper(connection, **kwargs):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+def _install_template_timer():
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, 'timed', False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        # Sólo se mide el render exterior; los {% include %} quedan dentro.
+        if metrics is None or metrics.rendering:
+            return original(self, context, request)
+        metrics.rendering = True
+        start = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+            metrics.rendering = False
+
+    render.timed = True
+    Template.render = render
+
+
+def server_timing_header(metrics, timings):
+    return ', '.join([
+        f'db;dur={timings["sql_ms"]:.1f};desc="{metrics.queries} queries"',
+        f'tpl;dur={timings["template_ms"]:.1f}',
+        f'app;dur={timings["python_ms"]:.1f}',
+        f'total;dur={timings["total_ms"]:.1f}',
+    ])
+
+
+def record(view_name, metrics, timings, budget):
+    over_budget = budget is not None and metrics.queries > budget
+    with _stats_lock:
+        entry = _stats.setdefault(view_name, {
+            'requests': 0, 'queries': 0, 'max_queries': 0, 'over_budget': 0,
+            'sql_ms': 0.0, 'template_ms': 0.0, 'python_ms': 0.0, 'total_ms': 0.0, 'max_total_ms': 0.0,
+        })
+        entry['requests'] += 1
+        entry['queries'] += metrics.queries
+        entry['max_queries'] = max(entry['max_queries'], metrics.queries)
+        entry['over_budget'] += over_budget
+        entry['budget'] = budget
+        for key in ('sql_ms', 'template_ms', 'python_ms', 'total_ms'):
+            entry[key] += timings[key]
+        entry['max_total_ms'] = max(entry['max_total_ms'], timings['total_ms'])
+    return over_budget
+
+
+def get_stats():
+    with _stats_lock:
+        snapshot = {name: dict(entry) for name, entry in _stats.items()}
+    stats = []
+    for name, entry in snapshot.items():
+        requests = entry['requests']
+        stats.append({
+            'view': name,
+            'requests': requests,
+            'budget': entry['budget'],
+            'over_budget': entry['over_budget'],
+            'avg_queries': round(entry['queries'] / requests, 2),
+            'max_queries': entry['max_queries'],
+            'avg_sql_ms': round(entry['sql_ms'] / requests, 2),
+            'avg_template_ms': round(entry['template_ms'] / requests, 2),
+            'avg_python_ms': round(entry['python_ms'] / requests, 2),
+            'avg_total_ms': round(entry['total_ms'] / requests, 2),
+            'max_total_ms': round(entry['max_total_ms'], 2),
+        })
+    return sorted(stats, key=lambda item: item['avg_total_ms'] * item['requests'], reverse=True)
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not instrumentation_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(_install_execute_wrapper, dispatch_uid='blog_instrumentation')
+        _install_template_timer()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        for connection in connections.all():
+            _install_execute_wrapper(connection)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, metrics, response)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, metrics, response)
+
+    def finish(self, request, metrics, response):
+        timings = metrics.timings()
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        budget = get_query_budget(match.func) if match else None
+        if record(view_name, metrics, timings, budget):
+            logger.warning(
+                "%s ejecutó %s consultas SQL (presupuesto: %s) en %s",
+                view_name, metrics.queries, budget, request.path,
+            )
+        response['Server-Timing'] = server_timing_header(metrics, timings)
+        return response
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from blog_app.models import Post
+
+
+class Command(BaseCommand):
+    help = "Calcula los campos derivados (HTML saneado, texto plano, extracto, tiempo de lectura) de los posts existentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help="Cantidad de posts procesados por lote.")
+        parser.add_argument('--only-missing', action='store_true', help="Procesar sólo los posts sin campos derivados.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Post.objects.only('pk', 'summary', 'content').order_by('pk')
+        if options['only_missing']:
+            queryset = queryset.filter(content_html='')
+
+        processed = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            for post in batch:
+                post.refresh_derived_fields()
+            Post.objects.bulk_update(batch, Post.DERIVED_FIELDS)
+            processed += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"  {processed} posts procesados...")
+
+        self.stdout.write(self.style.SUCCESS(f"Campos derivados actualizados en {processed} posts."))
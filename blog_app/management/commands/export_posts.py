@@ -0,0 +1,45 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog_app.exchange import iter_records, markdown_filename, render_markdown, write_jsonl
+from blog_app.models import Post
+
+
+class Command(BaseCommand):
+    help = "Exporta los posts a JSONL (un post por línea) o a archivos Markdown con front matter, sin cargarlos todos en memoria."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Archivo .jsonl ('-' para la salida estándar) o directorio para --format markdown.")
+        parser.add_argument('--format', choices=('jsonl', 'markdown'), default='jsonl')
+        parser.add_argument('--status', choices=[value for value, _ in Post.STATUS_CHOICES], help="Exportar sólo los posts con este estado.")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Filas leídas de la base de datos por lote.")
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.all()
+        if options['status']:
+            queryset = queryset.filter(status=options['status'])
+        records = iter_records(queryset, options['chunk_size'])
+        output = options['output']
+
+        exported = 0
+        if options['format'] == 'markdown':
+            if output == '-':
+                raise CommandError("El formato markdown necesita un directorio de salida.")
+            os.makedirs(output, exist_ok=True)
+            for record in records:
+                with open(os.path.join(output, markdown_filename(record)), 'w', encoding='utf-8') as f:
+                    f.write(render_markdown(record))
+                exported += 1
+        else:
+            stream = sys.stdout if output == '-' else open(output, 'w', encoding='utf-8')
+            try:
+                for record in records:
+                    write_jsonl(record, stream)
+                    exported += 1
+            finally:
+                if stream is not sys.stdout:
+                    stream.close()
+
+        self.stderr.write(self.style.SUCCESS(f"{exported} posts exportados."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from blog_app.static_site import MANIFEST, export_site
+
+
+class Command(BaseCommand):
+    help = "Genera el HTML estático de la página de inicio, del listado y de los posts publicados, en paralelo y sólo para las páginas que cambiaron."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Directorio de salida.")
+        parser.add_argument('--workers', type=int, default=None, help="Procesos para renderizar (por defecto, uno por CPU).")
+        parser.add_argument('--full', action='store_true', help="Regenerar todas las páginas, aunque no hayan cambiado.")
+
+    def handle(self, *args, **options):
+        stats = export_site(options['output'], workers=options['workers'], full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['rendered']} páginas generadas, {stats['unchanged']} sin cambios y "
+            f"{stats['removed']} eliminadas. Manifiesto: {options['output']}/{MANIFEST}"
+        ))
@@ -0,0 +1,47 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from accounts.models import Profile, record_avatar_widths
+from blog_app.images import POST_IMAGE_WIDTHS, AVATAR_WIDTHS, generate_derivatives, get_executor
+from blog_app.models import Post, record_featured_image_widths
+
+
+class Command(BaseCommand):
+    help = "Genera las variantes por ancho y WebP de las imágenes destacadas y avatares existentes en media/."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--overwrite', action='store_true', help="Regenerar aunque los derivados ya existan.")
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(featured_image='').exclude(featured_image__isnull=True)
+        profiles = Profile.objects.exclude(avatar='').exclude(avatar__isnull=True)
+        if not options['overwrite']:
+            # Sólo las imágenes sin anchos guardados.
+            posts = posts.filter(featured_image_widths=[])
+            profiles = profiles.filter(avatar_widths=[])
+
+        jobs = {}
+        for name in posts.values_list('featured_image', flat=True).distinct():
+            jobs[name] = (POST_IMAGE_WIDTHS, record_featured_image_widths)
+        for name in profiles.values_list('avatar', flat=True).distinct():
+            jobs[name] = (AVATAR_WIDTHS, record_avatar_widths)
+
+        futures = {}
+        for name, (widths, record) in jobs.items():
+            if not default_storage.exists(name):
+                self.stderr.write(f"  Archivo inexistente, se omite: {name}")
+                continue
+            futures[name] = (get_executor().submit(generate_derivatives, name, widths), record)
+
+        generated = 0
+        for name, (future, record) in futures.items():
+            try:
+                widths = future.result()
+            except Exception as exc:
+                self.stderr.write(f"  Error procesando {name}: {exc}")
+                continue
+            record(name, widths)
+            generated += 1
+            self.stdout.write(f"  {name}: anchos {', '.join(map(str, widths))}")
+
+        self.stdout.write(self.style.SUCCESS(f"Derivados generados para {generated} de {len(futures)} imágenes."))
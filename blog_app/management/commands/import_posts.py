@@ -0,0 +1,62 @@
+import os
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from blog_app import cache as page_cache
+from blog_app import feeds
+from blog_app.models import FeedArtifact
+from blog_app.exchange import import_records, read_jsonl, read_markdown
+
+
+class Command(BaseCommand):
+    help = "Importa posts desde JSONL o Markdown con front matter (ver export_posts), por lotes y en memoria constante."
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Archivo .jsonl ('-' para la entrada estándar), archivo .md o directorio con archivos .md.")
+        parser.add_argument('--format', choices=('jsonl', 'markdown'), help="Por defecto se deduce de la extensión.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Posts creados por cada bulk_create.")
+        parser.add_argument('--default-author', help="Username a usar cuando el autor del registro no existe.")
+
+    def handle(self, *args, **options):
+        source = options['source']
+        if source != '-' and not os.path.exists(source):
+            raise CommandError(f"No existe {source}.")
+        default_author = None
+        if options['default_author']:
+            try:
+                default_author = User.objects.get(username=options['default_author'])
+            except User.DoesNotExist:
+                raise CommandError(f"No existe el usuario '{options['default_author']}'.")
+
+        file_format = options['format']
+        if file_format is None:
+            file_format = 'markdown' if os.path.isdir(source) or source.endswith('.md') else 'jsonl'
+
+        errors = []
+
+        def on_error(origin, error):
+            errors.append(origin)
+            self.stderr.write(f"  {origin}: {error}")
+
+        try:
+            if file_format == 'markdown':
+                imported = import_records(read_markdown(source), options['batch_size'], default_author, on_error)
+            else:
+                stream = sys.stdin if source == '-' else open(source, encoding='utf-8')
+                try:
+                    imported = import_records(read_jsonl(stream), options['batch_size'], default_author, on_error)
+                finally:
+                    if stream is not sys.stdin:
+                        stream.close()
+        finally:
+            # También si la importación se corta: los lotes anteriores ya se
+            # guardaron. Los listados, búsquedas y detalles en caché ya no
+            # reflejan el contenido.
+            page_cache.get_page_cache().clear()
+            # bulk_create no envía señales: los feeds y el sitemap se regeneran enteros.
+            feeds.invalidate(FeedArtifact.objects.all())
+        self.stdout.write(self.style.SUCCESS(f"{imported} posts importados, {len(errors)} registros omitidos."))
+        if imported:
+            self.stdout.write("Los posts relacionados de los posts nuevos se calculan con update_related_posts.")
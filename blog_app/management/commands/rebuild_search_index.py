@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog_app.models import Post
+from blog_app.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de posts desde cero."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help="Cantidad de posts leídos por lote.")
+
+    def handle(self, *args, **options):
+        posts = Post.objects.select_related('author').order_by('pk').iterator(chunk_size=options['chunk_size'])
+        with transaction.atomic():
+            count = get_search_backend().rebuild(posts)
+        self.stdout.write(self.style.SUCCESS(f"Índice de búsqueda reconstruido: {count} posts."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog_app.tags import rebuild_tags
+
+
+class Command(BaseCommand):
+    help = "Reconstruye las etiquetas y sus contadores a partir de las palabras clave de todos los posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Tamaño de lote para lecturas e inserciones.")
+
+    def handle(self, *args, **options):
+        links = rebuild_tags(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Etiquetas reconstruidas ({links} asignaciones)."))
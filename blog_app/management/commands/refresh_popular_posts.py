@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog_app import counters
+
+
+class Command(BaseCommand):
+    help = "Recalcula el ranking de posts más leídos (día y semana) y descarta las lecturas fuera de la ventana más larga."
+
+    def handle(self, *args, **options):
+        # Sólo vuelca el buffer de este proceso; los de los workers se vuelcan solos.
+        counters.flush_views(refresh=False)
+        counters.refresh_popular_posts()
+        self.stdout.write(self.style.SUCCESS("Ranking de posts más leídos actualizado."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog_app.related import update_related_posts
+
+
+class Command(BaseCommand):
+    help = "Actualiza los posts relacionados (TF-IDF) de los posts nuevos o modificados desde la última ejecución."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recalcular todos los vectores y listas, no sólo los modificados.")
+
+    def handle(self, *args, **options):
+        stats = update_related_posts(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Posts relacionados actualizados: {stats['vectors']} vectores nuevos o modificados, {stats['lists']} listas reescritas."
+        ))
@@ -0,0 +1,184 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .images import DERIVATIVES_DIR
+from .instrumentation import query_budget
+
+
+# Archivos subidos (imágenes de posts, avatares, subidas de CKEditor). Las
+# imágenes de un post no publicado, y sus derivados, sólo las ven el autor y
+# el staff, igual que el post.
+POST_IMAGES_DIR = 'post_images/'
+DERIVATIVE_RE = re.compile(r'^%s/(?P<base>.+)\.\d+w\.[^./]+$' % re.escape(DERIVATIVES_DIR))
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def sendfile_backend():
+    return getattr(settings, 'BLOG_MEDIA_SENDFILE', '') or None
+
+
+def accel_prefix():
+    return getattr(settings, 'BLOG_MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+
+def media_max_age():
+    return getattr(settings, 'BLOG_MEDIA_MAX_AGE', 24 * 60 * 60)
+
+
+def post_image_lookup(path):
+    # Posts que usan el archivo como imagen destacada (o como original del
+    # derivado). Devuelve None si el archivo no es una imagen de post.
+    match = DERIVATIVE_RE.match(path)
+    if match is not None:
+        base = match['base']
+        if not base.startswith(POST_IMAGES_DIR):
+            return None
+        return Q(featured_image__startswith=f'{base}.'), base
+    if not path.startswith(POST_IMAGES_DIR):
+        return None
+    return Q(featured_image=path), None
+
+
+def media_access(request, path):
+    # 'public' si cualquiera puede verlo, 'private' si sólo este usuario (autor
+    # o staff) y None si no debe saber que existe.
+    lookup = post_image_lookup(path)
+    if lookup is None:
+        return 'public'
+    from .models import Post
+
+    condition, base = lookup
+
+    def uses_file(posts):
+        names = posts.filter(condition).values_list('featured_image', flat=True)
+        # "foto." también es prefijo de "foto.v2.jpg": se compara sin extensión.
+        return any(base is None or os.path.splitext(name)[0] == base for name in names)
+
+    if uses_file(Post.objects.published()):
+        return 'public'
+    # Las imágenes huérfanas (de posts borrados o reemplazadas) sólo las ve el staff.
+    if uses_file(Post.objects.visible_to(request.user)) or request.user.is_staff:
+        return 'private'
+    return None
+
+
+def parse_range(header, size):
+    # Un único rango de bytes; sin Range, con varios rangos o con uno inválido
+    # se envía el archivo completo. ValueError si el rango queda fuera.
+    match = RANGE_RE.match(header.strip())
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("Rango vacío.")
+        return max(0, size - length), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("El rango empieza después del final del archivo.")
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+class FileRange:
+    # Parte de un archivo: read() no pasa de `length` bytes y fileno() deja
+    # al servidor (gunicorn, por ejemplo) enviarla con sendfile desde la
+    # posición actual, con el Content-Length de la respuesta.
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def file_response(request, fullpath, size, etag, last_modified, content_type):
+    requested = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    # If-Range: la parte pedida sólo vale si el archivo no cambió.
+    if requested and if_range and if_range not in (etag, http_date(last_modified)):
+        requested = None
+    try:
+        byte_range = parse_range(requested, size) if requested else None
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    # Sin rango, FileResponse usa wsgi.file_wrapper: el servidor WSGI envía el
+    # archivo con sendfile, sin copiarlo al proceso.
+    file = open(fullpath, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type)
+    start, end = byte_range
+    response = FileResponse(FileRange(file, start, end - start + 1), content_type=content_type, status=206)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+@query_budget(4)
+def serve(request, path):
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404("El archivo no existe.")
+    if not os.path.isfile(fullpath):
+        raise Http404("El archivo no existe.")
+    access = media_access(request, path)
+    if access is None:
+        raise Http404("El archivo no existe.")
+
+    stat = os.stat(fullpath)
+    # El mismo formato de ETag que nginx, para que los 304 coincidan si el
+    # archivo lo envía nginx (X-Accel-Redirect).
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type = mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+        backend = sendfile_backend()
+        if backend == 'x-accel-redirect':
+            # nginx envía el archivo (con Range y condicionales) desde una
+            # location "internal" que apunta a MEDIA_ROOT.
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = accel_prefix() + quote(path)
+        elif backend == 'x-sendfile':
+            # Apache (mod_xsendfile) o lighttpd.
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = fullpath
+        else:
+            response = file_response(request, fullpath, stat.st_size, etag, last_modified, content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    if access == 'public':
+        patch_cache_control(response, public=True, max_age=media_max_age())
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Cookie',))
+    return response
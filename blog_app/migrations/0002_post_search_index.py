@@ -0,0 +1,84 @@
+from html.parser import HTMLParser
+
+from django.db import migrations
+
+
+# Copias de blog_app/search.py y blog_app/sanitizer.py al momento de esta
+# migración: las migraciones no importan módulos de la aplicación.
+FTS_TABLE = 'blog_app_post_fts'
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'noscript', 'template'}
+BLOCK_TAGS = {
+    'address', 'blockquote', 'br', 'caption', 'div', 'figcaption', 'figure', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'hr', 'li', 'ol', 'p', 'pre', 'table', 'td', 'th', 'tr', 'ul',
+}
+
+
+class _TextExtractor(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+    def close(self):
+        super().close()
+        return ' '.join(''.join(self.parts).split())
+
+
+def html_to_text(value):
+    if not value:
+        return ''
+    parser = _TextExtractor()
+    parser.feed(value)
+    return parser.close()
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Post = apps.get_model('blog_app', 'Post')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, summary, content, author, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        for post in Post.objects.select_related('author').iterator():
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, summary, content, author) VALUES (%s, %s, %s, %s, %s)",
+                [post.pk, post.title, html_to_text(post.summary), html_to_text(post.content), post.author.username],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
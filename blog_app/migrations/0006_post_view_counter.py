@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0005_post_listing_covering_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Lecturas'),
+        ),
+        migrations.CreateModel(
+            name='PopularPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('day', 'Últimas 24 horas'), ('week', 'Últimos 7 días')], max_length=10)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('views', models.PositiveIntegerField()),
+                ('computed_at', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog_app.post')),
+            ],
+            options={
+                'ordering': ['window', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('window', 'rank'), name='popular_post_window_rank_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostViewBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_buckets', to='blog_app.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour', 'post', 'views'], name='post_view_bucket_hour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'hour'), name='post_view_bucket_unique')],
+            },
+        ),
+    ]
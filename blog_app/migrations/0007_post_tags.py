@@ -0,0 +1,93 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+# Copia de blog_app/tags.parse_keywords al momento de esta migración.
+TAG_NAME_MAX_LENGTH = 50
+
+
+def parse_keywords(keywords):
+    tags = {}
+    for raw in (keywords or '').split(','):
+        name = ' '.join(raw.split())[:TAG_NAME_MAX_LENGTH]
+        slug = slugify(name)
+        if slug and slug not in tags:
+            tags[slug] = name
+    return tags
+
+
+def create_tags_from_keywords(apps, schema_editor):
+    Post = apps.get_model('blog_app', 'Post')
+    Tag = apps.get_model('blog_app', 'Tag')
+    PostTag = apps.get_model('blog_app', 'PostTag')
+
+    names = {}
+    links = []
+    published = {}
+    posts = Post.objects.exclude(keywords__isnull=True).exclude(keywords='').values_list('pk', 'keywords', 'status')
+    for post_id, keywords, status in posts.iterator():
+        for slug, name in parse_keywords(keywords).items():
+            names.setdefault(slug, name)
+            links.append((post_id, slug))
+            if status == 'published':
+                published[slug] = published.get(slug, 0) + 1
+
+    Tag.objects.bulk_create(
+        [Tag(slug=slug, name=name, post_count=published.get(slug, 0)) for slug, name in names.items()],
+        batch_size=500,
+    )
+    tag_ids = dict(Tag.objects.values_list('slug', 'pk'))
+    PostTag.objects.bulk_create(
+        [PostTag(post_id=post_id, tag_id=tag_ids[slug]) for post_id, slug in links],
+        batch_size=500,
+    )
+
+
+def delete_tags(apps, schema_editor):
+    apps.get_model('blog_app', 'Tag').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0006_post_view_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Nombre')),
+                ('slug', models.SlugField(max_length=60, unique=True)),
+                ('post_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='Posts publicados')),
+            ],
+            options={
+                'verbose_name': 'Etiqueta',
+                'verbose_name_plural': 'Etiquetas',
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['-post_count', 'name'], name='tag_post_count_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='blog_app.post')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='blog_app.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='posts', through='blog_app.PostTag', to='blog_app.tag', verbose_name='Etiquetas'),
+        ),
+        migrations.AddConstraint(
+            model_name='posttag',
+            constraint=models.UniqueConstraint(fields=('tag', 'post'), name='post_tag_unique'),
+        ),
+        migrations.RunPython(create_tags_from_keywords, delete_tags),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:04
+
+import re
+
+from django.db import migrations, models
+
+
+# Copia de blog_app/slugs.split_slug al momento de esta migración.
+_SUFFIX_RE = re.compile(r'^(?P<base>.+)-(?P<number>\d+)$')
+
+
+def split_slug(slug):
+    match = _SUFFIX_RE.match(slug)
+    if match:
+        return match.group('base'), int(match.group('number'))
+    return slug, 0
+
+
+def create_slug_counters(apps, schema_editor):
+    Post = apps.get_model('blog_app', 'Post')
+    SlugCounter = apps.get_model('blog_app', 'SlugCounter')
+
+    last = {}
+    for slug in Post.objects.values_list('slug', flat=True).iterator():
+        # "python-3" puede ser la base "python" con sufijo 3 o un título
+        # "Python 3": se registran ambas lecturas.
+        last.setdefault(slug, 0)
+        base, number = split_slug(slug)
+        if number:
+            last[base] = max(last.get(base, 0), number)
+    SlugCounter.objects.bulk_create(
+        [SlugCounter(base=base, last=number) for base, number in last.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0008_related_posts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlugCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('base', models.CharField(max_length=220, unique=True)),
+                ('last', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_slug_counters, migrations.RunPython.noop),
+    ]
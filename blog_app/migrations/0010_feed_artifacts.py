@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0009_slug_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('content', models.BinaryField()),
+                ('content_type', models.CharField(max_length=100)),
+                ('etag', models.CharField(max_length=100)),
+                ('last_modified', models.DateTimeField(null=True)),
+                ('expires_at', models.DateTimeField(null=True)),
+                ('generated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:50
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def recount_tags(apps, schema_editor):
+    # Los contadores incluían los posts programados: sólo cuentan los visibles.
+    Tag = apps.get_model('blog_app', 'Tag')
+    PostTag = apps.get_model('blog_app', 'PostTag')
+    now = timezone.now()
+    links = PostTag.objects.filter(tag=OuterRef('pk'), post__status='published').order_by()
+    visible = links.filter(post__published_date__lte=now).values('tag').annotate(total=Count('pk')).values('total')
+    upcoming = links.filter(post__published_date__gt=now).values('tag').annotate(first=Min('post__published_date')).values('first')
+    Tag.objects.update(post_count=Coalesce(Subquery(visible), 0), recount_at=Subquery(upcoming))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0010_feed_artifacts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='recount_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='Recalcular desde'),
+        ),
+        migrations.RunPython(recount_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:56
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0011_tag_recount_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='relatedpost',
+            name='computed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0012_related_post_computed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedartifact',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='feedartifact',
+            name='content',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AlterField(
+            model_name='feedartifact',
+            name='content_type',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='feedartifact',
+            name='etag',
+            field=models.CharField(default='', max_length=100),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0013_feed_artifact_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='featured_image_widths',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Anchos de la imagen destacada'),
+        ),
+    ]
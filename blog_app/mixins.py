@@ -1,13 +1,36 @@
 from django.contrib.auth.mixins import AccessMixin
 from django.shortcuts import redirect, get_object_or_404
 from django.contrib import messages
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 from .models import Post
+from . import cache as page_cache
+from .database import SAFE_METHODS, retry_on_locked
+from .pagination import cursor_pagination_enabled, paginate_by_cursor
+
+class PostObjectMixin:
+    # Resuelve el post de la URL una sola vez por petición (búsqueda por slug,
+    # índice único, con el autor incluido); AuthorRequiredMixin, la vista y la
+    # plantilla comparten la misma instancia.
+    model = Post
+    context_object_name = 'post'
+    slug_field = 'slug'
+    slug_url_kwarg = 'slug'
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_post'):
+            self._post = super().get_object(self.get_queryset().select_related('author'))
+        return self._post
+
 
 class AuthorRequiredMixin(AccessMixin):
     def dispatch(self, request, *args, **kwargs):
         obj = self.get_object()
 
-        if obj.author != request.user:
+        if not obj.is_authored_by(request.user):
             messages.error(request, "No tienes permiso para editar o eliminar este post, ya que no eres el autor.")
             if hasattr(obj, 'get_absolute_url'):
                 return redirect(obj.get_absolute_url())
@@ -15,6 +38,15 @@ class AuthorRequiredMixin(AccessMixin):
         
         return super().dispatch(request, *args, **kwargs)
 
+class RetryOnLockedMixin:
+    # Las peticiones que escriben se repiten si SQLite responde "database is
+    # locked". Los mensajes se agregan después de escribir para no duplicarlos.
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        return retry_on_locked(super().dispatch)(request, *args, **kwargs)
+
+
 class StaffRequiredMixin(AccessMixin):
     def dispatch(self, request, *args, **kwargs):
         if not request.user.is_staff:
@@ -22,3 +54,79 @@ class StaffRequiredMixin(AccessMixin):
             return redirect('blog:home') 
         return super().dispatch(request, *args, **kwargs)
 
+
+class AnonymousPageCacheMixin:
+    page_cache_params = ()
+
+    def get_page_cache_key(self):
+        raise NotImplementedError
+
+    def dispatch(self, request, *args, **kwargs):
+        key = None
+        if page_cache.is_cacheable_request(request, self.page_cache_params):
+            key = self.get_page_cache_key()
+        if key:
+            cached = page_cache.get_cached_response(key)
+            if cached is not None:
+                return cached
+        response = super().dispatch(request, *args, **kwargs)
+        if key:
+            page_cache.cache_response_on_render(key, response)
+        return response
+
+
+class CursorPaginationMixin:
+
+    def use_cursor_pagination(self):
+        return cursor_pagination_enabled()
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        page = paginate_by_cursor(self.request, queryset, page_size)
+        return (None, page, page.object_list, page.has_other_pages())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['cursor_pagination'] = self.use_cursor_pagination()
+        return context
+
+
+class ConditionalGetMixin:
+    # Responde 304 a If-None-Match / If-Modified-Since antes de consultar la
+    # caché de páginas o renderizar la plantilla.
+
+    def get_conditional_validators(self):
+        raise NotImplementedError
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or 'messages' in request.COOKIES:
+            return super().dispatch(request, *args, **kwargs)
+
+        validators = self.get_conditional_validators()
+        if validators is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        parts, last_modified = page_cache.combine_validators(*validators, request.user)
+        etag = page_cache.make_etag(request.get_full_path(), *parts)
+        timestamp = page_cache.to_timestamp(last_modified) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        # También en el 304, para que el cliente actualice sus validadores.
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        self.patch_http_cache_headers(response)
+        return response
+
+    def patch_http_cache_headers(self, response):
+        if self.request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(response, public=True, max_age=getattr(settings, 'BLOG_HTTP_MAX_AGE', 60))
+        # El HTML cambia según la sesión (navbar, botones de edición).
+        patch_vary_headers(response, ('Cookie',))
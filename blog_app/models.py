@@ -1,4 +1,8 @@
-from django.db import models
+from copy import copy
+
+from django.db import IntegrityError, models, transaction
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
@@ -6,6 +10,22 @@ from ckeditor_uploader.fields import RichTextUploadingField
 
 
 
+class PostQuerySet(models.QuerySet):
+
+    def published(self):
+        return self.filter(status='published', published_date__lte=timezone.now())
+
+    # Reglas de visibilidad de un post: publicados para todos; el autor ve
+    # además sus borradores y programados, y el staff ve todo.
+    def visible_to(self, user):
+        if user.is_authenticated and user.is_staff:
+            return self
+        visible = models.Q(status='published', published_date__lte=timezone.now())
+        if user.is_authenticated:
+            visible |= models.Q(author=user)
+        return self.filter(visible)
+
+
 def post_image_path(instance, filename):
     return f'post_images/post_{instance.pk or "new"}_{instance.author.username}/{filename}'
 
@@ -22,6 +42,9 @@ class Post(models.Model):
         help_text="Imagen principal que se mostrará para el post.",
         null=True, blank=True
     )
+    # Anchos de los derivados generados (ver blog_app/images.py); vacío
+    # mientras no existan.
+    featured_image_widths = models.JSONField(default=list, blank=True, editable=False, verbose_name="Anchos de la imagen destacada")
     
     published_date = models.DateTimeField(verbose_name="Fecha de Publicación", default=timezone.now, help_text="Puede ser una fecha futura para programar la publicación.")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
@@ -35,12 +58,39 @@ class Post(models.Model):
     
     meta_description = models.CharField(max_length=160, blank=True, null=True, verbose_name="Meta Descripción (SEO)", help_text="Descripción breve para motores de búsqueda (máx. 160 caracteres).")
     keywords = models.CharField(max_length=255, blank=True, null=True, verbose_name="Palabras Clave (SEO)", help_text="Palabras clave separadas por comas.")
+    # Se mantienen a partir de keywords al guardar (ver blog_app/tags.py).
+    tags = models.ManyToManyField('Tag', through='PostTag', related_name='posts', blank=True, verbose_name="Etiquetas")
+
+    # Campos derivados, calculados al guardar (ver refresh_derived_fields).
+    summary_html = models.TextField(blank=True, default='', editable=False, verbose_name="Resumen (HTML saneado)")
+    content_html = models.TextField(blank=True, default='', editable=False, verbose_name="Contenido (HTML saneado)")
+    plain_text = models.TextField(blank=True, default='', editable=False, verbose_name="Contenido en texto plano")
+    excerpt = models.CharField(max_length=160, blank=True, default='', editable=False, verbose_name="Extracto")
+    reading_time = models.PositiveSmallIntegerField(default=1, editable=False, verbose_name="Tiempo de lectura (min)")
+
+    # Lecturas acumuladas; se actualiza por lotes desde blog_app.counters.
+    view_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Lecturas")
+
+    objects = PostQuerySet.as_manager()
+
+    DERIVED_FIELDS = ('summary_html', 'content_html', 'plain_text', 'excerpt', 'reading_time')
+    DERIVED_SOURCE_FIELDS = {'summary', 'content'}
 
 
     class Meta:
         ordering = ['-published_date'] 
         verbose_name = "Post / Página"
         verbose_name_plural = "Posts / Páginas"
+        indexes = [
+            # Listados públicos: status='published' AND published_date <= ahora, por fecha.
+            # Incluye id (orden por cursor) y updated_at (ETag/Last-Modified) para
+            # resolver ambos sólo desde el índice.
+            models.Index(fields=['status', 'published_date', 'id', 'updated_at'], name='post_status_pub_upd_idx'),
+            # Perfil público de un autor (sólo publicados).
+            models.Index(fields=['author', 'status', 'published_date'], name='post_author_status_pub_idx'),
+            # Perfil propio: todos los posts del autor, por fecha.
+            models.Index(fields=['author', 'published_date'], name='post_author_pubdate_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -48,27 +98,288 @@ class Post(models.Model):
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'slug': self.slug})
 
+    SLUG_RETRIES = 3
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            from django.utils.text import slugify
-            original_slug = slugify(self.title)
-            queryset = Post.objects.filter(slug__iexact=original_slug).exclude(pk=self.pk)
-            num = 1
-            slug = original_slug
-            while queryset.exists():
-                slug = f"{original_slug}-{num}"
-                queryset = Post.objects.filter(slug__iexact=slug).exclude(pk=self.pk)
-                num += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or self.DERIVED_SOURCE_FIELDS & set(update_fields):
+            self.refresh_derived_fields()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(self.DERIVED_FIELDS)
+
+        if self.slug:
+            super().save(*args, **kwargs)
+            return
+
+        from .slugs import allocate_slugs, reserve_slug, slug_base, slug_taken
+        base = slug_base(self.title)
+        self.slug = reserve_slug(base)
+        for attempt in range(self.SLUG_RETRIES):
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                # El contador no conocía ese slug (escrito a mano o por otro
+                # proceso): se busca el siguiente libre comprobándolo.
+                if attempt == self.SLUG_RETRIES - 1 or not slug_taken(self.slug, self.pk):
+                    raise
+                self.slug = allocate_slugs([base])[0]
+
+    def refresh_derived_fields(self):
+        from .sanitizer import sanitize_html, html_to_text, make_excerpt, reading_time
+        self.summary_html = sanitize_html(self.summary)
+        self.content_html = sanitize_html(self.content)
+        self.plain_text = html_to_text(self.content)
+        self.excerpt = make_excerpt(html_to_text(self.summary) or self.plain_text)
+        self.reading_time = reading_time(self.plain_text)
 
     @property
     def is_published(self):
         return self.status == 'published' and self.published_date <= timezone.now()
 
+    @property
+    def keyword_tags(self):
+        # Pares (slug, nombre) de las etiquetas, sin consultar la base de datos.
+        from .tags import parse_keywords
+        return list(parse_keywords(self.keywords).items())
+
+    def is_authored_by(self, user):
+        return user.is_authenticated and self.author_id == user.pk
+
     @property
     def get_featured_image_url(self):
         if self.featured_image and hasattr(self.featured_image, 'url'):
             return self.featured_image.url
-        return None 
+        return None
+
+
+class SlugCounter(models.Model):
+    # Sufijo más alto asignado a cada base de slug (ver blog_app/slugs.py).
+    base = models.CharField(max_length=220, unique=True)
+    last = models.PositiveIntegerField(default=0)
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=50, verbose_name="Nombre")
+    slug = models.SlugField(max_length=60, unique=True)
+    # Posts visibles con la etiqueta; se recalcula en las etiquetas afectadas
+    # al guardar un post y al llegar recount_at (ver blog_app/tags.py).
+    post_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Posts publicados")
+    recount_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True, verbose_name="Recalcular desde")
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Etiqueta"
+        verbose_name_plural = "Etiquetas"
+        indexes = [
+            # Índice de etiquetas, de las más usadas a las menos.
+            models.Index(fields=['-post_count', 'name'], name='tag_post_count_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def get_absolute_url(self):
+        return reverse('blog:tag_detail', kwargs={'slug': self.slug})
+
+
+class PostTag(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='post_tags')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='post_tags')
+
+    class Meta:
+        constraints = [
+            # Empieza por tag: la página de una etiqueta recorre sólo sus filas.
+            models.UniqueConstraint(fields=['tag', 'post'], name='post_tag_unique'),
+        ]
+
+
+class PostVector(models.Model):
+    # Frecuencias de términos del post para "posts relacionados" (ver blog_app/related.py).
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='vector')
+    terms = models.JSONField(default=dict)
+    signature = models.CharField(max_length=32)
+    # updated_at del post al calcular el vector; si el post cambia después, se revisa.
+    source_updated_at = models.DateTimeField()
+
+
+class RelatedPost(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_to_entries')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    # Las listas se reescriben enteras: el máximo por post forma parte del
+    # ETag de su detalle (ver cache.post_validators).
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['post', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'rank'], name='related_post_rank_unique'),
+        ]
+
+
+class PostViewBucket(models.Model):
+    # Lecturas de un post agrupadas por hora, para las ventanas de "más leídos".
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='view_buckets')
+    hour = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'hour'], name='post_view_bucket_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['hour', 'post', 'views'], name='post_view_bucket_hour_idx'),
+        ]
+
+
+class PopularPost(models.Model):
+    # Ranking precalculado de los más leídos por ventana (ver counters.refresh_popular_posts).
+    WINDOW_CHOICES = (
+        ('day', 'Últimas 24 horas'),
+        ('week', 'Últimos 7 días'),
+    )
+    window = models.CharField(max_length=10, choices=WINDOW_CHOICES)
+    rank = models.PositiveSmallIntegerField()
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    views = models.PositiveIntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['window', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['window', 'rank'], name='popular_post_window_rank_unique'),
+        ]
+
+
+class FeedArtifact(models.Model):
+    # Feeds y sitemap ya generados y comprimidos con gzip (ver blog_app/feeds.py).
+    key = models.CharField(max_length=100, unique=True)
+    # Sin etag, la fila está invalidada (o reservada para generarla por primera vez).
+    content = models.BinaryField(default=b'')
+    content_type = models.CharField(max_length=100, default='')
+    etag = models.CharField(max_length=100, default='')
+    last_modified = models.DateTimeField(null=True)
+    # Publicación programada que cambia el artefacto; a partir de ella se regenera.
+    expires_at = models.DateTimeField(null=True)
+    generated_at = models.DateTimeField(default=timezone.now)
+    # Aumenta con cada invalidación y cada guardado: sólo se guarda lo generado
+    # si la versión no cambió desde que se leyó la fila.
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.key
+
+    def is_expired(self):
+        return self.expires_at is not None and self.expires_at <= timezone.now()
+
+    def is_current(self):
+        return bool(self.etag) and not self.is_expired()
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_post_state(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        instance._previous_state = None
+        return
+    instance._previous_state = Post.objects.filter(pk=instance.pk).values('slug', 'status', 'published_date', 'keywords', 'author', 'featured_image').first()
+    # Los anchos guardados son los de la imagen anterior.
+    previous = instance._previous_state
+    if previous is not None and (previous['featured_image'] or '') != (instance.featured_image.name or ''):
+        instance.featured_image_widths = []
+
+
+@receiver(post_init, sender=User)
+def remember_loaded_username(sender, instance, **kwargs):
+    # Sin consultar: el nombre con que se cargó (o creó) el usuario. Con
+    # only()/defer() sin el nombre queda en None.
+    instance._previous_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+def purge_author_pages(sender, instance, created=False, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_username', None)
+    if raw or created or previous is None or previous == instance.username:
+        return
+    instance._previous_username = instance.username
+    from .cache import purge_author
+    from .feeds import purge_author_feeds
+    from .search import get_search_backend
+    user_id = instance.pk
+    get_search_backend().rename_author(user_id, instance.username)
+    transaction.on_commit(lambda: purge_author(user_id))
+    purge_author_feeds(user_id)
+
+
+@receiver(post_save, sender=Post)
+def update_post_search_index(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .search import get_search_backend
+    get_search_backend().index_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def sync_post_tags(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not {'keywords', 'status', 'published_date'} & set(update_fields)):
+        return
+    from .tags import sync_post_tags
+    sync_post_tags(instance, getattr(instance, '_previous_state', None))
+
+
+@receiver(post_save, sender=Post)
+def purge_post_page_cache(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .cache import purge_post
+    # Después del commit: antes, una lectura anónima volvería a guardar en la
+    # caché la versión anterior. Se copia el post tal como quedó guardado.
+    post, previous = copy(instance), getattr(instance, '_previous_state', None)
+    transaction.on_commit(lambda: purge_post(post, previous))
+
+
+@receiver(post_save, sender=Post)
+def purge_post_feeds(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .feeds import purge_post_feeds
+    purge_post_feeds(instance, getattr(instance, '_previous_state', None))
+
+
+@receiver(post_save, sender=Post)
+def generate_featured_image_derivatives(sender, instance, raw=False, **kwargs):
+    if raw or not instance.featured_image or instance.featured_image_widths:
+        return
+    from .images import schedule_derivatives, POST_IMAGE_WIDTHS
+    schedule_derivatives(instance.featured_image.name, POST_IMAGE_WIDTHS, record_featured_image_widths)
+
+
+def record_featured_image_widths(name, widths):
+    return Post.objects.filter(featured_image=name).update(featured_image_widths=widths)
+
+
+@receiver(pre_delete, sender=Post)
+def release_post_tags(sender, instance, **kwargs):
+    from .tags import release_post_tags
+    release_post_tags(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_search_index(sender, instance, **kwargs):
+    from .search import get_search_backend
+    get_search_backend().remove_post(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def purge_deleted_post_page_cache(sender, instance, **kwargs):
+    from .cache import purge_post
+    post = copy(instance)
+    transaction.on_commit(lambda: purge_post(post))
+
 
+@receiver(post_delete, sender=Post)
+def purge_deleted_post_feeds(sender, instance, **kwargs):
+    from .feeds import purge_post_feeds
+    purge_post_feeds(instance)
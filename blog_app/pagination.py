@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+
+
+CURSOR_PARAM = 'cursor'
+
+
+def cursor_pagination_enabled():
+    return getattr(settings, 'BLOG_CURSOR_PAGINATION', False)
+
+
+def encode_cursor(post, direction):
+    payload = {'d': post.published_date.isoformat(), 'i': post.pk, 'r': direction}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        published_date = parse_datetime(payload['d'])
+        pk = int(payload['i'])
+        direction = payload['r']
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError):
+        raise Http404("Cursor de paginación inválido.")
+    if published_date is None or direction not in ('next', 'prev'):
+        raise Http404("Cursor de paginación inválido.")
+    return published_date, pk, direction
+
+
+class CursorPage:
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return encode_cursor(self.object_list[-1], 'next')
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return encode_cursor(self.object_list[0], 'prev')
+
+
+# Paginación por clave (published_date, id): cada página es una única consulta
+# de rango sobre el índice, sin COUNT(*) ni OFFSET.
+class CursorPaginator:
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def _page_query(self, token):
+        if not token:
+            return self.queryset.order_by('-published_date', '-pk')[:self.per_page + 1], None
+
+        published_date, pk, direction = decode_cursor(token)
+        if direction == 'next':
+            return self.queryset.filter(
+                Q(published_date__lt=published_date) |
+                Q(published_date=published_date, pk__lt=pk)
+            ).order_by('-published_date', '-pk')[:self.per_page + 1], direction
+
+        return self.queryset.filter(
+            Q(published_date__gt=published_date) |
+            Q(published_date=published_date, pk__gt=pk)
+        ).order_by('published_date', 'pk')[:self.per_page + 1], direction
+
+    def _make_page(self, rows, direction):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction is None:
+            return CursorPage(rows, has_more, False)
+        if direction == 'next':
+            return CursorPage(rows, has_more, True)
+        rows.reverse()
+        return CursorPage(rows, True, has_more)
+
+    def page(self, token=None):
+        queryset, direction = self._page_query(token)
+        return self._make_page(list(queryset), direction)
+
+    async def apage(self, token=None):
+        queryset, direction = self._page_query(token)
+        return self._make_page([row async for row in queryset], direction)
+
+
+def paginate_by_cursor(request, queryset, per_page):
+    return CursorPaginator(queryset, per_page).page(request.GET.get(CURSOR_PARAM))
+
+
+async def apaginate_by_cursor(request, queryset, per_page):
+    return await CursorPaginator(queryset, per_page).apage(request.GET.get(CURSOR_PARAM))
@@ -0,0 +1,241 @@
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+PROFILE_NAME_RE = re.compile(r'^[0-9]{8}T[0-9]{12}-[0-9a-f]{6}$')
+# Límites de las pilas del formato "collapsed": profundidad máxima y fracción
+# mínima del tiempo total para seguir bajando por una rama.
+MAX_STACK_DEPTH = 64
+MIN_STACK_SHARE = 1 / 5000
+
+_lock = threading.Lock()
+
+
+def profiling_enabled():
+    return getattr(settings, 'BLOG_PROFILING', True)
+
+
+def sample_rate():
+    return getattr(settings, 'BLOG_PROFILE_SAMPLE_RATE', 0.0)
+
+
+def profile_dir():
+    return Path(getattr(settings, 'BLOG_PROFILE_DIR', Path(settings.BASE_DIR) / 'profiles'))
+
+
+def profile_keep():
+    return getattr(settings, 'BLOG_PROFILE_KEEP', 50)
+
+
+def profile_requested(request):
+    return PROFILE_PARAM in request.GET or bool(request.headers.get(PROFILE_HEADER))
+
+
+# Los perfiles a pedido (parámetro o cabecera) son sólo para staff; el muestreo
+# aplica a cualquier petición.
+def profile_trigger(user):
+    if user is not None and user.is_staff:
+        return 'staff'
+    rate = sample_rate()
+    if rate and random.random() < rate:
+        return 'sample'
+    return None
+
+
+def new_profile_name():
+    now = timezone.now()
+    return f"{now:%Y%m%dT%H%M%S%f}-{os.urandom(3).hex()}"
+
+
+def is_profile_name(name):
+    return bool(PROFILE_NAME_RE.match(name))
+
+
+def profile_path(name, suffix):
+    return profile_dir() / f'{name}{suffix}'
+
+
+def save_profile(profiler, metadata):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    name = new_profile_name()
+    # Los metadatos van primero: un .prof listado siempre tiene su .json. El
+    # .prof es el formato de pstats (snakeviz, pstats.Stats, gprof2dot…).
+    profile_path(name, '.json').write_text(json.dumps(metadata), 'utf-8')
+    tmp = directory / f'.{name}.prof.tmp'
+    profiler.dump_stats(tmp)
+    os.replace(tmp, profile_path(name, '.prof'))
+    prune_profiles()
+    return name
+
+
+# Buffer circular en disco: se conservan los BLOG_PROFILE_KEEP más recientes.
+def prune_profiles(keep=None):
+    keep = profile_keep() if keep is None else keep
+    with _lock:
+        names = sorted(path.stem for path in profile_dir().glob('*.prof'))
+        removed = names[:max(0, len(names) - keep)]
+        for name in removed:
+            for suffix in ('.prof', '.json'):
+                profile_path(name, suffix).unlink(missing_ok=True)
+    return len(removed)
+
+
+def list_profiles():
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for path in sorted(directory.glob('*.prof'), reverse=True):
+        try:
+            size = path.stat().st_size
+            metadata = json.loads(profile_path(path.stem, '.json').read_text('utf-8'))
+        except (OSError, ValueError):
+            # Eliminado por otro proceso mientras se listaba.
+            continue
+        metadata['name'] = path.stem
+        metadata['size'] = size
+        profiles.append(metadata)
+    return profiles
+
+
+def load_stats(name, stream=None):
+    return pstats.Stats(str(profile_path(name, '.prof')), stream=stream)
+
+
+def _label(func):
+    filename, line, function = func
+    if filename == '~':
+        return function
+    return f'{os.path.basename(filename)}:{line}:{function}'
+
+
+# Pilas "collapsed" (una línea "a;b;c microsegundos" por pila), el formato de
+# entrada de flamegraph.pl y speedscope. cProfile sólo guarda pares
+# llamador/llamado, así que el tiempo propio de cada función se reparte entre
+# sus llamadores en proporción al tiempo acumulado de cada llamada.
+def collapsed_stacks(stats):
+    callees = defaultdict(dict)
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+    roots = [func for func, entry in stats.stats.items() if not entry[4]]
+    threshold = sum(stats.stats[func][3] for func in roots) * MIN_STACK_SHARE
+    lines = defaultdict(float)
+
+    def walk(func, stack, share):
+        cc, nc, tt, ct, callers = stats.stats[func]
+        stack = stack + (func,)
+        if tt * share > 0:
+            lines[';'.join(_label(f) for f in stack)] += tt * share
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_time in callees[func].items():
+            if callee in stack or share * edge_time <= threshold:
+                continue
+            total = stats.stats[callee][3]
+            if total:
+                walk(callee, stack, share * min(1.0, edge_time / total))
+
+    for root in roots:
+        walk(root, (), 1.0)
+    return '\n'.join(
+        f'{stack} {round(seconds * 1e6)}'
+        for stack, seconds in sorted(lines.items()) if round(seconds * 1e6)
+    ) + '\n'
+
+
+# Punto de entrada de cada perfil: es la raíz de las pilas, porque el
+# get_response de Django se llama recursivamente de un middleware a otro.
+def profiled_request(get_response, request):
+    return get_response(request)
+
+
+async def aprofiled_request(get_response, request):
+    return await get_response(request)
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not profiling_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        user = request.user if profile_requested(request) else None
+        trigger = profile_trigger(user)
+        if trigger is None:
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = profiled_request(self.get_response, request)
+        finally:
+            profiler.disable()
+        return self.finish(request, response, profiler, trigger, user, start)
+
+    async def __acall__(self, request):
+        user = await request.auser() if profile_requested(request) else None
+        trigger = profile_trigger(user)
+        if trigger is None:
+            return await self.get_response(request)
+        # cProfile mide el hilo del event loop: no ve las consultas que el ORM
+        # async ejecuta en otros hilos y sí, si las hay, otras corrutinas que se
+        # ejecuten mientras tanto.
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = await aprofiled_request(self.get_response, request)
+        finally:
+            profiler.disable()
+        return self.finish(request, response, profiler, trigger, user, start)
+
+    def finish(self, request, response, profiler, trigger, user, start):
+        match = request.resolver_match
+        metadata = {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'trigger': trigger,
+            # Las peticiones muestreadas no guardan el usuario.
+            'user': user.get_username() if trigger == 'staff' else None,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 2),
+            'created': timezone.now().isoformat(),
+        }
+        try:
+            name = save_profile(profiler, metadata)
+        except OSError:
+            logger.exception("No se pudo guardar el perfil de %s", request.path)
+            return response
+        if trigger == 'staff':
+            response[PROFILE_ID_HEADER] = name
+        return response
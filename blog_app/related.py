@@ -0,0 +1,226 @@
+import hashlib
+import json
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from functools import lru_cache
+from heapq import nlargest
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .tags import parse_keywords
+
+
+# "Posts relacionados" por similitud coseno entre vectores TF-IDF. Las
+# frecuencias de términos de cada post se guardan en PostVector; el job
+# incremental (update_related_posts) recalcula sólo los vectores de los posts
+# modificados y las listas que pueden haber cambiado, y la vista de detalle lee
+# la lista ya calculada de RelatedPost con una sola consulta.
+
+MAX_TERMS = 100        # términos más frecuentes que se guardan por post
+MAX_DF_RATIO = 0.5     # en corpus grandes, términos en más de la mitad de los posts no aportan
+MIN_DF_RATIO_CORPUS = 20
+MIN_SCORE = 0.05
+TITLE_WEIGHT = 3
+KEYWORD_WEIGHT = 3
+
+_WORD_RE = re.compile(r'[^\W\d_]{3,}', re.UNICODE)
+
+STOPWORDS = frozenset("""
+    algo ante antes aqui asi aun cada como con contra cual cuando del desde donde dos durante
+    el ella ellas ellos en entre era eran eres esa esas ese eso esos esta estaba estan estar
+    este esto estos fue fueron hace hacer hay las les los mas menos mientras mis mismo mucho
+    muy nada nos nosotros otra otras otro otros para pero poco por porque puede pueden que
+    quien ser sera si sido sin sobre solo son sus tambien tan tanto tiene tienen todo todos
+    tras una uno unos usted ver vez yo
+    about after all also and any are because been but can could did does for from had has
+    have her his how into its just more most not now one only other our out over some such
+    than that the their them then there these they this those through too under very was
+    were what when where which while who why will with would you your
+""".split())
+
+
+@lru_cache(maxsize=65536)
+def normalize(word):
+    # Sin tildes: "índice" e "indice" son el mismo término.
+    if word.isascii():
+        return word
+    return ''.join(char for char in unicodedata.normalize('NFKD', word) if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    words = (normalize(word) for word in _WORD_RE.findall((text or '').lower()))
+    return [word for word in words if word not in STOPWORDS]
+
+
+def term_frequencies(post):
+    counts = Counter(tokenize(post.plain_text))
+    for word in tokenize(post.title):
+        counts[word] += TITLE_WEIGHT
+    # Las etiquetas son términos propios: no se mezclan con las palabras del texto.
+    for slug in parse_keywords(post.keywords):
+        counts[f'#{slug}'] += KEYWORD_WEIGHT
+    return dict(counts.most_common(MAX_TERMS))
+
+
+def signature(terms):
+    return hashlib.md5(json.dumps(terms, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def build_vectors(frequencies):
+    total = len(frequencies)
+    df = Counter(term for terms in frequencies.values() for term in terms)
+    max_df = total * MAX_DF_RATIO if total >= MIN_DF_RATIO_CORPUS else total
+    # Un término de un solo post no relaciona nada.
+    idf = {
+        term: math.log((1 + total) / (1 + count)) + 1
+        for term, count in df.items() if 1 < count <= max_df
+    }
+    vectors = {}
+    for post_id, terms in frequencies.items():
+        weights = {term: (1 + math.log(tf)) * idf[term] for term, tf in terms.items() if term in idf}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        if norm:
+            vectors[post_id] = {term: weight / norm for term, weight in weights.items()}
+    return vectors
+
+
+def build_index(vectors):
+    # Índice invertido término -> [(post, peso)]: el producto de un vector por
+    # la matriz de todos los posts sólo recorre las columnas de sus términos.
+    index = defaultdict(list)
+    for post_id, vector in vectors.items():
+        for term, weight in vector.items():
+            index[term].append((post_id, weight))
+    return index
+
+
+def similarities(post_id, vectors, index):
+    scores = defaultdict(float)
+    for term, weight in vectors[post_id].items():
+        for other_id, other_weight in index[term]:
+            scores[other_id] += weight * other_weight
+    scores.pop(post_id, None)
+    return scores
+
+
+def top_neighbours(scores, size):
+    best = nlargest(size, ((score, -other_id) for other_id, score in scores.items() if score >= MIN_SCORE))
+    return [(-negative_id, score) for score, negative_id in best]
+
+
+def related_posts_size():
+    return getattr(settings, 'BLOG_RELATED_POSTS', 5)
+
+
+def _refresh_vectors(published, full):
+    from .models import Post, PostVector
+
+    stale = published if full else published.filter(
+        Q(vector__isnull=True) | Q(updated_at__gt=F('vector__source_updated_at'))
+    )
+    stale = stale.only('pk', 'title', 'keywords', 'plain_text', 'updated_at').order_by()
+    stored = dict(PostVector.objects.filter(post__in=stale.values('pk')).values_list('post_id', 'signature'))
+
+    changed = set()
+    rows = []
+    for post in stale.iterator(chunk_size=500):
+        terms = term_frequencies(post)
+        digest = signature(terms)
+        if stored.get(post.pk) != digest:
+            changed.add(post.pk)
+        rows.append(PostVector(post_id=post.pk, terms=terms, signature=digest, source_updated_at=post.updated_at))
+    PostVector.objects.bulk_create(
+        rows, batch_size=500, update_conflicts=True,
+        unique_fields=['post'], update_fields=['terms', 'signature', 'source_updated_at'],
+    )
+
+    # Posts borrados, pasados a borrador o despublicados.
+    removed = set(PostVector.objects.exclude(post__in=published.values('pk')).values_list('post_id', flat=True))
+    removed |= set(
+        Post.objects.exclude(pk__in=published.values('pk'))
+        .filter(related_entries__isnull=False).values_list('pk', flat=True).distinct()
+    )
+    return changed, removed
+
+
+def update_related_posts(full=False):
+    from .models import Post, PostVector, RelatedPost
+    from . import cache as page_cache
+
+    size = related_posts_size()
+    published = Post.objects.published()
+    changed, removed = _refresh_vectors(published, full)
+    if not (full or changed or removed):
+        return {'vectors': 0, 'lists': 0}
+
+    frequencies = dict(PostVector.objects.filter(post__in=published.values('pk')).values_list('post_id', 'terms'))
+    vectors = build_vectors(frequencies)
+    index = build_index(vectors)
+
+    current = defaultdict(list)
+    for post_id, related_id, score in RelatedPost.objects.order_by('post', 'rank').values_list('post', 'related', 'score'):
+        current[post_id].append((related_id, score))
+
+    if full:
+        targets = set(frequencies)
+    else:
+        # Listas que incluían un post modificado o eliminado: su puntuación
+        # cambió, así que se recalculan enteras.
+        dirty = changed | removed
+        affected = {post_id for post_id, entries in current.items() if any(other in dirty for other, _ in entries)}
+        targets = (changed | affected) & set(frequencies)
+
+    lists = {}
+    merged = defaultdict(dict)
+    for post_id in targets:
+        if post_id not in vectors:
+            lists[post_id] = []
+            continue
+        scores = similarities(post_id, vectors, index)
+        lists[post_id] = top_neighbours(scores, size)
+        if post_id in changed and not full:
+            # La similitud es simétrica: el resto de los posts sólo puede ganar
+            # a este post como vecino.
+            for other_id, score in scores.items():
+                if other_id not in targets and score >= MIN_SCORE:
+                    merged[other_id][post_id] = score
+
+    for post_id, candidates in merged.items():
+        scores = dict(current.get(post_id, ()))
+        scores.update(candidates)
+        neighbours = top_neighbours(scores, size)
+        if neighbours != current.get(post_id, []):
+            lists[post_id] = neighbours
+
+    lists = {post_id: neighbours for post_id, neighbours in lists.items() if neighbours != current.get(post_id, [])}
+    computed_at = timezone.now()
+    with transaction.atomic():
+        PostVector.objects.filter(post__in=removed).delete()
+        RelatedPost.objects.filter(post__in=removed | set(lists)).delete()
+        RelatedPost.objects.bulk_create([
+            RelatedPost(post_id=post_id, related_id=other_id, rank=rank, score=score, computed_at=computed_at)
+            for post_id, neighbours in lists.items()
+            for rank, (other_id, score) in enumerate(neighbours, start=1)
+        ], batch_size=500)
+
+    if lists:
+        slugs = Post.objects.filter(pk__in=list(lists)).values_list('slug', flat=True)
+        page_cache.purge_related(slugs)
+    return {'vectors': len(changed), 'lists': len(lists)}
+
+
+def related_posts(post, limit=None):
+    from .models import Post
+
+    queryset = (
+        Post.objects.published()
+        .filter(related_to_entries__post=post)
+        .only('title', 'slug', 'excerpt', 'published_date')
+        .order_by('related_to_entries__rank')
+    )
+    return queryset[:limit or related_posts_size()]
@@ -0,0 +1,151 @@
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .database import SAFE_METHODS
+
+
+PRIMARY = 'default'
+PRIMARY_COOKIE = 'blog_primary'
+# Las sesiones se leen siempre de la primaria: tras iniciar sesión, una réplica
+# atrasada devolvería al usuario como anónimo.
+PRIMARY_ONLY_APPS = ('sessions',)
+
+_current = ContextVar('blog_db_routing', default=None)
+
+
+def replica_aliases():
+    return getattr(settings, 'BLOG_DATABASE_REPLICAS', [])
+
+
+def sticky_seconds():
+    return getattr(settings, 'BLOG_REPLICA_STICKY_SECONDS', 10)
+
+
+# Marca una vista de sólo lectura cuyas consultas pueden ir a una réplica; lo
+# leen el router y los tests, como query_budget.
+def replica_reads(view):
+    view.replica_reads = True
+    return view
+
+
+def reads_from_replica(view):
+    view = getattr(view, 'view_class', view)
+    return getattr(view, 'replica_reads', False)
+
+
+class RoutingState:
+
+    def __init__(self, request, primary):
+        self.request = request
+        self.primary = primary
+        self.wrote = False
+        self._replica = None
+
+    def replica(self):
+        # La vista se conoce recién al resolver la URL; hasta entonces (y en las
+        # vistas sin replica_reads) todo va a la primaria. Cada petición usa una
+        # sola réplica para no mezclar datos con distinto retraso.
+        if self.primary:
+            return None
+        if self._replica is None:
+            match = self.request.resolver_match
+            if match is None:
+                return None
+            self._replica = random.choice(replica_aliases()) if reads_from_replica(match.func) else ''
+        return self._replica or None
+
+    def used_replica(self):
+        return bool(self._replica)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if not replica_aliases() or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        state = _current.get()
+        if state is None:
+            return None
+        return state.replica()
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las réplicas se copian de la primaria; no se migran por separado.
+        if db in replica_aliases():
+            return False
+        return None
+
+
+def reading_from_replica():
+    # True si la petición en curso ya leyó de una réplica.
+    state = _current.get()
+    return state is not None and state.used_replica()
+
+
+def pinned_to_primary(request):
+    if request.method not in SAFE_METHODS:
+        return True
+    try:
+        return float(request.COOKIES.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+# Tras una escritura, las lecturas del mismo navegador van a la primaria
+# durante BLOG_REPLICA_STICKY_SECONDS para que el autor vea sus cambios aunque
+# la réplica vaya atrasada. Se guarda en una cookie para no consultar la sesión.
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(request, pinned_to_primary(request))
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        state = RoutingState(request, pinned_to_primary(request))
+        token = _current.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(response, state)
+
+    def finish(self, response, state):
+        if state.wrote:
+            seconds = sticky_seconds()
+            response.set_cookie(
+                PRIMARY_COOKIE, str(int(time.time() + seconds)),
+                max_age=seconds, httponly=True, samesite='Lax',
+            )
+        return response
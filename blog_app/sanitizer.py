@@ -0,0 +1,172 @@
+import math
+import re
+from html.parser import HTMLParser
+
+from django.utils.html import escape
+
+
+EXCERPT_LENGTH = 160
+WORDS_PER_MINUTE = 200
+
+# Etiquetas que puede generar la barra de herramientas de CKEditor (ver CKEDITOR_CONFIGS).
+ALLOWED_TAGS = {
+    'a', 'abbr', 'address', 'b', 'blockquote', 'br', 'caption', 'code', 'div', 'em',
+    'figcaption', 'figure', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li',
+    'ol', 'p', 'pre', 's', 'span', 'strike', 'strong', 'sub', 'sup', 'table', 'tbody',
+    'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    '*': {'style', 'title', 'class', 'dir', 'lang'},
+    'a': {'href', 'target', 'name', 'id'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'ol': {'start', 'type'},
+    'table': {'border', 'cellpadding', 'cellspacing', 'summary'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+ALLOWED_SCHEMES = {'http', 'https', 'mailto'}
+VOID_TAGS = {'br', 'hr', 'img'}
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'noscript', 'template'}
+BLOCK_TAGS = {
+    'address', 'blockquote', 'br', 'caption', 'div', 'figcaption', 'figure', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'hr', 'li', 'ol', 'p', 'pre', 'table', 'td', 'th', 'tr', 'ul',
+}
+
+_SCHEME_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9+.-]*):')
+# Los navegadores ignoran los caracteres de control y los espacios de una URL
+# ("\x01javascript:" o "java\tscript:" se ejecutan igual).
+_URL_IGNORED_RE = re.compile(r'[\x00-\x20\x7f]+')
+_UNSAFE_STYLE_RE = re.compile(r'expression|javascript:|url\s*\(', re.IGNORECASE)
+
+
+def _is_safe_url(value):
+    value = _URL_IGNORED_RE.sub('', value)
+    if value.startswith(('/', '#', '?')):
+        return True
+    match = _SCHEME_RE.match(value)
+    if match is not None:
+        return match.group(1).lower() in ALLOWED_SCHEMES
+    # Sin esquema sólo se aceptan rutas relativas ("imagen.png", "docs/a.html").
+    return ':' not in value.split('/', 1)[0]
+
+
+class _Sanitizer(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.output = []
+        self.open_tags = []
+        self.skip_depth = 0
+
+    def clean_attrs(self, tag, attrs):
+        allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(tag, set())
+        cleaned = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES and not _is_safe_url(value):
+                continue
+            if name == 'style' and _UNSAFE_STYLE_RE.search(value):
+                continue
+            cleaned.append(f' {name}="{escape(value)}"')
+        if tag == 'a' and any(name == 'target' for name, _ in attrs):
+            cleaned.append(' rel="noopener noreferrer"')
+        return ''.join(cleaned)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.skip_depth += 1
+            return
+        if self.skip_depth or tag not in ALLOWED_TAGS:
+            return
+        if tag == 'a':
+            attrs = [(name, value) for name, value in attrs if name != 'rel']
+        self.output.append(f'<{tag}{self.clean_attrs(tag, attrs)}>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if self.skip_depth or tag not in self.open_tags:
+            return
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.output.append(f'</{open_tag}>')
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.output.append(escape(data))
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.output.append(f'</{self.open_tags.pop()}>')
+        return ''.join(self.output)
+
+
+class _TextExtractor(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+    def close(self):
+        super().close()
+        return ' '.join(''.join(self.parts).split())
+
+
+def sanitize_html(value):
+    if not value:
+        return ''
+    parser = _Sanitizer()
+    parser.feed(value)
+    return parser.close()
+
+
+def html_to_text(value):
+    if not value:
+        return ''
+    parser = _TextExtractor()
+    parser.feed(value)
+    return parser.close()
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    if len(text) <= length:
+        return text
+    cut = text[:length - 1]
+    space = cut.rfind(' ')
+    if space > length // 2:
+        cut = cut[:space]
+    return cut.rstrip(' ,;:.-') + '…'
+
+
+def reading_time(text):
+    return max(1, math.ceil(len(text.split()) / WORDS_PER_MINUTE))
@@ -0,0 +1,221 @@
+import re
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, When, Value, IntegerField, TextField, Q
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+
+from .sanitizer import html_to_text
+
+
+FTS_TABLE = 'blog_app_post_fts'
+
+# Marcadores temporales para resaltar coincidencias; se reemplazan por <mark>
+# después de escapar el snippet.
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+SearchHit = namedtuple('SearchHit', ['post_id', 'snippet'])
+
+
+def highlight(snippet):
+    return escape(snippet).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+class BaseSearchBackend:
+
+    def index_post(self, post):
+        raise NotImplementedError
+
+    def remove_post(self, post_id):
+        raise NotImplementedError
+
+    def rename_author(self, user_id, username):
+        # El nombre del autor se indexa con cada post: al renombrarlo cambia
+        # en todos sus posts.
+        from .models import Post
+        for post in Post.objects.filter(author_id=user_id).select_related('author').iterator():
+            self.index_post(post)
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query, queryset=None, limit=None):
+        raise NotImplementedError
+
+    async def asearch(self, query, queryset=None, limit=None):
+        # Los backends consultan con cursores crudos, que no tienen versión async.
+        return await sync_to_async(self.search)(query, queryset=queryset, limit=limit)
+
+    def rebuild(self, posts):
+        self.clear()
+        count = 0
+        for post in posts:
+            self.index_post(post)
+            count += 1
+        return count
+
+    def document_for(self, post):
+        return {
+            'title': post.title or '',
+            'summary': html_to_text(post.summary),
+            'content': post.plain_text or html_to_text(post.content),
+            'author': post.author.username,
+        }
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    # Pesos de bm25 por columna: title, summary, content, author.
+    weights = (10.0, 4.0, 1.0, 2.0)
+    snippet_tokens = 24
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    @staticmethod
+    def create_table(cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, summary, content, author, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    @staticmethod
+    def drop_table(cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+    @staticmethod
+    def build_match(query):
+        tokens = _TOKEN_RE.findall(query or '')
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def index_post(self, post):
+        doc = self.document_for(post)
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, summary, content, author) VALUES (%s, %s, %s, %s, %s)",
+                [post.pk, doc['title'], doc['summary'], doc['content'], doc['author']],
+            )
+
+    def remove_post(self, post_id):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id])
+
+    def rename_author(self, user_id, username):
+        # Una sola sentencia: sólo cambia la columna del autor.
+        from .models import Post
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {FTS_TABLE} SET author = %s WHERE rowid IN (SELECT id FROM {Post._meta.db_table} WHERE author_id = %s)",
+                [username, user_id],
+            )
+
+    def clear(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    def search(self, query, queryset=None, limit=None):
+        match = self.build_match(query)
+        if not match:
+            return []
+
+        weights = ', '.join(str(w) for w in self.weights)
+        sql = (
+            f"SELECT rowid, snippet({FTS_TABLE}, -1, %s, %s, '…', %s) "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rank MATCH %s"
+        )
+        params = [_MARK_START, _MARK_END, self.snippet_tokens, match, f"bm25({weights})"]
+        if queryset is not None:
+            # Restringe el índice a las filas visibles (publicados, fecha <= ahora, etc.).
+            # El "+" evita que FTS5 consuma la restricción y pierda el orden por rank.
+            subquery, sub_params = queryset.order_by().values('pk').query.sql_with_params()
+            sql += f" AND +rowid IN ({subquery})"
+            params.extend(sub_params)
+        sql += " ORDER BY rank"
+        if limit:
+            sql += " LIMIT %s"
+            params.append(limit)
+
+        # La consulta va a la misma base que el queryset (p. ej. una réplica).
+        using = queryset.db if queryset is not None else self.using
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, params)
+            return [SearchHit(row[0], highlight(row[1])) for row in cursor.fetchall()]
+
+
+# Búsqueda sin índice (icontains) para bases de datos sin FTS5.
+class SimpleSearchBackend(BaseSearchBackend):
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def rename_author(self, user_id, username):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, query, queryset=None, limit=None):
+        from .models import Post
+
+        if not query:
+            return []
+        if queryset is None:
+            queryset = Post.objects.all()
+        ids = queryset.filter(
+            Q(title__icontains=query) |
+            Q(summary__icontains=query) |
+            Q(content__icontains=query) |
+            Q(author__username__icontains=query)
+        ).order_by('-published_date').values_list('pk', flat=True)
+        if limit:
+            ids = ids[:limit]
+        return [SearchHit(pk, '') for pk in ids]
+
+
+def get_search_backend():
+    # Sin BLOG_SEARCH_BACKEND se elige según el motor de la base: FTS5 en
+    # SQLite (la tabla la crea la migración 0002) e icontains en el resto.
+    backend_path = getattr(settings, 'BLOG_SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+    if connections['default'].vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    return SimpleSearchBackend()
+
+
+def search_limit():
+    return getattr(settings, 'BLOG_SEARCH_MAX_RESULTS', 200)
+
+
+def _ranked(queryset, hits):
+    # Se pide un resultado más que el límite para saber si hubo más coincidencias.
+    truncated = len(hits) > search_limit()
+    hits = hits[:search_limit()]
+    if not hits:
+        return queryset.none(), truncated
+
+    ranking = Case(*[When(pk=hit.post_id, then=Value(i)) for i, hit in enumerate(hits)], output_field=IntegerField())
+    snippets = Case(*[When(pk=hit.post_id, then=Value(hit.snippet)) for hit in hits], output_field=TextField())
+    return queryset.filter(pk__in=[hit.post_id for hit in hits]).annotate(
+        search_rank=ranking,
+        search_snippet=snippets,
+    ).order_by('search_rank'), truncated
+
+
+# Devuelven los posts del queryset que coinciden, ordenados por relevancia y
+# como mucho BLOG_SEARCH_MAX_RESULTS, y si quedaron coincidencias fuera.
+def search_posts(queryset, query):
+    return _ranked(queryset, get_search_backend().search(query, queryset=queryset, limit=search_limit() + 1))
+
+
+async def asearch_posts(queryset, query):
+    return _ranked(queryset, await get_search_backend().asearch(query, queryset=queryset, limit=search_limit() + 1))
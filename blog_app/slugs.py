@@ -0,0 +1,110 @@
+import re
+
+from django.db import connection
+from django.utils.text import slugify
+
+
+SLUG_BASE_LENGTH = 200
+_SUFFIX_RE = re.compile(r'^(?P<base>.+)-(?P<number>\d+)$')
+
+
+def slug_base(value):
+    return slugify(value)[:SLUG_BASE_LENGTH].strip('-') or 'post'
+
+
+def make_slug(base, number):
+    return base if number == 0 else f'{base}-{number}'
+
+
+def split_slug(slug):
+    match = _SUFFIX_RE.match(slug)
+    if match:
+        return match.group('base'), int(match.group('number'))
+    return slug, 0
+
+
+def slug_taken(slug, exclude_pk=None):
+    from .models import Post
+    return Post.objects.filter(slug=slug).exclude(pk=exclude_pk).exists()
+
+
+def reserve_slug(base):
+    # Un único INSERT ... ON CONFLICT ... RETURNING: el incremento es atómico,
+    # así que dos guardados concurrentes nunca reciben el mismo sufijo.
+    from .models import SlugCounter
+
+    table = SlugCounter._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (base, last) VALUES (%s, 0) "
+            f"ON CONFLICT (base) DO UPDATE SET last = {table}.last + 1 RETURNING last",
+            [base],
+        )
+        return make_slug(base, cursor.fetchone()[0])
+
+
+# SlugCounter guarda, por cada base, el sufijo más alto ya asignado (0 es la
+# base sola). Con él, los slugs libres de todo un lote salen de una lectura de
+# contadores y una comprobación con slug__in, en lugar de probar base-1,
+# base-2, ... con una consulta cada uno. La base sola se prueba siempre
+# primero: un slug pedido explícitamente (importaciones) se respeta si está libre.
+def allocate_slugs(bases):
+    from .models import Post, SlugCounter
+
+    counters = dict(SlugCounter.objects.filter(base__in=set(bases)).values_list('base', 'last'))
+    next_number = {base: number + 1 for base, number in counters.items()}
+    tried = set()
+    slugs = [None] * len(bases)
+    used = set()
+    pending = list(range(len(bases)))
+
+    def take_number(base):
+        number = next_number.get(base, 1)
+        next_number[base] = number + 1
+        return number
+
+    while pending:
+        candidates = {}
+        for i in pending:
+            base = bases[i]
+            if base in tried:
+                candidates[i] = [make_slug(base, take_number(base))]
+            else:
+                tried.add(base)
+                candidates[i] = [base]
+                if base in counters:
+                    # La base ya se usó: se comprueba también el siguiente
+                    # sufijo para no necesitar otra vuelta si está ocupada.
+                    candidates[i].append(make_slug(base, take_number(base)))
+        # Slugs ocupados que el contador no conoce (escritos a mano o de posts
+        # anteriores al contador): se saltan y se prueba el siguiente sufijo.
+        proposed = [slug for options in candidates.values() for slug in options]
+        taken = set(Post.objects.filter(slug__in=proposed).order_by().values_list('slug', flat=True))
+        pending = []
+        for i, options in candidates.items():
+            free = [slug for slug in options if slug not in taken and slug not in used]
+            if not free:
+                pending.append(i)
+                continue
+            slugs[i] = free[0]
+            used.add(free[0])
+
+    # Se registra el sufijo más alto probado, asignado u ocupado.
+    record_slugs({base: next_number.get(base, 1) - 1 for base in tried})
+    return slugs
+
+
+def record_slugs(last):
+    # Upsert que nunca baja un contador (otro proceso pudo avanzarlo).
+    from .models import SlugCounter
+
+    if not last:
+        return
+    table = SlugCounter._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} (base, last) VALUES (%s, %s) "
+            f"ON CONFLICT (base) DO UPDATE SET last = CASE WHEN excluded.last > {table}.last "
+            f"THEN excluded.last ELSE {table}.last END",
+            list(last.items()),
+        )
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache, partial
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from .pagination import CURSOR_PARAM, cursor_pagination_enabled, encode_cursor
+
+
+# Exportación de las páginas públicas (inicio, listado y detalle de los posts
+# publicados) a HTML estático. Cada página tiene una huella calculada con los
+# datos que muestra; al volver a exportar sólo se renderizan las páginas cuya
+# huella cambió y se borran las que ya no existen.
+MANIFEST = 'manifest.json'
+
+
+def _fingerprint(*parts):
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def _page(view, path, filename, fingerprint, query=None, **kwargs):
+    url = f'{path}?{urlencode(query)}' if query else path
+    return {
+        'view': view, 'url': url, 'path': path, 'query': query or {}, 'kwargs': kwargs,
+        'file': filename, 'fingerprint': fingerprint,
+    }
+
+
+def plan_pages():
+    from .models import Post, RelatedPost
+    from .views import HomeView, PostListView
+
+    cursor = cursor_pagination_enabled()
+    # El mismo orden que usa el listado en cada modo de paginación.
+    ordering = ('-published_date', '-pk') if cursor else ('-published_date',)
+    # Además de updated_at, lo que las páginas muestran y cambia sin guardar
+    # el post: el nombre del autor y los anchos de la imagen destacada.
+    rows = list(
+        Post.objects.published().order_by(*ordering)
+        .values_list('pk', 'slug', 'published_date', 'updated_at', 'author__username', 'featured_image_widths')
+    )
+    related = {}
+    for post_id, related_id, updated_at, status, published_date in (
+        RelatedPost.objects.order_by('post', 'rank')
+        .values_list('post', 'related', 'related__updated_at', 'related__status', 'related__published_date')
+    ):
+        related.setdefault(post_id, []).append((related_id, updated_at, status, published_date))
+
+    def listed(chunk):
+        return [(pk, *shown) for pk, _, _, *shown in chunk]
+
+    home = reverse('blog:home')
+    pages = [_page('home', home, 'index.html', _fingerprint(listed(rows[:HomeView.recent_posts_count])))]
+
+    post_list = reverse('blog:post_list')
+    per_page = PostListView.paginate_by
+    chunks = [rows[i:i + per_page] for i in range(0, len(rows), per_page)] or [[]]
+    for number, chunk in enumerate(chunks, start=1):
+        fingerprint = _fingerprint(number, len(chunks), listed(chunk))
+        if number == 1:
+            pages.append(_page('list', post_list, f'{post_list[1:]}index.html', fingerprint))
+        elif cursor:
+            previous = chunks[number - 2][-1]
+            token = encode_cursor(SimpleNamespace(pk=previous[0], published_date=previous[2]), 'next')
+            pages.append(_page('list', post_list, f'{post_list[1:]}cursor/{token}/index.html', fingerprint, {CURSOR_PARAM: token}))
+        else:
+            pages.append(_page('list', post_list, f'{post_list[1:]}page/{number}/index.html', fingerprint, {'page': number}))
+
+    for pk, slug, _, *shown in rows:
+        path = reverse('blog:post_detail', kwargs={'slug': slug})
+        fingerprint = _fingerprint(*shown, related.get(pk, []))
+        pages.append(_page('detail', path, f'{path[1:]}index.html', fingerprint, slug=slug))
+    return pages
+
+
+@cache
+def _views():
+    from . import views
+
+    return {
+        'home': views.HomeView.as_view(),
+        'list': views.PostListView.as_view(),
+        'detail': views.PostDetailView.as_view(count_views=False),
+    }
+
+
+def build_request(page):
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = page['path']
+    request.META.update({
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+        'QUERY_STRING': urlencode(page['query']),
+    })
+    request.GET = QueryDict(request.META['QUERY_STRING'])
+    request.user = AnonymousUser()
+    # El listado vacío agrega un mensaje; se muestra en la misma página.
+    request._messages = CookieStorage(request)
+    request.resolver_match = resolve(page['path'])
+    return request
+
+
+def _write_atomic(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'.{path.name}.tmp')
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+
+def render_page(output, page):
+    response = _views()[page['view']](build_request(page), **page['kwargs'])
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code != 200:
+        # Despublicado mientras se exportaba: se omite.
+        return None
+    content = response.content
+    _write_atomic(Path(output) / page['file'], content)
+    return {
+        'url': page['url'],
+        'file': page['file'],
+        'fingerprint': page['fingerprint'],
+        'content_type': response['Content-Type'],
+        'etag': response.get('ETag'),
+        'last_modified': response.get('Last-Modified'),
+        'size': len(content),
+        'sha256': hashlib.sha256(content).hexdigest(),
+    }
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def load_manifest(output):
+    try:
+        with open(Path(output) / MANIFEST, encoding='utf-8') as f:
+            return json.load(f)['pages']
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def export_site(output, workers=None, full=False):
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    previous = {} if full else load_manifest(output)
+    pages = plan_pages()
+
+    pending = [
+        page for page in pages
+        if previous.get(page['url'], {}).get('fingerprint') != page['fingerprint']
+        or not (output / previous[page['url']]['file']).is_file()
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pending) < 2:
+        rendered = [render_page(output, page) for page in pending]
+    else:
+        # Cada proceso abre sus propias conexiones.
+        connections.close_all()
+        chunksize = max(1, len(pending) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            rendered = list(pool.map(partial(render_page, str(output)), pending, chunksize=chunksize))
+
+    entries = dict(previous)
+    for page, entry in zip(pending, rendered):
+        if entry is not None:
+            entries[page['url']] = entry
+    current = {page['url'] for page in pages}
+    current.difference_update(page['url'] for page, entry in zip(pending, rendered) if entry is None)
+
+    removed = 0
+    for url in [url for url in entries if url not in current]:
+        (output / entries.pop(url)['file']).unlink(missing_ok=True)
+        removed += 1
+
+    manifest = {
+        'generated_at': timezone.now().isoformat(),
+        'pages': dict(sorted(entries.items())),
+    }
+    _write_atomic(output / MANIFEST, json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8'))
+    return {
+        'rendered': sum(entry is not None for entry in rendered),
+        'unchanged': len(pages) - len(pending),
+        'removed': removed,
+    }
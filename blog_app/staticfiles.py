@@ -0,0 +1,171 @@
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .instrumentation import query_budget
+
+try:
+    import brotli
+except ImportError:
+    # Opcional (pip install brotli): sin él sólo se generan las variantes .gz.
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.mjs', '.map', '.svg', '.json', '.xml', '.txt', '.html', '.ico', '.ttf', '.eot')
+# Tamaño mínimo para comprimir: por debajo, la cabecera pesa más que lo ahorrado.
+MIN_COMPRESS_SIZE = 256
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+HASHED_NAME_RE = re.compile(r'^(?P<root>.+)\.[0-9a-f]{12}(?P<ext>\.[^./]*)?$')
+
+_CSS_TOKEN_RE = re.compile(r'''"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*.*?\*/|[^"'/]+|/''', re.S)
+_CSS_SPACE_RE = re.compile(r'\s+')
+_CSS_PUNCTUATION_RE = re.compile(r'\s*([{};,>])\s*')
+
+
+def static_max_age():
+    return getattr(settings, 'BLOG_STATIC_MAX_AGE', 365 * 24 * 60 * 60)
+
+
+def minify_css(css):
+    # Quita comentarios (salvo /*! … */, licencias) y espacios sobrantes sin
+    # tocar las cadenas. El espacio antes de ":" se conserva porque en un
+    # selector ("a :hover") cambia el significado.
+    output = []
+    for token in _CSS_TOKEN_RE.findall(css):
+        if token.startswith('/*'):
+            if token.startswith('/*!'):
+                output.append(token)
+        elif token[0] in '"\'':
+            output.append(token)
+        else:
+            code = _CSS_SPACE_RE.sub(' ', token)
+            code = _CSS_PUNCTUATION_RE.sub(r'\1', code)
+            output.append(code.replace(': ', ':').replace(';}', '}'))
+    return ''.join(output).strip()
+
+
+def compress(content):
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, quality=11)
+    # Sólo se guardan las variantes que efectivamente ocupan menos.
+    return {suffix: data for suffix, data in variants.items() if len(data) < len(content)}
+
+
+class PrecompressedManifestStorage(ManifestStaticFilesStorage):
+    # collectstatic: minifica el CSS, renombra con el hash del contenido
+    # (manifiesto en staticfiles.json) y guarda junto a cada archivo con hash
+    # sus variantes .br y .gz.
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        for name in paths:
+            if name.endswith('.css'):
+                self.minify(name)
+        # Se procesan las copias ya minificadas de STATIC_ROOT, para que el
+        # hash corresponda al contenido servido.
+        paths = {name: (self, name) for name in paths}
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        for name, hashed_name in self.hashed_files.items():
+            if self.compress_file(hashed_name):
+                yield name, hashed_name, True
+
+    def minify(self, name):
+        with self.open(name) as f:
+            css = f.read().decode('utf-8')
+        minified = minify_css(css)
+        if minified != css:
+            self.delete(name)
+            self._save(name, ContentFile(minified.encode('utf-8')))
+
+    def compress_file(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS) or not self.exists(name):
+            return False
+        with self.open(name) as f:
+            content = f.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return False
+        variants = compress(content)
+        for suffix, data in variants.items():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(data))
+        return bool(variants)
+
+
+def accepted_encodings(header):
+    encodings = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            encodings.add(coding.strip().lower())
+    return encodings
+
+
+def is_hashed_name(path):
+    # Sólo los nombres del manifiesto son inmutables: el mismo nombre siempre
+    # tiene el mismo contenido.
+    match = HASHED_NAME_RE.match(path)
+    if match is None:
+        return False
+    original = match['root'] + (match['ext'] or '')
+    return getattr(staticfiles_storage, 'hashed_files', {}).get(original) == path
+
+
+@query_budget(0)
+def serve(request, path):
+    # Sirve los archivos de STATIC_ROOT sin DEBUG. Elige la variante
+    # precomprimida según Accept-Encoding; los archivos con hash se marcan
+    # inmutables y el navegador no vuelve a pedirlos.
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404("El archivo no existe.")
+    if path.endswith(tuple(suffix for _, suffix in ENCODINGS)) or not os.path.isfile(fullpath):
+        raise Http404("El archivo no existe.")
+
+    stat = os.stat(fullpath)
+    # Débil: el mismo ETag vale para las variantes comprimidas.
+    etag = f'W/"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        content_type, _ = mimetypes.guess_type(fullpath)
+        encodings = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        filename, encoding = fullpath, None
+        for coding, suffix in ENCODINGS:
+            if coding in encodings and os.path.isfile(fullpath + suffix):
+                filename, encoding = fullpath + suffix, coding
+                break
+        response = FileResponse(
+            open(filename, 'rb'), filename=os.path.basename(fullpath),
+            content_type=content_type or 'application/octet-stream',
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if is_hashed_name(path):
+        patch_cache_control(response, public=True, max_age=static_max_age(), immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'BLOG_HTTP_MAX_AGE', 60))
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
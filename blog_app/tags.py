@@ -0,0 +1,133 @@
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.text import slugify
+
+
+TAG_NAME_MAX_LENGTH = 50
+
+
+# Post.keywords es texto libre separado por comas; cada palabra clave es una
+# etiqueta identificada por su slug ("Python", " python " y "PYTHON" son la misma).
+def parse_keywords(keywords):
+    tags = {}
+    for raw in (keywords or '').split(','):
+        name = ' '.join(raw.split())[:TAG_NAME_MAX_LENGTH]
+        slug = slugify(name)
+        if slug and slug not in tags:
+            tags[slug] = name
+    return tags
+
+
+def recount_tags(tags, exclude_post=None):
+    # Recalcula post_count (posts visibles: los mismos que lista la página de
+    # la etiqueta) y recount_at (publicación del próximo post programado, que
+    # cambiará el contador) de las etiquetas del queryset, en una consulta.
+    from .models import PostTag
+
+    now = timezone.now()
+    links = PostTag.objects.filter(tag=OuterRef('pk'), post__status='published').order_by()
+    if exclude_post is not None:
+        links = links.exclude(post=exclude_post)
+    visible = links.filter(post__published_date__lte=now).values('tag').annotate(total=Count('pk')).values('total')
+    upcoming = links.filter(post__published_date__gt=now).values('tag').annotate(first=Min('post__published_date')).values('first')
+    return tags.update(post_count=Coalesce(Subquery(visible), 0), recount_at=Subquery(upcoming))
+
+
+def refresh_due_tags():
+    # Etiquetas con posts programados que ya se publicaron.
+    from .models import Tag
+    return recount_tags(Tag.objects.filter(recount_at__lte=timezone.now()))
+
+
+def sync_post_tags(post, previous=None):
+    # Sincroniza las etiquetas con las palabras clave y recalcula post_count
+    # sólo en las etiquetas afectadas.
+    from .models import PostTag, Tag
+
+    states = [(post.status, post.published_date)]
+    if previous is not None:
+        states.append((previous['status'], previous['published_date']))
+        if previous['keywords'] == post.keywords and states[0] == states[1]:
+            return
+
+    wanted = parse_keywords(post.keywords)
+    current = {}
+    if previous is not None:
+        current = dict(PostTag.objects.filter(post=post).values_list('tag__slug', 'tag_id'))
+
+    added = []
+    missing = [slug for slug in wanted if slug not in current]
+    if missing:
+        Tag.objects.bulk_create([Tag(slug=slug, name=wanted[slug]) for slug in missing], ignore_conflicts=True)
+        added = list(Tag.objects.filter(slug__in=missing).order_by().values_list('pk', flat=True))
+        PostTag.objects.bulk_create([PostTag(post=post, tag_id=tag_id) for tag_id in added], ignore_conflicts=True)
+
+    removed = [tag_id for slug, tag_id in current.items() if slug not in wanted]
+    if removed:
+        PostTag.objects.filter(post=post, tag_id__in=removed).delete()
+
+    # Los borradores no cuentan en ninguna etiqueta.
+    if all(status != 'published' for status, _ in states):
+        return
+    changed = added + removed
+    if len(states) == 2 and states[0] != states[1]:
+        changed += [tag_id for slug, tag_id in current.items() if slug in wanted]
+    if changed:
+        recount_tags(Tag.objects.filter(pk__in=changed))
+
+
+def tag_new_posts(posts):
+    # Equivalente por lotes de sync_post_tags para posts creados con bulk_create.
+    from .models import PostTag, Tag
+
+    names = {}
+    links = []
+    counted = set()
+    for post in posts:
+        for slug, name in parse_keywords(post.keywords).items():
+            names.setdefault(slug, name)
+            links.append((post.pk, slug))
+            if post.status == 'published':
+                counted.add(slug)
+    if not links:
+        return
+
+    Tag.objects.bulk_create([Tag(slug=slug, name=name) for slug, name in names.items()], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.filter(slug__in=names).order_by().values_list('slug', 'pk'))
+    PostTag.objects.bulk_create([PostTag(post_id=post_id, tag_id=tag_ids[slug]) for post_id, slug in links])
+    if counted:
+        recount_tags(Tag.objects.filter(pk__in=[tag_ids[slug] for slug in counted]))
+
+
+def release_post_tags(post):
+    # Antes de borrar el post, mientras todavía existen sus filas en PostTag.
+    from .models import Tag
+    if post.status == 'published':
+        recount_tags(Tag.objects.filter(post_tags__post=post), exclude_post=post.pk)
+
+
+def rebuild_tags(batch_size=1000):
+    # Reconstruye etiquetas y contadores desde cero, para cargas masivas que
+    # no pasan por Post.save() (bulk_create, importaciones).
+    from django.db import transaction
+    from .models import Post, PostTag, Tag
+
+    names = {}
+    links = []
+    posts = Post.objects.exclude(keywords__isnull=True).exclude(keywords='').values_list('pk', 'keywords')
+    for post_id, keywords in posts.iterator(chunk_size=batch_size):
+        for slug, name in parse_keywords(keywords).items():
+            names.setdefault(slug, name)
+            links.append((post_id, slug))
+
+    with transaction.atomic():
+        PostTag.objects.all().delete()
+        Tag.objects.bulk_create([Tag(slug=slug, name=name) for slug, name in names.items()], batch_size=batch_size, ignore_conflicts=True)
+        tag_ids = dict(Tag.objects.values_list('slug', 'pk'))
+        PostTag.objects.bulk_create(
+            [PostTag(post_id=post_id, tag_id=tag_ids[slug]) for post_id, slug in links],
+            batch_size=batch_size,
+        )
+        recount_tags(Tag.objects.all())
+    return len(links)
@@ -0,0 +1,43 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from blog_app.images import derivative_name
+
+
+register = template.Library()
+
+
+def _srcset(name, widths, webp=False):
+    return ', '.join(
+        f"{default_storage.url(derivative_name(name, width, webp=webp))} {width}w"
+        for width in widths
+    )
+
+
+@register.simple_tag
+def responsive_image(image, sizes, widths=None, alt='', css_class='', style='', loading='lazy', default_url=''):
+    # widths: anchos de los derivados guardados al generarlos (ej.
+    # post.featured_image_widths); sin ellos se muestra sólo el original.
+    name = getattr(image, 'name', image)
+    if not name:
+        if not default_url:
+            return ''
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" style="{}" loading="{}">',
+            default_url, alt, css_class, style, loading,
+        )
+    src = default_storage.url(name)
+    if not widths:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" style="{}" loading="{}">',
+            src, alt, css_class, style, loading,
+        )
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" style="{}" loading="{}">'
+        '</picture>',
+        _srcset(name, widths, webp=True), sizes,
+        src, _srcset(name, widths), sizes, alt, css_class, style, loading,
+    )
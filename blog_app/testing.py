@@ -0,0 +1,28 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from urllib.parse import urlsplit
+
+from .instrumentation import get_query_budget
+
+
+class QueryBudgetMixin:
+    """Mixin para TestCase: falla si una vista supera su `query_budget`."""
+
+    def assertWithinQueryBudget(self, url, method='get', data=None, status_code=None, **extra):
+        match = resolve(urlsplit(url).path)
+        budget = get_query_budget(match.func)
+        self.assertIsNotNone(budget, f"La vista {match.view_name} no declara query_budget.")
+
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(self.client, method)(url, data, **extra)
+        if status_code is not None:
+            self.assertEqual(response.status_code, status_code)
+
+        if len(captured) > budget:
+            queries = '\n'.join(f"  {query['sql']}" for query in captured.captured_queries)
+            self.fail(
+                f"{match.view_name} ejecutó {len(captured)} consultas SQL "
+                f"(presupuesto: {budget}) en {method.upper()} {url}:\n{queries}"
+            )
+        return response
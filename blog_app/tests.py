@@ -1,3 +1,1999 @@
-from django.test import TestCase
+import asyncio
+import base64
+import datetime
+import gzip
+import importlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, clear_url_caches, get_resolver, resolve, reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+
+from . import cache as page_cache, counters, feeds, profiling, staticfiles
+from .instrumentation import get_query_budget, reset_stats
+from .routers import PRIMARY_COOKIE
+from .sanitizer import html_to_text, make_excerpt, reading_time, sanitize_html
+from .models import FeedArtifact, PopularPost, Post, PostTag, PostVector, PostViewBucket, RelatedPost, SlugCounter, Tag
+from .related import update_related_posts
+from .search import SimpleSearchBackend, SQLiteFTSBackend, get_search_backend, search_posts
+from .database import retry_on_locked
+from .forms import PostForm
+from .pagination import decode_cursor, encode_cursor
+from .slugs import allocate_slugs
+from .tags import parse_keywords, rebuild_tags
+from .testing import QueryBudgetMixin
+
+
+def tearDownModule():
+    # Las lecturas que dejan las vistas de detalle no se vuelcan al salir,
+    # cuando la base de prueba ya no existe.
+    counters.clear_buffer()
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class QueryPlanTests(TestCase):
+    # Consultas que ordenan un conjunto acotado de resultados de búsqueda
+    # (como máximo BLOG_SEARCH_MAX_RESULTS filas) por su ranking.
+    bounded_sort_markers = ('search_rank',)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        cls.other = User.objects.create_user('otro', 'otro@example.com', 'clave-segura-123')
+        now = timezone.now()
+        for i in range(30):
+            Post.objects.create(
+                title=f"Post de prueba {i}",
+                author=cls.author if i % 2 else cls.other,
+                summary="<p>Resumen</p>",
+                content="<p>Contenido sobre <b>python</b></p>",
+                status='draft' if i % 5 == 0 else 'published',
+                published_date=now - datetime.timedelta(days=i) if i % 7 else now + datetime.timedelta(days=i),
+                keywords='python' if i % 3 else 'python, django',
+            )
+        cls.post = Post.objects.filter(status='published', published_date__lte=now).first()
+
+    def setUp(self):
+        caches['pages'].clear()
+
+    def assertIndexedPlans(self, captured):
+        self.assertTrue(captured.captured_queries)
+        for query in captured.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            for step in explain(sql):
+                if 'VIRTUAL TABLE' in step:
+                    continue
+                if step.startswith('SCAN ') and ' USING ' not in step:
+                    self.fail(f"Full scan ({step}) en: {sql}")
+                if 'TEMP B-TREE' in step and not any(marker in sql for marker in self.bounded_sort_markers):
+                    self.fail(f"Ordenamiento temporal ({step}) en: {sql}")
+
+    def get_plans(self, url, user=None):
+        if user is not None:
+            self.client.force_login(user)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return captured
+
+    def test_home(self):
+        self.assertIndexedPlans(self.get_plans(reverse('blog:home')))
+
+    def test_post_list(self):
+        self.assertIndexedPlans(self.get_plans(reverse('blog:post_list')))
+
+    def test_post_list_deep_page(self):
+        self.assertIndexedPlans(self.get_plans(reverse('blog:post_list') + '?page=3'))
+
+    def test_post_list_search(self):
+        self.assertIndexedPlans(self.get_plans(reverse('blog:post_list') + '?q=python'))
+
+    @override_settings(BLOG_CURSOR_PAGINATION=True)
+    def test_post_list_cursor(self):
+        response = self.client.get(reverse('blog:post_list'))
+        cursor = response.context['page_obj'].next_cursor
+        self.assertIndexedPlans(self.get_plans(reverse('blog:post_list') + f'?cursor={cursor}'))
+
+    def test_tag_pages(self):
+        self.assertIndexedPlans(self.get_plans(reverse('blog:tag_list')))
+        url = reverse('blog:tag_detail', kwargs={'slug': 'django'})
+        response = self.client.get(url)
+        cursor = response.context['page_obj'].next_cursor
+        self.assertIndexedPlans(self.get_plans(url + f'?cursor={cursor}'))
+
+    def test_post_detail_anonymous(self):
+        self.assertIndexedPlans(self.get_plans(self.post.get_absolute_url()))
+
+    def test_post_detail_related_posts(self):
+        update_related_posts()
+        captured = self.get_plans(self.post.get_absolute_url())
+        self.assertTrue(any('blog_app_relatedpost' in query['sql'] for query in captured.captured_queries))
+        self.assertIndexedPlans(captured)
+
+    def test_post_detail_author(self):
+        self.assertIndexedPlans(self.get_plans(self.post.get_absolute_url(), user=self.post.author))
+
+    def test_post_update(self):
+        url = reverse('blog:post_update', kwargs={'slug': self.post.slug})
+        self.assertIndexedPlans(self.get_plans(url, user=self.post.author))
+
+    def test_profile_self(self):
+        self.assertIndexedPlans(self.get_plans(reverse('accounts:profile_view_self'), user=self.author))
+
+    def test_profile_other_user(self):
+        url = reverse('accounts:profile_view_user', kwargs={'username': self.other.username})
+        self.assertIndexedPlans(self.get_plans(url, user=self.author))
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    password = 'clave-segura-123'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', cls.password)
+        cls.other = User.objects.create_user('otro', 'otro@example.com', cls.password)
+        now = timezone.now()
+        for i in range(12):
+            Post.objects.create(
+                title=f"Post de prueba {i}",
+                author=cls.author if i % 2 else cls.other,
+                summary="<p>Resumen</p>",
+                content="<p>Contenido sobre <b>python</b></p>",
+                status='published',
+                published_date=now - datetime.timedelta(days=i),
+                keywords="python, django",
+            )
+        cls.post = Post.objects.filter(author=cls.author).first()
+
+    def setUp(self):
+        caches['pages'].clear()
+
+    def test_every_view_declares_a_budget(self):
+        missing = []
+        for namespace in ('blog', 'accounts'):
+            resolver = get_resolver().namespace_dict[namespace][1]
+            for pattern in resolver.url_patterns:
+                if isinstance(pattern, URLPattern) and get_query_budget(pattern.callback) is None:
+                    missing.append(f'{namespace}:{pattern.name}')
+        self.assertEqual(missing, [])
+
+    def test_public_views(self):
+        for user in (None, self.author):
+            if user:
+                self.client.force_login(user)
+            with self.subTest(user=user):
+                self.assertWithinQueryBudget(reverse('blog:home'), status_code=200)
+                self.assertWithinQueryBudget(reverse('blog:about'), status_code=200)
+                self.assertWithinQueryBudget(reverse('blog:post_list'), status_code=200)
+                self.assertWithinQueryBudget(reverse('blog:post_list') + '?page=2', status_code=200)
+                self.assertWithinQueryBudget(reverse('blog:post_list') + '?q=python', status_code=200)
+                self.assertWithinQueryBudget(self.post.get_absolute_url(), status_code=200)
+                self.assertWithinQueryBudget(reverse('blog:popular_posts'), status_code=200)
+                self.assertWithinQueryBudget(reverse('blog:tag_list'), status_code=200)
+                self.assertWithinQueryBudget(reverse('blog:tag_detail', kwargs={'slug': 'python'}), status_code=200)
+                self.assertWithinQueryBudget(reverse('blog:feed_atom'), status_code=200)
+                self.assertWithinQueryBudget(reverse('blog:author_feed_rss', kwargs={'username': 'autor'}), status_code=200)
+                self.assertWithinQueryBudget(reverse('blog:sitemap'), status_code=200)
+                self.assertWithinQueryBudget(reverse('blog:sitemap_page', kwargs={'page': 1}), status_code=200)
+
+    def test_author_views(self):
+        self.client.force_login(self.author)
+        self.assertWithinQueryBudget(reverse('blog:post_create'), status_code=200)
+        self.assertWithinQueryBudget(reverse('blog:post_update', kwargs={'slug': self.post.slug}), status_code=200)
+        self.assertWithinQueryBudget(reverse('blog:post_delete', kwargs={'slug': self.post.slug}), status_code=200)
+
+    def test_author_writes(self):
+        self.client.force_login(self.author)
+        data = {
+            'title': "Un post nuevo",
+            'summary': "<p>Resumen</p>",
+            'content': "<p>Contenido</p>",
+            'status': 'published',
+            'published_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+            'keywords': 'python',
+        }
+        self.assertWithinQueryBudget(reverse('blog:post_create'), 'post', data, status_code=302)
+        post = Post.objects.get(title="Un post nuevo")
+        data['title'] = "Un post editado"
+        url = reverse('blog:post_update', kwargs={'slug': post.slug})
+        self.assertWithinQueryBudget(url, 'post', data, status_code=302)
+        post.refresh_from_db()
+        self.assertWithinQueryBudget(reverse('blog:post_delete', kwargs={'slug': post.slug}), 'post', status_code=302)
+
+
+
+class SanitizerTests(SimpleTestCase):
+
+    def test_drops_scripts_and_styles_with_their_content(self):
+        html = '<p>Hola</p><script>alert(1)</script><style>p{color:red}</style><SCRIPT>x()</SCRIPT>'
+        self.assertEqual(sanitize_html(html), '<p>Hola</p>')
+
+    def test_drops_event_handlers_and_unknown_attributes(self):
+        html = '<p onclick="alert(1)" class="intro"><img src="a.png" onerror="alert(1)" ONLOAD="x()"></p>'
+        self.assertEqual(sanitize_html(html), '<p class="intro"><img src="a.png"></p>')
+
+    def test_drops_javascript_urls(self):
+        for href in (
+            'javascript:alert(1)',
+            'JaVaScRiPt:alert(1)',
+            '\x01javascript:alert(1)',
+            '\x00 \x1fjavascript:alert(1)',
+            'java\tscript:alert(1)',
+            '&#106;avascript:alert(1)',
+            '&#x6A;avascript&colon;alert(1)',
+            'vbscript:msgbox(1)',
+            'data:text/html;base64,PHNjcmlwdD4=',
+        ):
+            with self.subTest(href=href):
+                self.assertEqual(sanitize_html(f'<a href="{href}">x</a>'), '<a>x</a>')
+
+    def test_keeps_safe_urls(self):
+        for href in ('https://example.com/a?b=1&amp;c=2', 'mailto:autor@example.com', '/post/uno/', '#nota', 'imagen.png'):
+            with self.subTest(href=href):
+                self.assertIn('href=', sanitize_html(f'<a href="{href}">x</a>'))
+
+    def test_escapes_text_and_attribute_values(self):
+        self.assertEqual(
+            sanitize_html('<p title="&quot;&gt;&lt;script&gt;">1 &lt; 2 &amp; &lt;b&gt;</p>'),
+            '<p title="&quot;&gt;&lt;script&gt;">1 &lt; 2 &amp; &lt;b&gt;</p>',
+        )
+
+    def test_closes_unclosed_tags(self):
+        self.assertEqual(sanitize_html('<p><b>negrita<i>cursiva'), '<p><b>negrita<i>cursiva</i></b></p>')
+        self.assertEqual(sanitize_html('<ul><li>uno</ul>dos</b>'), '<ul><li>uno</li></ul>dos')
+        self.assertEqual(sanitize_html('<p>antes<script>alert(1)'), '<p>antes</p>')
+
+    def test_target_links_get_rel(self):
+        self.assertEqual(
+            sanitize_html('<a href="https://example.com" target="_blank" rel="opener">x</a>'),
+            '<a href="https://example.com" target="_blank" rel="noopener noreferrer">x</a>',
+        )
+
+    def test_unsafe_styles_are_dropped(self):
+        self.assertEqual(sanitize_html('<p style="background: url(x.png)">x</p>'), '<p>x</p>')
+        self.assertEqual(sanitize_html('<p style="color: red">x</p>'), '<p style="color: red">x</p>')
+
+    def test_html_to_text(self):
+        self.assertEqual(html_to_text('<h1>Título</h1><p>Uno&nbsp;y <b>dos</b></p><script>x</script>'), 'Título Uno y dos')
+
+    def test_make_excerpt(self):
+        self.assertEqual(make_excerpt("Texto corto"), "Texto corto")
+        text = "palabra " * 40
+        excerpt = make_excerpt(text, length=50)
+        self.assertLessEqual(len(excerpt), 50)
+        self.assertTrue(excerpt.endswith('palabra…'))
+        # Sin espacios cerca del corte se corta la palabra.
+        self.assertEqual(make_excerpt('x' * 30, length=10), 'x' * 9 + '…')
+
+    def test_reading_time(self):
+        self.assertEqual(reading_time(''), 1)
+        self.assertEqual(reading_time('palabra ' * 200), 1)
+        self.assertEqual(reading_time('palabra ' * 201), 2)
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+
+    def create_post(self, title, content="<p>Texto</p>", **kwargs):
+        return Post.objects.create(title=title, author=self.author, content=content, status='published', **kwargs)
+
+    def search(self, query):
+        posts, truncated = search_posts(Post.objects.published(), query)
+        return [post.title for post in posts], truncated
+
+    def test_default_backend_follows_database_vendor(self):
+        with override_settings(BLOG_SEARCH_BACKEND=None):
+            self.assertIsInstance(get_search_backend(), SQLiteFTSBackend)
+            with mock.patch.object(connections['default'], 'vendor', 'postgresql'):
+                self.assertIsInstance(get_search_backend(), SimpleSearchBackend)
+        with override_settings(BLOG_SEARCH_BACKEND='blog_app.search.SimpleSearchBackend'):
+            self.assertIsInstance(get_search_backend(), SimpleSearchBackend)
+
+    def test_renamed_author_is_searchable(self):
+        self.create_post("Notas de viaje")
+        self.author.username = 'viajera'
+        self.author.save()
+        self.assertEqual(self.search('viajera'), (["Notas de viaje"], False))
+        self.assertEqual(self.search('autor'), ([], False))
+
+    def test_title_matches_rank_first(self):
+        self.create_post("Recetas de cocina", "<p>Un poco de python al final</p>")
+        self.create_post("Python para principiantes", "<p>Variables y funciones</p>")
+        self.create_post("Sin coincidencias")
+        self.assertEqual(self.search('python'), (["Python para principiantes", "Recetas de cocina"], False))
+
+    def test_prefixes_accents_and_snippets(self):
+        self.create_post("Café", "<p>Un café con <b>programación</b> &lt;script&gt;</p>")
+        titles, _ = self.search('cafe progra')
+        self.assertEqual(titles, ["Café"])
+        post = search_posts(Post.objects.published(), 'programacion')[0].get()
+        self.assertIn('<mark>programación</mark>', post.search_snippet)
+        self.assertIn('&lt;script&gt;', post.search_snippet)
+
+    def test_index_follows_saves_and_deletes(self):
+        post = self.create_post("Título viejo")
+        self.assertEqual(self.search('viejo')[0], ["Título viejo"])
+        post.title = "Título nuevo"
+        post.save()
+        self.assertEqual(self.search('viejo')[0], [])
+        self.assertEqual(self.search('nuevo')[0], ["Título nuevo"])
+        post.status = 'draft'
+        post.save()
+        self.assertEqual(self.search('nuevo')[0], [])
+        post.delete()
+        self.assertEqual(get_search_backend().search('nuevo'), [])
+
+    @override_settings(BLOG_SEARCH_MAX_RESULTS=2)
+    def test_truncated_results_are_reported(self):
+        for i in range(3):
+            self.create_post(f"Python {i}")
+        titles, truncated = self.search('python')
+        self.assertEqual(len(titles), 2)
+        self.assertTrue(truncated)
+        response = self.client.get(reverse('blog:post_list') + '?q=python')
+        self.assertContains(response, "Se muestran sólo los 2 resultados más relevantes")
+        self.assertNotContains(self.client.get(reverse('blog:post_list') + '?q=python+2'), "Se muestran sólo")
+
+
+class PostObjectResolutionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        cls.other = User.objects.create_user('otro', 'otro@example.com', 'clave-segura-123')
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'clave-segura-123', is_staff=True)
+        cls.draft = Post.objects.create(
+            title="Borrador", author=cls.author, summary="<p>Resumen</p>",
+            content="<p>Contenido</p>", status='draft',
+        )
+
+    def setUp(self):
+        caches['pages'].clear()
+
+    def post_lookups(self, captured):
+        return [
+            query['sql'] for query in captured.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "blog_app_post"' in query['sql']
+        ]
+
+    def test_update_and_delete_fetch_the_post_once(self):
+        self.client.force_login(self.author)
+        for name in ('blog:post_update', 'blog:post_delete'):
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get(reverse(name, kwargs={'slug': self.draft.slug}))
+            self.assertEqual(response.status_code, 200)
+            lookups = self.post_lookups(captured)
+            self.assertEqual(len(lookups), 1, name)
+            self.assertIn('INNER JOIN "auth_user"', lookups[0])
+
+    def test_non_author_is_redirected(self):
+        self.client.force_login(self.other)
+        response = self.client.get(reverse('blog:post_update', kwargs={'slug': self.draft.slug}))
+        self.assertRedirects(response, self.draft.get_absolute_url(), fetch_redirect_response=False)
+
+    def test_draft_visibility(self):
+        url = self.draft.get_absolute_url()
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        for user in (self.author, self.staff):
+            self.client.force_login(user)
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class TagTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+
+    def setUp(self):
+        caches['pages'].clear()
+
+    def create_post(self, title, keywords, status='published', **kwargs):
+        return Post.objects.create(
+            title=title, author=self.author, summary="<p>Resumen</p>", content="<p>Contenido</p>",
+            status=status, keywords=keywords, **kwargs,
+        )
+
+    def counts(self):
+        return dict(Tag.objects.values_list('slug', 'post_count'))
+
+    def test_parse_keywords(self):
+        self.assertEqual(
+            parse_keywords(" Python ,django,  PYTHON, , Machine   Learning,"),
+            {'python': 'Python', 'django': 'django', 'machine-learning': 'Machine Learning'},
+        )
+        self.assertEqual(parse_keywords(None), {})
+
+    def test_counts_follow_keywords_and_status(self):
+        post = self.create_post("Uno", "python, django")
+        self.create_post("Dos", "python")
+        self.create_post("Borrador", "python, rust", status='draft')
+        self.assertEqual(self.counts(), {'python': 2, 'django': 1, 'rust': 0})
+        self.assertEqual(Post.objects.filter(tags__slug='python').count(), 3)
+
+        post.keywords = "python, sqlite"
+        post.save()
+        self.assertEqual(self.counts(), {'python': 2, 'django': 0, 'rust': 0, 'sqlite': 1})
+        self.assertEqual(set(post.tags.values_list('slug', flat=True)), {'python', 'sqlite'})
+
+        post.status = 'draft'
+        post.save()
+        self.assertEqual(self.counts()['python'], 1)
+        self.assertEqual(self.counts()['sqlite'], 0)
+
+        Post.objects.get(title="Dos").delete()
+        self.assertEqual(self.counts()['python'], 0)
+
+    def test_scheduled_posts_count_once_visible(self):
+        now = timezone.now()
+        self.create_post("Visible", "python")
+        scheduled = self.create_post("Programado", "python, rust", published_date=now + datetime.timedelta(hours=1))
+        self.assertEqual(self.counts(), {'python': 1, 'rust': 0})
+        response = self.client.get(reverse('blog:tag_list'))
+        self.assertEqual([tag.slug for tag in response.context['tags']], ['python'])
+
+        # Llega la fecha de publicación sin que se guarde el post.
+        with mock.patch('django.utils.timezone.now', return_value=now + datetime.timedelta(hours=2)):
+            self.assertEqual(self.client.get(reverse('blog:tag_list')).status_code, 200)
+        self.assertEqual(self.counts(), {'python': 2, 'rust': 1})
+        self.assertFalse(Tag.objects.filter(recount_at__isnull=False).exists())
+
+        scheduled.published_date = now + datetime.timedelta(days=1)
+        scheduled.save()
+        self.assertEqual(self.counts(), {'python': 1, 'rust': 0})
+        scheduled.delete()
+        self.assertEqual(self.counts(), {'python': 1, 'rust': 0})
+
+        self.create_post("Otro programado", "python", published_date=now + datetime.timedelta(hours=3))
+        Tag.objects.update(post_count=0, recount_at=None)
+        rebuild_tags()
+        self.assertEqual(self.counts(), {'python': 1, 'rust': 0})
+        self.assertIsNotNone(Tag.objects.get(slug='python').recount_at)
+
+    def test_unchanged_keywords_skip_tag_queries(self):
+        post = self.create_post("Uno", "python")
+        post.title = "Uno editado"
+        with CaptureQueriesContext(connection) as captured:
+            post.save()
+        self.assertFalse([q for q in captured.captured_queries if 'blog_app_tag' in q['sql']])
+
+    def test_tag_page_uses_keyset_pagination(self):
+        now = timezone.now()
+        for i in range(7):
+            self.create_post(f"Post {i}", "python", published_date=now - datetime.timedelta(days=i))
+        self.create_post("Programado", "python", published_date=now + datetime.timedelta(days=1))
+        self.create_post("Otro tema", "rust")
+
+        url = reverse('blog:tag_detail', kwargs={'slug': 'python'})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p.title for p in response.context['posts']], [f"Post {i}" for i in range(5)])
+        cursor = response.context['page_obj'].next_cursor
+        response = self.client.get(f'{url}?cursor={cursor}')
+        self.assertEqual([p.title for p in response.context['posts']], ["Post 5", "Post 6"])
+        self.assertFalse(response.context['page_obj'].has_next())
+
+        self.assertEqual(self.client.get(reverse('blog:tag_detail', kwargs={'slug': 'nada'})).status_code, 404)
+        response = self.client.get(reverse('blog:tag_list'))
+        self.assertEqual([tag.slug for tag in response.context['tags']], ['python', 'rust'])
+
+    def test_migration_builds_tags_from_keywords(self):
+        from django.apps import apps
+        migration = importlib.import_module('blog_app.migrations.0007_post_tags')
+
+        self.create_post("Uno", "Python, Django")
+        self.create_post("Borrador", "python", status='draft')
+        Tag.objects.all().delete()
+        migration.create_tags_from_keywords(apps, None)
+        self.assertEqual(self.counts(), {'python': 1, 'django': 1})
+        self.assertEqual(PostTag.objects.count(), 3)
+
+
+@override_settings(BLOG_CURSOR_PAGINATION=True)
+class CursorPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        now = timezone.now()
+        for i in range(8):
+            Post.objects.create(
+                title=f"Post {i}", author=cls.author, content="<p>Texto sobre python</p>", status='published',
+                # Dos posts con la misma fecha: el id desempata.
+                published_date=now - datetime.timedelta(days=i // 2 * 2 if i < 2 else i),
+            )
+        Post.objects.create(title="Programado", author=cls.author, content="<p>python</p>", status='published',
+                            published_date=now + datetime.timedelta(days=1))
+        Post.objects.create(title="Python, el mejor", author=cls.author, content="<p>python python</p>",
+                            status='published', published_date=now - datetime.timedelta(days=30))
+
+    def titles(self, response):
+        return [post.title for post in response.context['posts']]
+
+    def test_cursor_round_trip(self):
+        post = Post.objects.get(title="Post 3")
+        self.assertEqual(decode_cursor(encode_cursor(post, 'next')), (post.published_date, post.pk, 'next'))
+
+    def test_pages_forward_and_back(self):
+        url = reverse('blog:post_list')
+        first = self.client.get(url)
+        self.assertEqual(self.titles(first), ["Post 1", "Post 0", "Post 2", "Post 3", "Post 4"])
+        second = self.client.get(f"{url}?cursor={first.context['page_obj'].next_cursor}")
+        self.assertEqual(self.titles(second), ["Post 5", "Post 6", "Post 7", "Python, el mejor"])
+        self.assertFalse(second.context['page_obj'].has_next())
+        back = self.client.get(f"{url}?cursor={second.context['page_obj'].previous_cursor}")
+        self.assertEqual(self.titles(back), self.titles(first))
+
+    def test_malformed_cursors_are_404(self):
+        def token(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+        for cursor in (
+            'no-es-un-cursor', '%%%', token([1, 2]), token({'d': 'ayer', 'i': 1, 'r': 'next'}),
+            token({'d': '2024-01-01T00:00:00', 'i': 'x', 'r': 'next'}),
+            token({'d': '2024-01-01T00:00:00', 'i': 1, 'r': 'sideways'}),
+            token({'d': '2024-01-01T00:00:00', 'i': 1}),
+        ):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(reverse('blog:post_list'), {'cursor': cursor}).status_code, 404)
+
+    def test_tampered_cursor_does_not_reveal_hidden_posts(self):
+        payload = {'d': (timezone.now() + datetime.timedelta(days=365)).isoformat(), 'i': 10 ** 6, 'r': 'next'}
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+        response = self.client.get(reverse('blog:post_list'), {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Programado", self.titles(response))
+
+    def test_search_keeps_relevance_order_with_page_numbers(self):
+        response = self.client.get(reverse('blog:post_list'), {'q': 'python'})
+        self.assertEqual(self.titles(response)[0], "Python, el mejor")
+        self.assertFalse(response.context['cursor_pagination'])
+        self.assertContains(response, '?page=2&q=python')
+        response = self.client.get(reverse('blog:post_list'), {'q': 'python', 'page': 2})
+        self.assertEqual(len(response.context['posts']), 4)
+        self.assertNotIn("Python, el mejor", self.titles(response))
+
+
+class RelatedPostsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        topics = {
+            'django': ("Vistas en Django", "<p>Django vistas plantillas modelos consultas python servidor</p>", "python, django"),
+            'orm': ("El ORM de Django", "<p>Django modelos consultas índices python migraciones</p>", "python, django"),
+            'flask': ("Rutas en Flask", "<p>Flask rutas plantillas python servidor</p>", "python"),
+            'pan': ("Pan casero", "<p>Harina levadura horno masa receta</p>", "cocina"),
+            'pizza': ("Pizza al horno", "<p>Harina levadura horno masa tomate receta</p>", "cocina"),
+        }
+        cls.posts = {
+            key: Post.objects.create(
+                title=title, author=cls.author, summary="", content=content, keywords=keywords, status='published',
+            )
+            for key, (title, content, keywords) in topics.items()
+        }
+
+    def setUp(self):
+        caches['pages'].clear()
+
+    def related_ids(self, key):
+        return list(RelatedPost.objects.filter(post=self.posts[key]).values_list('related_id', flat=True))
+
+    def test_neighbours_by_topic(self):
+        update_related_posts()
+        self.assertEqual(self.related_ids('django')[0], self.posts['orm'].pk)
+        self.assertEqual(set(self.related_ids('django')), {self.posts['orm'].pk, self.posts['flask'].pk})
+        self.assertEqual(self.related_ids('pan'), [self.posts['pizza'].pk])
+
+    def test_only_changed_posts_are_recomputed(self):
+        update_related_posts()
+        self.assertEqual(update_related_posts(), {'vectors': 0, 'lists': 0})
+
+        flask = self.posts['flask']
+        flask.meta_description = "Sin efecto en el texto"
+        flask.save()
+        self.assertEqual(update_related_posts()['vectors'], 0)
+
+        flask.content = "<p>Horno harina masa receta levadura</p>"
+        flask.keywords = "cocina"
+        flask.save()
+        stats = update_related_posts()
+        self.assertEqual(stats['vectors'], 1)
+        self.assertIn(flask.pk, self.related_ids('pan'))
+        self.assertNotIn(flask.pk, self.related_ids('django'))
+
+        # El resultado incremental coincide con un recálculo completo.
+        incremental = list(RelatedPost.objects.values_list('post', 'related', 'rank'))
+        update_related_posts(full=True)
+        self.assertEqual(list(RelatedPost.objects.values_list('post', 'related', 'rank')), incremental)
+
+    def test_unpublished_posts_are_dropped(self):
+        update_related_posts()
+        orm = self.posts['orm']
+        orm.status = 'draft'
+        orm.save()
+        update_related_posts()
+        self.assertFalse(PostVector.objects.filter(post=orm).exists())
+        self.assertFalse(RelatedPost.objects.filter(post=orm).exists())
+        self.assertNotIn(orm.pk, self.related_ids('django'))
+
+    def test_detail_reads_related_posts_with_one_query(self):
+        update_related_posts()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.posts['django'].get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [post.pk for post in response.context['related_posts']],
+            self.related_ids('django'),
+        )
+        # Además de la consulta del ETag, que sólo lee computed_at.
+        related_queries = [q for q in captured.captured_queries if 'blog_app_relatedpost' in q['sql'] and 'computed_at' not in q['sql']]
+        self.assertEqual(len(related_queries), 1)
+        self.assertContains(response, "El ORM de Django")
+
+    def test_detail_etag_follows_related_posts_in_every_process(self):
+        url = self.posts['django'].get_absolute_url()
+        before = self.client.get(url)['ETag']
+        update_related_posts()
+        # Otro proceso, con su propia caché, calcula el mismo ETag.
+        after = self.client.get(url)['ETag']
+        caches['pages'].clear()
+        self.assertNotEqual(before, after)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=after).status_code, 304)
+        self.assertEqual(update_related_posts(), {'vectors': 0, 'lists': 0})
+        self.assertEqual(self.client.get(url)['ETag'], after)
+
+
+class ImportExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        cls.other = User.objects.create_user('otro', 'otro@example.com', 'clave-segura-123')
+        for i, (title, status) in enumerate((("Hola mundo", 'published'), ("Hola mundo", 'published'), ("Notas", 'draft'))):
+            Post.objects.create(
+                title=title, author=cls.author if i % 2 else cls.other, summary="<p>Resumen</p>",
+                content=f"<p>Contenido {i} sobre <b>python</b></p>", status=status, keywords="python, django",
+            )
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def export(self, *args):
+        call_command('export_posts', *args, stderr=StringIO())
+
+    def import_(self, *args):
+        out = StringIO()
+        call_command('import_posts', *args, stdout=out, stderr=out)
+        return out.getvalue()
+
+    def snapshot(self):
+        return sorted(Post.objects.values_list('title', 'author__username', 'status', 'content', 'keywords'))
+
+    def test_jsonl_round_trip(self):
+        path = os.path.join(self.tmp.name, 'posts.jsonl')
+        self.export(path)
+        before = self.snapshot()
+        Post.objects.all().delete()
+
+        self.import_(path, '--batch-size', '2')
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(set(Post.objects.values_list('slug', flat=True)), {'hola-mundo', 'hola-mundo-1', 'notas'})
+        self.assertEqual(Tag.objects.get(slug='python').post_count, 2)
+        self.assertEqual(search_posts(Post.objects.published(), 'python')[0].count(), 2)
+        self.assertTrue(all(post.content_html for post in Post.objects.all()))
+
+    def test_markdown_round_trip_adds_suffixes(self):
+        self.export(self.tmp.name, '--format', 'markdown', '--status', 'published')
+        self.assertEqual(len(os.listdir(self.tmp.name)), 2)
+        self.import_(self.tmp.name)
+        self.assertEqual(Post.objects.filter(title="Hola mundo").count(), 4)
+        self.assertEqual(
+            set(Post.objects.filter(title="Hola mundo").values_list('slug', flat=True)),
+            {'hola-mundo', 'hola-mundo-1', 'hola-mundo-1-1', 'hola-mundo-2'},
+        )
+
+    def test_unknown_author_and_invalid_lines(self):
+        path = os.path.join(self.tmp.name, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'title': "Nuevo", 'content': "<p>Texto</p>", 'author': 'nadie', 'status': 'published'}) + '\n')
+            f.write("{no es json\n")
+            f.write(json.dumps({'title': "Sin contenido", 'author': 'autor'}) + '\n')
+        output = self.import_(path)
+        self.assertIn("0 posts importados, 3 registros omitidos", output)
+        self.import_(path, '--default-author', 'otro')
+        self.assertEqual(Post.objects.get(title="Nuevo").author, self.other)
+
+    def test_malformed_fields_are_skipped(self):
+        path = os.path.join(self.tmp.name, 'posts.jsonl')
+        valid = {'title': "Válido", 'content': "<p>Texto</p>", 'author': 'autor'}
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in (
+                {**valid, 'title': "Fecha imposible", 'published_date': '2024-13-45T10:00:00'},
+                {**valid, 'title': "Fecha numérica", 'published_date': 20240101},
+                {**valid, 'title': "Autor en lista", 'author': ['autor']},
+                {**valid, 'title': 42},
+                valid,
+            ):
+                f.write(json.dumps(record) + '\n')
+        output = self.import_(path, '--batch-size', '2')
+        self.assertIn("1 posts importados, 4 registros omitidos", output)
+        self.assertTrue(Post.objects.filter(title="Válido").exists())
+
+    def test_interrupted_import_still_invalidates_caches(self):
+        path = os.path.join(self.tmp.name, 'posts.jsonl')
+        self.export(path)
+        caches['pages'].set('blog:page:home', 'viejo')
+        with mock.patch('blog_app.management.commands.import_posts.import_records', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.import_(path)
+        self.assertIsNone(caches['pages'].get('blog:page:home'))
+
+    def test_slugs_for_a_batch_in_constant_queries(self):
+        allocate_slugs(['hola-mundo'])
+        # Lectura de contadores, comprobación con slug__in y upsert de contadores.
+        with self.assertNumQueries(3):
+            slugs = allocate_slugs(['hola-mundo'] * 50 + ['otro-titulo'])
+        self.assertEqual(len(set(slugs)), 51)
+        self.assertEqual(slugs[-1], 'otro-titulo')
+        self.assertEqual(SlugCounter.objects.get(base='hola-mundo').last, 52)
+
+
+class StaticExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        now = timezone.now()
+        for i in range(12):
+            Post.objects.create(
+                title=f"Post estático {i}", author=cls.author, summary="<p>Resumen</p>",
+                content="<p>Contenido</p>", status='published', published_date=now - datetime.timedelta(days=i),
+            )
+        cls.draft = Post.objects.create(
+            title="Borrador", author=cls.author, summary="<p>Resumen</p>", content="<p>Contenido</p>", status='draft',
+        )
+
+    def setUp(self):
+        caches['pages'].clear()
+        counters.clear_buffer()
+        self.addCleanup(counters.clear_buffer)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.output = tmp.name
+
+    def export(self, *args):
+        out = StringIO()
+        call_command('export_static', self.output, '--workers', '1', *args, stdout=out, stderr=StringIO())
+        with open(os.path.join(self.output, 'manifest.json'), encoding='utf-8') as f:
+            return out.getvalue(), json.load(f)['pages']
+
+    def read(self, manifest, url):
+        with open(os.path.join(self.output, manifest[url]['file']), encoding='utf-8') as f:
+            return f.read()
+
+    def test_exports_public_pages(self):
+        output, manifest = self.export()
+        self.assertIn("16 páginas generadas, 0 sin cambios y 0 eliminadas", output)
+        post = Post.objects.get(title="Post estático 0")
+        list_url = reverse('blog:post_list')
+        self.assertEqual(
+            sorted(manifest)[:4],
+            ['/', list_url, f'{list_url}?page=2', f'{list_url}?page=3'],
+        )
+        self.assertEqual(manifest[f'{list_url}?page=2']['file'], 'pages/page/2/index.html')
+        self.assertIn("Post estático 0", self.read(manifest, '/'))
+        self.assertIn("Post estático 5", self.read(manifest, f'{list_url}?page=2'))
+        self.assertIn(post.title, self.read(manifest, post.get_absolute_url()))
+        self.assertNotIn(self.draft.get_absolute_url(), manifest)
+        self.assertTrue(manifest[post.get_absolute_url()]['etag'])
+        # Generar las páginas no cuenta como lecturas.
+        self.assertEqual(counters.pending_views(), 0)
+
+    def test_reexport_only_renders_changed_pages(self):
+        self.export()
+        output, _ = self.export()
+        self.assertIn("0 páginas generadas, 16 sin cambios", output)
+
+        # El post 7 está en la segunda página del listado.
+        post = Post.objects.get(title="Post estático 7")
+        post.title = "Post estático editado"
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        output, manifest = self.export()
+        self.assertIn("2 páginas generadas, 14 sin cambios y 0 eliminadas", output)
+        self.assertIn("Post estático editado", self.read(manifest, f"{reverse('blog:post_list')}?page=2"))
+
+        # Los dos posts de la tercera página dejan de estar publicados: salen
+        # sus detalles y esa página, y las otras dos muestran un total distinto.
+        hidden = list(Post.objects.filter(title__in=["Post estático 10", "Post estático 11"]))
+        with self.captureOnCommitCallbacks(execute=True):
+            for post in hidden:
+                post.status = 'draft'
+                post.save()
+        output, manifest = self.export()
+        self.assertIn("2 páginas generadas, 11 sin cambios y 3 eliminadas", output)
+        self.assertNotIn(f"{reverse('blog:post_list')}?page=3", manifest)
+        for post in hidden:
+            self.assertNotIn(post.get_absolute_url(), manifest)
+            self.assertFalse(os.path.exists(os.path.join(self.output, 'pages', post.slug, 'index.html')))
+
+    def test_author_rename_rerenders_their_pages(self):
+        self.export()
+        self.author.username = 'autora'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.save()
+        output, manifest = self.export()
+        self.assertIn("16 páginas generadas, 0 sin cambios", output)
+        post = Post.objects.get(title="Post estático 0")
+        self.assertIn("autora", self.read(manifest, post.get_absolute_url()))
+        self.assertIn("autora", self.read(manifest, '/'))
+
+    def test_full_reexport(self):
+        self.export()
+        output, _ = self.export('--full')
+        self.assertIn("16 páginas generadas, 0 sin cambios", output)
+
+
+@override_settings(BLOG_SITEMAP_PAGE_SIZE=5, BLOG_SITE_URL='https://blog.example.com')
+class FeedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        cls.other = User.objects.create_user('otro', 'otro@example.com', 'clave-segura-123')
+        now = timezone.now()
+        for i in range(12):
+            Post.objects.create(
+                title=f"Post del feed {i}", author=cls.author if i % 2 else cls.other,
+                summary="<p>Resumen</p>", content="<p>Contenido</p>", status='published',
+                published_date=now - datetime.timedelta(days=12 - i), keywords="python",
+            )
+        cls.draft = Post.objects.create(
+            title="Borrador del feed", author=cls.author, summary="<p>Resumen</p>", content="<p>Contenido</p>",
+        )
+
+    def keys(self):
+        return set(FeedArtifact.objects.exclude(etag='').values_list('key', flat=True))
+
+    def test_feeds_list_published_posts(self):
+        rss = self.client.get(reverse('blog:feed_rss'))
+        self.assertEqual(rss['Content-Type'], 'application/rss+xml; charset=utf-8')
+        self.assertContains(rss, "https://blog.example.com/pages/post-del-feed-11/")
+        self.assertNotContains(rss, "Borrador del feed")
+
+        atom = self.client.get(reverse('blog:author_feed_atom', kwargs={'username': 'autor'}))
+        self.assertEqual(atom['Content-Type'], 'application/atom+xml; charset=utf-8')
+        self.assertContains(atom, "Post del feed 11")
+        self.assertNotContains(atom, "Post del feed 10")
+        self.assertEqual(self.client.get('/feeds/nadie/rss/').status_code, 404)
+
+    def test_serves_stored_artifact_with_conditional_get_and_gzip(self):
+        url = reverse('blog:feed_rss')
+        response = self.client.get(url)
+        self.assertEqual(self.keys(), {'feed:rss'})
+        with self.assertNumQueries(1):
+            compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), response.content)
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        for header in ('gzip;q=0', 'deflate, gzip; q=0.0', 'x-gzipped'):
+            with self.subTest(header=header):
+                plain = self.client.get(url, HTTP_ACCEPT_ENCODING=header)
+                self.assertFalse(plain.has_header('Content-Encoding'))
+                self.assertEqual(plain.content, response.content)
+
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        not_modified = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_sitemap_is_paginated(self):
+        index = self.client.get(reverse('blog:sitemap'))
+        for page in (1, 2, 3):
+            self.assertContains(index, f"<loc>https://blog.example.com/sitemap-{page}.xml</loc>")
+        self.assertNotContains(index, "sitemap-4.xml")
+
+        # Del más antiguo al más nuevo.
+        first = self.client.get(reverse('blog:sitemap_page', kwargs={'page': 1}))
+        self.assertContains(first, "<loc>https://blog.example.com/pages/post-del-feed-0/</loc>")
+        self.assertContains(first, "<lastmod>")
+        last = self.client.get(reverse('blog:sitemap_page', kwargs={'page': 3}))
+        self.assertContains(last, "post-del-feed-11")
+        self.assertNotContains(last, self.draft.slug)
+        self.assertEqual(self.client.get(reverse('blog:sitemap_page', kwargs={'page': 4})).status_code, 404)
+        self.assertEqual(self.client.get('/sitemap-0.xml').status_code, 404)
+        # Las páginas inexistentes no dejan filas en la tabla.
+        for page in (4, 50):
+            self.client.get(reverse('blog:sitemap_page', kwargs={'page': page}))
+        self.assertFalse(FeedArtifact.objects.filter(key__in=['sitemap:4', 'sitemap:50']).exists())
+
+    def fetch_all(self):
+        for name in ('feed_rss', 'feed_atom', 'sitemap'):
+            self.client.get(reverse(f'blog:{name}'))
+        for username in ('autor', 'otro'):
+            self.client.get(reverse('blog:author_feed_rss', kwargs={'username': username}))
+        for page in (1, 2, 3):
+            self.client.get(reverse('blog:sitemap_page', kwargs={'page': page}))
+
+    def test_saving_a_post_only_removes_affected_artifacts(self):
+        self.fetch_all()
+        all_keys = self.keys()
+
+        # Borrador: no aparece en ningún artefacto.
+        self.draft.title = "Borrador editado"
+        self.draft.save()
+        self.assertEqual(self.keys(), all_keys)
+
+        # Editar el post 6 (de "otro", segunda página del sitemap).
+        post = Post.objects.get(title="Post del feed 6")
+        post.title = "Post del feed editado"
+        post.save()
+        self.assertEqual(
+            all_keys - self.keys(),
+            {'feed:rss', 'feed:atom', f'feed:author:{self.other.pk}:rss', 'sitemap', 'sitemap:2'},
+        )
+        self.assertContains(self.client.get(reverse('blog:feed_rss')), "Post del feed editado")
+
+        # Despublicarlo desplaza las páginas siguientes del sitemap.
+        self.fetch_all()
+        post.status = 'draft'
+        post.save()
+        self.assertEqual(all_keys - self.keys(), {
+            'feed:rss', 'feed:atom', f'feed:author:{self.other.pk}:rss', 'sitemap', 'sitemap:2', 'sitemap:3',
+        })
+        self.assertNotContains(self.client.get(reverse('blog:sitemap_page', kwargs={'page': 2})), post.slug)
+
+        self.fetch_all()
+        Post.objects.get(title="Post del feed 11").delete()
+        self.assertNotContains(self.client.get(reverse('blog:feed_rss')), "Post del feed 11")
+
+    def test_scheduled_post_regenerates_when_published(self):
+        now = timezone.now()
+        self.fetch_all()
+        scheduled = Post.objects.create(
+            title="Post programado", author=self.author, summary="<p>Resumen</p>", content="<p>Contenido</p>",
+            status='published', published_date=now + datetime.timedelta(hours=1),
+        )
+        self.assertNotContains(self.client.get(reverse('blog:feed_rss')), "Post programado")
+        self.assertEqual(FeedArtifact.objects.get(key='feed:rss').expires_at, scheduled.published_date)
+        self.assertEqual(FeedArtifact.objects.get(key='sitemap:3').expires_at, scheduled.published_date)
+        self.assertIsNone(FeedArtifact.objects.get(key='sitemap:1').expires_at)
+
+        later = now + datetime.timedelta(hours=2)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertContains(self.client.get(reverse('blog:feed_rss')), "Post programado")
+            self.assertContains(self.client.get(reverse('blog:sitemap_page', kwargs={'page': 3})), scheduled.slug)
+            self.assertIsNone(FeedArtifact.objects.get(key='feed:rss').expires_at)
+
+    def test_post_saved_during_generation_is_not_lost(self):
+        builds = []
+
+        def build():
+            built = feeds.build_feed('rss')
+            if not builds:
+                # Otro proceso publica un post mientras se genera el feed.
+                Post.objects.create(
+                    title="Publicado durante la generación", author=self.author, content="<p>Contenido</p>",
+                    status='published', published_date=timezone.now() - datetime.timedelta(minutes=1),
+                )
+            builds.append(built)
+            return built
+
+        for existing in (False, True):
+            with self.subTest(existing=existing):
+                builds.clear()
+                Post.objects.filter(title="Publicado durante la generación").delete()
+                if existing:
+                    self.client.get(reverse('blog:feed_rss'))
+                    feeds.invalidate(FeedArtifact.objects.filter(key='feed:rss'))
+                else:
+                    FeedArtifact.objects.all().delete()
+                artifact = feeds.get_artifact(feeds.feed_key('rss'), build)
+                self.assertEqual(len(builds), 2)
+                self.assertIn("Publicado durante la generación", gzip.decompress(bytes(artifact.content)).decode())
+                stored = FeedArtifact.objects.get(key='feed:rss')
+                self.assertEqual(stored.etag, artifact.etag)
+                self.assertContains(self.client.get(reverse('blog:feed_rss')), "Publicado durante la generación")
+
+
+class StaticPipelineTests(TestCase):
+    storages = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'blog_app.staticfiles.PrecompressedManifestStorage'},
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        cls.root = tmp.name
+        overrides = override_settings(
+            STATIC_ROOT=cls.root, STORAGES=cls.storages,
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+        )
+        overrides.enable()
+        cls.addClassCleanup(overrides.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_minify_css(self):
+        css = """/* comentario */
+        a  :hover ,  .b > p {
+            content: "  /* no */  ";
+            color : red;
+        }
+        /*! licencia */
+        """
+        self.assertEqual(
+            staticfiles.minify_css(css),
+            'a :hover,.b>p{content:"  /* no */  ";color :red}/*! licencia */',
+        )
+
+    def test_collectstatic_hashes_minifies_and_compresses(self):
+        with open(os.path.join(self.root, 'staticfiles.json'), encoding='utf-8') as f:
+            hashed = json.load(f)['paths']['css/custom_styles.css']
+        self.assertRegex(hashed, r'^css/custom_styles\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(self.root, hashed), encoding='utf-8') as f:
+            css = f.read()
+        self.assertNotIn('\n', css)
+        with gzip.open(os.path.join(self.root, hashed + '.gz'), 'rt', encoding='utf-8') as f:
+            self.assertEqual(f.read(), css)
+        self.assertIn(f'/static/{hashed}', self.client.get(reverse('blog:about')).content.decode())
+
+    def test_serves_precompressed_variant_with_immutable_caching(self):
+        url = staticfiles.staticfiles_storage.url('css/custom_styles.css')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='br;q=0, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertTrue(body.startswith(b'body{'))
+
+        plain = self.client.get(url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(plain.streaming_content), body)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=plain['ETag']).status_code, 304)
+
+        # El nombre sin hash se sirve, pero no es inmutable.
+        response = self.client.get('/static/css/custom_styles.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertEqual(self.client.get(url + '.gz').status_code, 404)
+        self.assertEqual(self.client.get('/static/../manage.py').status_code, 404)
+
+
+class MediaServingTests(TestCase):
+    content = bytes(range(256)) * 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        cls.other = User.objects.create_user('otro', 'otro@example.com', 'clave-segura-123')
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'clave-segura-123', is_staff=True)
+        cls.published = Post.objects.create(
+            title="Publicado", author=cls.author, content="<p>Contenido</p>", status='published',
+        )
+        cls.draft = Post.objects.create(title="Borrador", author=cls.author, content="<p>Contenido</p>")
+        # update() no envía señales: no se generan derivados.
+        Post.objects.filter(pk=cls.published.pk).update(featured_image='post_images/post_new_autor/publica.jpg')
+        Post.objects.filter(pk=cls.draft.pk).update(featured_image='post_images/post_new_autor/borrador.jpg')
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        overrides = override_settings(MEDIA_ROOT=tmp.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        for name in (
+            'post_images/post_new_autor/publica.jpg', 'post_images/post_new_autor/borrador.jpg',
+            'derivatives/post_images/post_new_autor/borrador.640w.webp', 'post_images/post_new_autor/huerfana.jpg',
+            'uploads/2026/10/18/editor.png',
+        ):
+            path = os.path.join(tmp.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(self.content)
+
+    def get(self, name, **headers):
+        response = self.client.get(f'/media/{name}', **headers)
+        if response.status_code in (200, 206):
+            response.body = b''.join(response.streaming_content)
+        return response
+
+    def test_serves_public_files_with_ranges_and_validators(self):
+        response = self.get('post_images/post_new_autor/publica.jpg')
+        self.assertEqual(response.body, self.content)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertEqual(self.get('uploads/2026/10/18/editor.png').status_code, 200)
+
+        partial = self.get('post_images/post_new_autor/publica.jpg', HTTP_RANGE='bytes=10-19')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.body, self.content[10:20])
+        self.assertEqual(partial['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(partial['Content-Length'], '10')
+        suffix = self.get('post_images/post_new_autor/publica.jpg', HTTP_RANGE='bytes=-4')
+        self.assertEqual(suffix.body, self.content[-4:])
+        unsatisfiable = self.get('post_images/post_new_autor/publica.jpg', HTTP_RANGE='bytes=5000-')
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable['Content-Range'], 'bytes */1024')
+        # If-Range con otro ETag: el archivo cambió, se envía completo.
+        stale = self.get('post_images/post_new_autor/publica.jpg', HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"viejo"')
+        self.assertEqual(stale.status_code, 200)
+
+        etag = response['ETag']
+        self.assertEqual(self.get('post_images/post_new_autor/publica.jpg', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        since = self.get('post_images/post_new_autor/publica.jpg', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(since.status_code, 304)
+        self.assertEqual(self.get('../manage.py').status_code, 404)
+        self.assertEqual(self.get('post_images/no-existe.jpg').status_code, 404)
+
+    def test_draft_images_follow_post_visibility(self):
+        names = ('post_images/post_new_autor/borrador.jpg', 'derivatives/post_images/post_new_autor/borrador.640w.webp')
+        for user, status in ((None, 404), (self.other, 404), (self.author, 200), (self.staff, 200)):
+            if user:
+                self.client.force_login(user)
+            for name in names:
+                with self.subTest(user=user, name=name):
+                    response = self.get(name)
+                    self.assertEqual(response.status_code, status)
+                    if status == 200:
+                        self.assertIn('private', response['Cache-Control'])
+        # Huérfana: sólo el staff (la última sesión iniciada).
+        self.assertEqual(self.get('post_images/post_new_autor/huerfana.jpg').status_code, 200)
+        self.client.force_login(self.author)
+        self.assertEqual(self.get('post_images/post_new_autor/huerfana.jpg').status_code, 404)
+
+    @override_settings(BLOG_MEDIA_SENDFILE='x-accel-redirect', BLOG_MEDIA_ACCEL_PREFIX='/interno/')
+    def test_delegates_to_web_server(self):
+        response = self.client.get('/media/post_images/post_new_autor/publica.jpg')
+        self.assertEqual(response['X-Accel-Redirect'], '/interno/post_images/post_new_autor/publica.jpg')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(self.client.get('/media/post_images/post_new_autor/borrador.jpg').status_code, 404)
+
+
+@override_settings(BLOG_IMAGE_ASYNC=False)
+class ImageDerivativeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        cls.post = Post.objects.create(title="Con imagen", author=cls.author, content="<p>Contenido</p>", status='published')
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        overrides = override_settings(MEDIA_ROOT=tmp.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def upload(self, name, width, height):
+        buffer = BytesIO()
+        Image.new('RGB', (width, height), 'red').save(buffer, 'PNG')
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def render(self, post):
+        template = Template(
+            '{% load image_tags %}'
+            '{% responsive_image post.featured_image sizes="100vw" widths=post.featured_image_widths %}'
+        )
+        return template.render(Context({'post': post}))
+
+    def test_records_real_widths_without_upscaling(self):
+        self.post.featured_image = self.upload('post_images/angosta.png', 500, 250)
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.featured_image_widths, [320, 500])
+        for width in (320, 500):
+            self.assertTrue(default_storage.exists(f'derivatives/post_images/angosta.{width}w.png'))
+            self.assertTrue(default_storage.exists(f'derivatives/post_images/angosta.{width}w.webp'))
+        self.assertFalse(default_storage.exists('derivatives/post_images/angosta.640w.webp'))
+
+        # Guardar el post sin cambiar la imagen no vuelve a generarlos.
+        with mock.patch('blog_app.images.generate_derivatives') as generate:
+            self.post.save()
+        generate.assert_not_called()
+
+    def test_srcset_uses_recorded_widths_without_storage_access(self):
+        self.post.featured_image = self.upload('post_images/angosta.png', 500, 250)
+        self.post.save()
+        self.post.refresh_from_db()
+        with mock.patch('django.core.files.storage.FileSystemStorage.exists', side_effect=AssertionError):
+            html = self.render(self.post)
+        self.assertIn('/media/derivatives/post_images/angosta.500w.webp 500w', html)
+        self.assertIn('/media/derivatives/post_images/angosta.320w.png 320w', html)
+        self.assertNotIn('640w', html)
+
+        # Sin anchos guardados (aún generándose) se muestra sólo el original.
+        Post.objects.filter(pk=self.post.pk).update(featured_image_widths=[])
+        self.post.refresh_from_db()
+        self.assertNotIn('srcset', self.render(self.post))
+
+    def test_new_image_replaces_recorded_widths(self):
+        self.post.featured_image = self.upload('post_images/angosta.png', 500, 250)
+        self.post.save()
+        self.post.featured_image = self.upload('post_images/ancha.png', 1200, 600)
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.featured_image_widths, [320, 640, 1024, 1200])
+
+    def test_avatar_widths_are_recorded(self):
+        profile = self.author.profile
+        profile.avatar = self.upload('avatars/user_1/foto.png', 100, 100)
+        profile.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.avatar_widths, [48, 100])
+
+
+class ConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        cls.post = Post.objects.create(
+            title="Condicional", author=cls.author, content="<p>Texto</p>", status='published',
+            published_date=timezone.now() - datetime.timedelta(days=1),
+        )
+
+    def setUp(self):
+        caches['pages'].clear()
+
+    def urls(self):
+        return [reverse('blog:home'), reverse('blog:post_list'), self.post.get_absolute_url()]
+
+    def test_if_none_match(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(not_modified.status_code, 304)
+                self.assertEqual(not_modified['ETag'], response['ETag'])
+                self.assertEqual(not_modified.content, b'')
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='W/"otro"').status_code, 200)
+
+    def test_if_modified_since(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+                earlier = http_date(timezone.now().timestamp() - 3 * 24 * 60 * 60)
+                self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=earlier).status_code, 200)
+
+    def test_changes_invalidate_validators(self):
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls()}
+        Post.objects.filter(pk=self.post.pk).update(updated_at=timezone.now() + datetime.timedelta(seconds=5))
+        caches['pages'].clear()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_logged_in_users_get_their_own_etag(self):
+        url = self.post.get_absolute_url()
+        anonymous = self.client.get(url)['ETag']
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=anonymous).status_code, 200)
+
+    def test_profile_changes_invalidate_validators(self):
+        # La navbar muestra el avatar y el nombre del usuario.
+        self.client.force_login(self.author)
+        url = reverse('blog:home')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        data = {'email': self.author.email, 'first_name': '', 'last_name': '', 'location': 'Rosario'}
+        self.client.post(reverse('accounts:profile_update'), data)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class PageCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        now = timezone.now()
+        cls.posts = [
+            Post.objects.create(
+                title=f"Post en caché {i}", author=cls.author, content="<p>Texto</p>", status='published',
+                published_date=now - datetime.timedelta(days=i),
+            )
+            for i in range(12)
+        ]
+
+    def setUp(self):
+        caches['pages'].clear()
+
+    def test_purge_waits_for_the_commit(self):
+        post = self.posts[0]
+        url = post.get_absolute_url()
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'MISS')
+        with self.captureOnCommitCallbacks() as callbacks:
+            post.title = "Editado"
+            post.save()
+            # Antes del commit una lectura todavía debe ver la página guardada.
+            self.assertEqual(self.client.get(url)['X-Page-Cache'], 'HIT')
+        for callback in callbacks:
+            callback()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, "Editado")
+
+    def fill_cache(self, *keys):
+        cache = caches['pages']
+        for key in keys:
+            cache.set(key, (b'viejo', 'text/html'))
+        return cache
+
+    def test_edit_purges_only_the_pages_showing_the_post(self):
+        # 12 posts, 5 por página: el post 7 está en la segunda página.
+        post, other = self.posts[7], self.posts[0]
+        purged = [page_cache.home_key(), page_cache.list_key(2), page_cache.detail_key(post.slug)]
+        kept = [page_cache.list_key(1), page_cache.list_key(3), page_cache.detail_key(other.slug)]
+        cache = self.fill_cache(*purged, *kept)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.title = "Editado"
+            post.save()
+        self.assertEqual(cache.get_many(purged), {})
+        self.assertEqual(set(cache.get_many(kept)), set(kept))
+
+    def test_slug_change_purges_the_old_detail_page(self):
+        post = self.posts[3]
+        old_key = page_cache.detail_key(post.slug)
+        cache = self.fill_cache(old_key)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.slug = 'nuevo-slug'
+            post.save()
+        self.assertIsNone(cache.get(old_key))
+        self.assertEqual(self.client.get(reverse('blog:post_detail', kwargs={'slug': 'nuevo-slug'})).status_code, 200)
+
+    def test_timeout_stops_at_the_next_scheduled_publication(self):
+        cache = caches['pages']
+        with mock.patch.object(cache, 'set', wraps=cache.set) as set_page:
+            self.client.get(reverse('blog:post_list'))
+        self.assertEqual(set_page.call_args.args[2], settings.BLOG_PAGE_CACHE_TIMEOUT)
+
+        Post.objects.create(
+            title="Programado", author=self.author, content="<p>Texto</p>", status='published',
+            published_date=timezone.now() + datetime.timedelta(seconds=90),
+        )
+        cache.clear()
+        with mock.patch.object(cache, 'set', wraps=cache.set) as set_page:
+            self.assertEqual(self.client.get(reverse('blog:post_list'))['X-Page-Cache'], 'MISS')
+        self.assertTrue(85 <= set_page.call_args.args[2] <= 90)
+
+
+class SlugAllocationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+
+    def create_post(self, title, slug=''):
+        return Post.objects.create(title=title, slug=slug, author=self.author, content="<p>Contenido</p>")
+
+    def slug_lookups(self, captured):
+        return [q['sql'] for q in captured.captured_queries if 'FROM "blog_app_post"' in q['sql'] and '"slug"' in q['sql']]
+
+    def test_repeated_titles_do_not_probe_slugs(self):
+        slugs = [self.create_post("Título repetido").slug for _ in range(5)]
+        self.assertEqual(slugs, ['titulo-repetido'] + [f'titulo-repetido-{i}' for i in range(1, 5)])
+        with CaptureQueriesContext(connection) as captured:
+            post = self.create_post("Título repetido")
+        self.assertEqual(post.slug, 'titulo-repetido-5')
+        self.assertEqual(self.slug_lookups(captured), [])
+
+    def test_slug_unknown_to_the_counter_is_retried(self):
+        self.create_post("Otro", slug='manual')
+        self.create_post("Otro", slug='manual-1')
+        post = self.create_post("Manual")
+        self.assertEqual(post.slug, 'manual-2')
+        self.assertEqual(SlugCounter.objects.get(base='manual').last, 2)
+        self.assertEqual(self.create_post("Manual").slug, 'manual-3')
+
+    def test_form_rejects_taken_slug(self):
+        post = self.create_post("Primero")
+        data = {'title': "Segundo", 'slug': post.slug, 'content': "<p>Texto</p>", 'status': 'draft',
+                'published_date': timezone.now().strftime('%Y-%m-%dT%H:%M')}
+        form = PostForm(data=data)
+        self.assertFalse(form.is_valid())
+        self.assertIn('slug', form.errors)
+        self.assertTrue(PostForm(data=data, instance=post).is_valid())
+
+
+class PostViewCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        now = timezone.now()
+        cls.posts = [
+            Post.objects.create(
+                title=f"Post de prueba {i}", author=cls.author, summary="<p>Resumen</p>",
+                content="<p>Contenido</p>", status='published', published_date=now - datetime.timedelta(days=i),
+            )
+            for i in range(3)
+        ]
+        cls.draft = Post.objects.create(
+            title="Borrador", author=cls.author, summary="<p>Resumen</p>", content="<p>Contenido</p>", status='draft',
+        )
+
+    def setUp(self):
+        caches['pages'].clear()
+        counters.clear_buffer()
+        self.addCleanup(counters.clear_buffer)
+
+    def test_views_are_buffered_until_flush(self):
+        first, second, third = self.posts
+        for post, views in ((first, 3), (second, 3), (third, 1)):
+            for _ in range(views):
+                counters.record_view(post.pk)
+        self.assertEqual(counters.pending_views(), 7)
+        first.refresh_from_db()
+        self.assertEqual(first.view_count, 0)
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(counters.flush_views(refresh=False), 7)
+        updates = [q['sql'] for q in captured.captured_queries if q['sql'].startswith('UPDATE')]
+        # Un UPDATE por incremento distinto (3 y 1), no uno por post ni por lectura.
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(counters.pending_views(), 0)
+        self.assertEqual(
+            list(Post.objects.filter(pk__in=[p.pk for p in self.posts]).order_by('pk').values_list('view_count', flat=True)),
+            [3, 3, 1],
+        )
+
+    def test_hourly_buckets_accumulate(self):
+        post = self.posts[0]
+        counters.record_view(post.pk)
+        counters.flush_views(refresh=False)
+        counters.record_view(post.pk)
+        counters.record_view(post.pk)
+        counters.flush_views(refresh=False)
+        bucket = PostViewBucket.objects.get(post=post)
+        self.assertEqual(bucket.views, 3)
+        post.refresh_from_db()
+        self.assertEqual(post.view_count, 3)
+
+    def test_rankings_per_window(self):
+        now = timezone.now()
+        first, second, third = self.posts
+        for _ in range(5):
+            counters.record_view(first.pk, when=now - datetime.timedelta(days=3))
+        for _ in range(2):
+            counters.record_view(second.pk, when=now)
+        counters.record_view(third.pk, when=now)
+        for _ in range(9):
+            counters.record_view(self.draft.pk, when=now)
+        counters.record_view(third.pk, when=now - datetime.timedelta(days=10))
+        counters.flush_views(refresh=False)
+        counters.refresh_popular_posts(now=now)
+
+        self.assertEqual([p.pk for p in counters.popular_posts('day')], [second.pk, third.pk])
+        week = counters.popular_posts('week')
+        self.assertEqual([p.pk for p in week], [first.pk, second.pk, third.pk])
+        self.assertEqual(week[0].window_views, 5)
+        self.assertEqual(PopularPost.objects.filter(window='week').count(), 3)
+        # Las horas fuera de la ventana más larga se descartan.
+        self.assertFalse(PostViewBucket.objects.filter(hour__lt=now - datetime.timedelta(days=7, hours=1)).exists())
+
+    def test_cached_and_conditional_reads_are_counted(self):
+        url = self.posts[0].get_absolute_url()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.client.get(url, headers={'if-none-match': response['ETag']})
+        self.client.get(self.draft.get_absolute_url())
+        self.assertEqual(counters.pending_views(), 3)
+
+    @override_settings(BLOG_VIEW_FLUSH_INTERVAL=0.01)
+    def test_buffer_is_flushed_without_further_views(self):
+        flushed = threading.Event()
+        with mock.patch.object(counters, '_flush_safely', side_effect=flushed.set):
+            counters.record_view(self.posts[0].pk)
+            self.assertTrue(flushed.wait(5))
+
+    @override_settings(BLOG_VIEW_FLUSH_INTERVAL=None)
+    def test_pending_views_are_flushed_at_exit(self):
+        counters.record_view(self.posts[0].pk)
+        counters.record_view(self.posts[0].pk)
+        counters._flush_at_exit()
+        self.assertEqual(counters.pending_views(), 0)
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].view_count, 2)
+
+    def test_popular_page(self):
+        counters.record_view(self.posts[1].pk)
+        counters.flush_views()
+        response = self.client.get(reverse('blog:popular_posts') + '?window=week')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['window'], 'week')
+        self.assertContains(response, self.posts[1].title)
+        response = self.client.get(reverse('blog:popular_posts') + '?window=siempre')
+        self.assertEqual(response.context['window'], 'day')
+
+
+@override_settings(BLOG_INSTRUMENTATION=True)
+class InstrumentationMiddlewareTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'clave-segura-123', is_staff=True)
+        cls.user = User.objects.create_user('lector', 'lector@example.com', 'clave-segura-123')
+        Post.objects.create(
+            title="Post publicado", author=cls.staff, summary="<p>Resumen</p>",
+            content="<p>Contenido</p>", status='published', published_date=timezone.now(),
+        )
+
+    def setUp(self):
+        caches['pages'].clear()
+        reset_stats()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('blog:post_list'))
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'app;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+        self.assertRegex(timing, r'desc="[1-9]\d* queries"')
+
+    def test_stats_endpoint_aggregates_by_view(self):
+        self.client.get(reverse('blog:post_list'))
+        self.client.get(reverse('blog:post_list'))
+        self.client.force_login(self.staff)
+        stats = self.client.get(reverse('blog:request_stats')).json()
+        self.assertTrue(stats['enabled'])
+        post_list = next(entry for entry in stats['views'] if entry['view'] == 'blog:post_list')
+        self.assertEqual(post_list['requests'], 2)
+        self.assertEqual(post_list['budget'], 6)
+        self.assertEqual(post_list['over_budget'], 0)
+        self.assertGreater(post_list['avg_queries'], 0)
+
+        self.client.post(reverse('blog:request_stats'))
+        stats = self.client.get(reverse('blog:request_stats')).json()
+        self.assertEqual([entry['view'] for entry in stats['views']], ['blog:request_stats'])
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('blog:request_stats'))
+        self.assertRedirects(response, reverse('blog:home'))
+
+
+class ProfilingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'clave-segura-123', is_staff=True)
+        cls.user = User.objects.create_user('lector', 'lector@example.com', 'clave-segura-123')
+        Post.objects.create(
+            title="Post publicado", author=cls.staff, summary="<p>Resumen</p>",
+            content="<p>Contenido</p>", status='published', published_date=timezone.now(),
+        )
+
+    def setUp(self):
+        caches['pages'].clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.enterContext(override_settings(BLOG_PROFILE_DIR=tmp.name, BLOG_PROFILE_KEEP=3, BLOG_PROFILE_SAMPLE_RATE=0))
+
+    def test_staff_can_profile_a_request(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('blog:post_list') + '?_profile=1')
+        self.assertEqual(response.status_code, 200)
+        name = response[profiling.PROFILE_ID_HEADER]
+        [profile] = profiling.list_profiles()
+        self.assertEqual(profile['name'], name)
+        self.assertEqual(profile['view'], 'blog:post_list')
+        self.assertEqual(profile['trigger'], 'staff')
+        self.assertEqual(profile['user'], 'staff')
+        self.assertGreater(profiling.load_stats(name).total_calls, 0)
+
+        response = self.client.get(reverse('blog:home'), HTTP_X_PROFILE='1')
+        self.assertIn(profiling.PROFILE_ID_HEADER, response)
+        self.assertEqual(len(profiling.list_profiles()), 2)
+
+    async def test_profile_under_asgi(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(reverse('blog:about'), headers={'X-Profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(profiling.PROFILE_ID_HEADER, response)
+        await self.async_client.alogout()
+        response = await self.async_client.get(reverse('blog:about'), headers={'X-Profile': '1'})
+        self.assertNotIn(profiling.PROFILE_ID_HEADER, response)
+
+    def test_other_users_cannot_profile(self):
+        for user in (None, self.user):
+            if user:
+                self.client.force_login(user)
+            response = self.client.get(reverse('blog:post_list') + '?_profile=1')
+            self.assertNotIn(profiling.PROFILE_ID_HEADER, response)
+        self.assertEqual(profiling.list_profiles(), [])
+
+    def test_sampling(self):
+        with override_settings(BLOG_PROFILE_SAMPLE_RATE=1.0):
+            self.client.get(reverse('blog:about'))
+        self.client.get(reverse('blog:about'))
+        [profile] = profiling.list_profiles()
+        self.assertEqual(profile['trigger'], 'sample')
+        self.assertIsNone(profile['user'])
+
+    def test_ring_buffer_keeps_the_most_recent(self):
+        with override_settings(BLOG_PROFILE_SAMPLE_RATE=1.0):
+            for _ in range(5):
+                self.client.get(reverse('blog:about'))
+        names = sorted(path.name for path in profiling.profile_dir().iterdir())
+        self.assertEqual(len(names), 6)
+        self.assertEqual(len(profiling.list_profiles()), 3)
+
+    def test_profile_pages_are_staff_only(self):
+        self.client.force_login(self.staff)
+        name = self.client.get(reverse('blog:home') + '?_profile=1')[profiling.PROFILE_ID_HEADER]
+        download = reverse('blog:profile_download', kwargs={'name': name})
+
+        self.client.force_login(self.user)
+        self.assertRedirects(self.client.get(reverse('blog:profile_list')), reverse('blog:home'))
+        self.assertRedirects(self.client.get(download), reverse('blog:home'))
+
+        self.client.force_login(self.staff)
+        self.assertContains(self.client.get(reverse('blog:profile_list')), download)
+        response = self.client.get(download)
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="{name}.prof"')
+        self.assertTrue(b''.join(response.streaming_content))
+
+        folded = self.client.get(download + '?format=collapsed').content.decode()
+        self.assertRegex(folded, r'(?m)^[^ ]*views\.py:\d+:get_context_data [0-9]+$')
+        self.assertContains(self.client.get(download + '?format=text'), 'cumulative')
+        self.assertEqual(self.client.get(download + '?format=svg').status_code, 404)
+        self.assertEqual(self.client.get(reverse('blog:profile_download', kwargs={'name': '..'})).status_code, 404)
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    # La réplica es otro archivo SQLite; sync_replica() copia en él el estado
+    # actual de la base de pruebas, como lo haría la replicación. La copia
+    # necesita que la primaria no tenga una transacción abierta, por eso no
+    # se usa TestCase. La réplica se registra al iniciar la clase; '__all__'
+    # la incluye sin que el runner intente crear su base de pruebas.
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        connections.settings['replica'] = {**connections.settings['default'], 'NAME': os.path.join(tmp.name, 'replica.sqlite3')}
+        cls.addClassCleanup(connections.settings.pop, 'replica')
+        cls.addClassCleanup(lambda: connections['replica'].close())
+        super().setUpClass()
+
+    def setUp(self):
+        caches['pages'].clear()
+        self.addCleanup(get_search_backend().clear)
+        self.enterContext(override_settings(BLOG_DATABASE_REPLICAS=['replica'], BLOG_REPLICA_STICKY_SECONDS=30))
+        self.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        self.post = self.create_post("Post replicado")
+        self.sync_replica()
+
+    def sync_replica(self):
+        connections['replica'].close()
+        target = sqlite3.connect(connections.settings['replica']['NAME'])
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+
+    def create_post(self, title):
+        return Post.objects.create(
+            title=title, author=self.author, summary="<p>Resumen</p>",
+            content="<p>Contenido</p>", status='published', published_date=timezone.now(),
+        )
+
+    def test_public_views_read_from_the_replica(self):
+        post = self.create_post("Post sin replicar")
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            self.assertNotContains(self.client.get(reverse('blog:post_list')), post.title)
+            self.assertEqual(self.client.get(post.get_absolute_url()).status_code, 404)
+        self.assertTrue(replica_queries)
+
+        self.sync_replica()
+        caches['pages'].clear()
+        self.assertContains(self.client.get(reverse('blog:post_list')), post.title)
+        self.assertContains(self.client.get(reverse('blog:post_list') + '?q=replicar'), post.title)
+        self.assertEqual(self.client.get(post.get_absolute_url()).status_code, 200)
+
+    def test_other_views_and_sessions_use_the_primary(self):
+        # La sesión sólo existe en la primaria.
+        self.client.force_login(self.author)
+        post = self.create_post("Post sin replicar")
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            response = self.client.get(reverse('blog:post_update', kwargs={'slug': post.slug}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(replica_queries), 0)
+
+        response = self.client.get(reverse('accounts:profile_view_user', kwargs={'username': 'autor'}))
+        self.assertContains(response, self.post.title)
+        self.assertNotContains(response, post.title)
+
+    def test_reads_stick_to_the_primary_after_a_write(self):
+        self.client.force_login(self.author)
+        response = self.client.post(reverse('blog:post_create'), {
+            'title': "Post recién escrito",
+            'summary': "<p>Resumen</p>",
+            'content': "<p>Contenido</p>",
+            'status': 'published',
+            'published_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+            'keywords': '',
+        })
+        self.assertEqual(response.status_code, 302)
+        cookie = response.cookies[PRIMARY_COOKIE]
+        self.assertEqual(cookie['max-age'], 30)
+        post = Post.objects.get(title="Post recién escrito")
+
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            self.assertEqual(self.client.get(post.get_absolute_url()).status_code, 200)
+        self.assertEqual(len(replica_queries), 0)
+
+        # Otro visitante sigue leyendo de la réplica; el autor, al vencer el plazo.
+        self.assertEqual(self.client_class().get(post.get_absolute_url()).status_code, 404)
+        self.client.cookies[PRIMARY_COOKIE] = '0'
+        self.assertEqual(self.client.get(post.get_absolute_url()).status_code, 404)
+
+    def test_stale_replica_pages_are_not_cached_after_a_write(self):
+        url = self.post.get_absolute_url()
+        Post.objects.filter(pk=self.post.pk).update(title="Título nuevo")
+        self.post.refresh_from_db()
+        self.post.save()
+        response = self.client.get(url)
+        self.assertContains(response, "Post replicado")
+        self.assertNotIn('X-Page-Cache', response)
+
+        # Con la réplica al día, la página se guarda con los datos nuevos.
+        self.sync_replica()
+        response = self.client.get(url)
+        self.assertContains(response, "Título nuevo")
+
+        # Vencido el plazo, las lecturas de la réplica vuelven a guardarse.
+        caches['pages'].clear()
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'HIT')
+
+    def test_safe_requests_without_writes_do_not_stick(self):
+        response = self.client.get(reverse('blog:home'))
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+
+class SQLiteProfileTests(TestCase):
+
+    def test_production_pragmas_are_applied_on_connect(self):
+        from django.db.backends.sqlite3.base import DatabaseWrapper
+
+        with tempfile.TemporaryDirectory() as tmp:
+            wrapper = DatabaseWrapper({
+                **connection.settings_dict,
+                'NAME': os.path.join(tmp, 'prod.sqlite3'),
+                'OPTIONS': settings.SQLITE_PRODUCTION_OPTIONS,
+            }, alias='sqlite_production')
+            try:
+                with wrapper.cursor() as cursor:
+                    pragmas = {
+                        name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                        for name in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size')
+                    }
+                self.assertEqual(wrapper.transaction_mode, 'IMMEDIATE')
+            finally:
+                wrapper.close()
+        self.assertEqual(pragmas, {
+            'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000,
+            'cache_size': -64000, 'mmap_size': 256 * 1024 * 1024,
+        })
+
+
+@override_settings(BLOG_DB_LOCK_RETRY_DELAY=0.01)
+class LockRetryTests(TransactionTestCase):
+    # Sin TestCase: los reintentos sólo se hacen fuera de una transacción.
+
+    def setUp(self):
+        self.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        self.post = Post.objects.create(
+            title="Post original", author=self.author, summary="<p>Resumen</p>",
+            content="<p>Contenido</p>", status='published', published_date=timezone.now(),
+        )
+        self.addCleanup(get_search_backend().clear)
+
+    def test_retries_in_a_fresh_transaction(self):
+        calls = []
+
+        @retry_on_locked
+        def rename():
+            calls.append(1)
+            Post.objects.filter(pk=self.post.pk).update(title=f"Intento {len(calls)}")
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return len(calls)
+
+        self.assertEqual(rename(), 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, "Intento 3")
+
+    def test_gives_up_and_ignores_other_errors(self):
+        calls = []
+
+        @retry_on_locked
+        def locked():
+            calls.append(1)
+            raise OperationalError('database is locked')
+
+        @retry_on_locked
+        def broken():
+            calls.append(1)
+            raise OperationalError('no such table: blog_app_nada')
+
+        with self.assertRaisesMessage(OperationalError, 'database is locked'):
+            locked()
+        self.assertEqual(len(calls), 4)
+        with self.assertRaisesMessage(OperationalError, 'no such table'):
+            broken()
+        self.assertEqual(len(calls), 5)
+        # Dentro de una transacción abierta no se repite.
+        with self.assertRaises(OperationalError), transaction.atomic():
+            locked()
+        self.assertEqual(len(calls), 6)
+
+    def test_uploads_of_rolled_back_attempts_are_deleted(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=tmp.name))
+        calls = []
+
+        @retry_on_locked
+        def upload():
+            calls.append(1)
+            self.post.featured_image = SimpleUploadedFile('foto.png', b'imagen')
+            self.post.save()
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+
+        with mock.patch('blog_app.images.schedule_derivatives'):
+            upload()
+        self.post.refresh_from_db()
+        folder = os.path.join(tmp.name, os.path.dirname(self.post.featured_image.name))
+        self.assertEqual(os.listdir(folder), [os.path.basename(self.post.featured_image.name)])
+
+    def test_write_view_waits_for_the_lock(self):
+        self.client.force_login(self.author)
+        # Otra conexión a la misma base retiene la tabla de posts unos instantes.
+        other = sqlite3.connect(connection.settings_dict['NAME'], uri=True, check_same_thread=False)
+        self.addCleanup(other.close)
+        other.execute('BEGIN IMMEDIATE')
+        other.execute("UPDATE blog_app_post SET meta_description = 'bloqueo'")
+        release = threading.Timer(0.1, other.commit)
+        release.start()
+        self.addCleanup(release.cancel)
+
+        with override_settings(BLOG_DB_LOCK_RETRIES=8):
+            response = self.client.post(reverse('blog:post_update', kwargs={'slug': self.post.slug}), {
+                'title': "Post editado",
+                'slug': self.post.slug,
+                'summary': "<p>Resumen</p>",
+                'content': "<p>Contenido</p>",
+                'status': 'published',
+                'published_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+                'keywords': '',
+            })
+        self.assertEqual(response.status_code, 302)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, "Post editado")
+
+
+def reload_urlconf():
+    import blog.urls
+    from . import urls
+    importlib.reload(urls)
+    importlib.reload(blog.urls)
+    clear_url_caches()
+
+
+class AsyncViewTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Se registra antes que el override: al terminar, las URLs se recargan
+        # ya con la configuración original.
+        cls.addClassCleanup(reload_urlconf)
+        cls.enterClassContext(override_settings(BLOG_ASYNC_VIEWS=True, BLOG_VIEW_FLUSH_INTERVAL=None))
+        reload_urlconf()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', 'autor@example.com', 'clave-segura-123')
+        now = timezone.now()
+        for i in range(8):
+            Post.objects.create(
+                title=f"Post de prueba {i}",
+                author=cls.author,
+                summary="<p>Resumen</p>",
+                content="<p>Contenido sobre <b>python</b></p>",
+                status='draft' if i == 3 else 'published',
+                published_date=now - datetime.timedelta(days=i),
+            )
+        cls.post = Post.objects.filter(status='published').first()
+        cls.draft = Post.objects.get(status='draft')
+
+    def setUp(self):
+        caches['pages'].clear()
+
+    def test_public_views_are_async(self):
+        for url in (reverse('blog:home'), reverse('blog:about'), reverse('blog:post_list'), self.post.get_absolute_url()):
+            func = resolve(url).func
+            self.assertTrue(getattr(func, 'view_is_async', False) or asyncio.iscoroutinefunction(func), url)
+
+    async def test_anonymous_pages(self):
+        for url in (reverse('blog:home'), reverse('blog:post_list'), reverse('blog:post_list') + '?page=2',
+                    reverse('blog:post_list') + '?q=python', self.post.get_absolute_url()):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(response['X-Page-Cache'], 'MISS', url)
+            self.assertIn('ETag', response)
+
+        response = await self.async_client.get(reverse('blog:post_list'))
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertContains(response, self.post.title)
+
+        response = await self.async_client.get(reverse('blog:post_list'), headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        response = await self.async_client.get(reverse('blog:about'))
+        self.assertEqual(response.status_code, 200)
+
+    async def test_invalid_page_and_draft_are_not_found(self):
+        response = await self.async_client.get(reverse('blog:post_list') + '?page=9')
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(self.draft.get_absolute_url())
+        self.assertEqual(response.status_code, 404)
+
+    async def test_author_sees_draft(self):
+        await self.async_client.aforce_login(self.author)
+        response = await self.async_client.get(self.draft.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertContains(response, self.draft.title)
+
+    @override_settings(BLOG_CURSOR_PAGINATION=True)
+    async def test_cursor_pagination(self):
+        response = await self.async_client.get(reverse('blog:post_list'))
+        cursor = response.context['page_obj'].next_cursor
+        response = await self.async_client.get(reverse('blog:post_list') + f'?cursor={cursor}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['posts']), 2)
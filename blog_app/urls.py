@@ -1,14 +1,33 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Bajo ASGI (ver blog/asgi.py) las vistas públicas de lectura son async.
+if getattr(settings, 'BLOG_ASYNC_VIEWS', False):
+    from . import async_views as public_views
+else:
+    public_views = views
+
 app_name = 'blog'  
 
 urlpatterns = [
-    path('', views.HomeView.as_view(), name='home'),
-    path('about/', views.about_view, name='about'),
-    path('pages/', views.PostListView.as_view(), name='post_list'),
-    path('pages/<slug:slug>/', views.PostDetailView.as_view(), name='post_detail'), 
+    path('', public_views.HomeView.as_view(), name='home'),
+    path('about/', public_views.about_view, name='about'),
+    path('pages/', public_views.PostListView.as_view(), name='post_list'),
+    path('tags/', views.TagListView.as_view(), name='tag_list'),
+    path('tags/<slug:slug>/', views.TagDetailView.as_view(), name='tag_detail'),
+    path('popular/', views.PopularPostsView.as_view(), name='popular_posts'),
+    path('feeds/rss/', views.FeedView.as_view(feed_format='rss'), name='feed_rss'),
+    path('feeds/atom/', views.FeedView.as_view(feed_format='atom'), name='feed_atom'),
+    path('feeds/<str:username>/rss/', views.FeedView.as_view(feed_format='rss'), name='author_feed_rss'),
+    path('feeds/<str:username>/atom/', views.FeedView.as_view(feed_format='atom'), name='author_feed_atom'),
+    path('sitemap.xml', views.SitemapView.as_view(), name='sitemap'),
+    path('sitemap-<int:page>.xml', views.SitemapView.as_view(), name='sitemap_page'),
+    path('pages/<slug:slug>/', public_views.PostDetailView.as_view(), name='post_detail'), 
     path('post/new/', views.PostCreateView.as_view(), name='post_create'),   
     path('post/<slug:slug>/edit/', views.PostUpdateView.as_view(), name='post_update'),    
     path('post/<slug:slug>/delete/', views.PostDeleteView.as_view(), name='post_delete'),
+    path('stats/requests/', views.RequestStatsView.as_view(), name='request_stats'),
+    path('stats/profiles/', views.ProfileListView.as_view(), name='profile_list'),
+    path('stats/profiles/<str:name>/', views.ProfileDownloadView.as_view(), name='profile_download'),
 ]
@@ -1,56 +1,102 @@
+import io
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse_lazy
 from django.views.generic import TemplateView, ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin 
+from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required 
 from django.utils.decorators import method_decorator 
-from django.utils import timezone
-from django.db.models import Q 
 from django.contrib import messages
-from django.http import Http404
-from .models import Post
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.views import View
+from .models import Post, PopularPost, Tag
 from .forms import PostForm
-from .mixins import AuthorRequiredMixin, StaffRequiredMixin
+from .mixins import AuthorRequiredMixin, RetryOnLockedMixin, StaffRequiredMixin, AnonymousPageCacheMixin, CursorPaginationMixin, ConditionalGetMixin, PostObjectMixin
+from .pagination import CURSOR_PARAM, paginate_by_cursor
+from . import cache as page_cache
+from . import counters
+from . import feeds
+from . import profiling
+from .related import related_posts
+from .routers import replica_reads
+from .search import search_limit, search_posts
+from .tags import refresh_due_tags
+from .instrumentation import get_stats, instrumentation_enabled, query_budget, reset_stats
 
 
-class HomeView(TemplateView):
+class HomeView(ConditionalGetMixin, AnonymousPageCacheMixin, TemplateView):
+    query_budget = 4
+    replica_reads = True
     template_name = 'blog_app/home.html'
+    recent_posts_count = 5
+
+    def get_conditional_validators(self):
+        return page_cache.listing_validators()
+
+    def get_page_cache_key(self):
+        return page_cache.home_key()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['page_title'] = "Bienvenido al Blog!"
-        context['recent_posts'] = Post.objects.filter(
-            status='published', 
-            published_date__lte=timezone.now()
-        ).order_by('-published_date')[:5]
+        context['recent_posts'] = Post.objects.published().select_related('author').order_by('-published_date')[:self.recent_posts_count]
         return context
 
-def about_view(request):
-    context = {
+def about_context():
+    return {
         'owner_name': "Soy Claudio Schimizzi", 
         'owner_bio': "Un entusiasta de la ciberseguridad con una habilidad especial para desarrollar scripts en Python, buscando constantemente automatizar procesos y crear herramientas para la detección y análisis de amenazas.",
         'owner_image_url': "https://placehold.co/300x300/007bff/white?text=Dueño"
     }
-    return render(request, 'blog_app/about.html', context)
 
+@query_budget(2)
+def about_view(request):
+    return render(request, 'blog_app/about.html', about_context())
 
-class PostListView(ListView):
+
+class PostListView(ConditionalGetMixin, AnonymousPageCacheMixin, CursorPaginationMixin, ListView):
+    query_budget = 6
+    replica_reads = True
     model = Post
     template_name = 'blog_app/post_list.html'
     context_object_name = 'posts'
     paginate_by = 5 
+    page_cache_params = ('page', 'q', CURSOR_PARAM)
+    # La búsqueda dejó coincidencias fuera (más de BLOG_SEARCH_MAX_RESULTS).
+    search_truncated = False
+
+    def get_conditional_validators(self):
+        return page_cache.listing_validators()
+
+    def use_cursor_pagination(self):
+        # Los resultados de búsqueda van ordenados por relevancia, no por fecha,
+        # y son como mucho BLOG_SEARCH_MAX_RESULTS: se paginan por número.
+        return super().use_cursor_pagination() and not self.request.GET.get('q')
+
+    def get_page_cache_key(self):
+        query = self.request.GET.get('q')
+        if self.use_cursor_pagination():
+            page = self.request.GET.get(CURSOR_PARAM, '')
+        else:
+            page = self.request.GET.get('page') or '1'
+            if not page.isdigit():
+                return None
+        if query:
+            return page_cache.search_key(query, page)
+        if self.use_cursor_pagination():
+            return page_cache.cursor_list_key(page)
+        return page_cache.list_key(page)
+
+    def get_published_queryset(self):
+        return Post.objects.published().select_related('author').order_by('-published_date')
 
     def get_queryset(self):
-        queryset = Post.objects.filter(status='published', published_date__lte=timezone.now()).order_by('-published_date')
+        queryset = self.get_published_queryset()
         
         query = self.request.GET.get('q')
         if query:
-            queryset = queryset.filter(
-                Q(title__icontains=query) | 
-                Q(summary__icontains=query) | 
-                Q(content__icontains=query) |
-                Q(author__username__icontains=query)
-            ).distinct() 
+            queryset, self.search_truncated = search_posts(queryset, query)
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -58,6 +104,8 @@ class PostListView(ListView):
         context['page_title'] = "El Blog del Programador"
         search_query = self.request.GET.get('q', '')
         context['search_query'] = search_query
+        if self.search_truncated:
+            context['search_limit'] = search_limit()
         if search_query and not context['posts']: 
             messages.warning(self.request, f"No se encontraron posts que coincidan con '{search_query}'.")
         elif not search_query and not context['posts']: 
@@ -65,50 +113,60 @@ class PostListView(ListView):
         return context
 
 
-class PostDetailView(DetailView):
-    model = Post
+class PostDetailView(ConditionalGetMixin, AnonymousPageCacheMixin, PostObjectMixin, DetailView):
+    query_budget = 5
+    replica_reads = True
     template_name = 'blog_app/post_detail.html'
-    context_object_name = 'post'
-    slug_field = 'slug' 
-    slug_url_kwarg = 'slug' 
+    # Las páginas generadas por export_static no son lecturas.
+    count_views = True
 
-    def get_queryset(self):
-        qs = super().get_queryset().filter(published_date__lte=timezone.now())
-        if self.request.user.is_authenticated:
-            qs = qs | Post.objects.filter(
-                Q(slug=self.kwargs['slug']) & 
-                (Q(author=self.request.user) | Q(author__is_staff=True))
-            )
-            return qs.distinct()
-        return qs.filter(status='published')
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if self.count_views and request.method == 'GET' and response.status_code in (200, 304):
+            counters.record_view(self.get_viewed_post_id())
+        return response
 
+    def get_conditional_validators(self):
+        validators = page_cache.post_validators(self.get_queryset(), self.kwargs['slug'])
+        if validators is not None:
+            # El id del post ya viene en el ETag: las respuestas desde caché y
+            # los 304 también cuentan como lectura sin cargar el post.
+            self.validated_post_id = validators[0][0]
+        return validators
 
-    def get_object(self, queryset=None):
-        obj = super().get_object(queryset)
-        if not obj.is_published and not (self.request.user.is_authenticated and (self.request.user == obj.author or self.request.user.is_staff)):
-            raise Http404("El post que buscas no está disponible o no existe.")
-        return obj
+    def get_viewed_post_id(self):
+        if hasattr(self, '_post'):
+            return self._post.pk
+        return self.validated_post_id
 
+    def get_page_cache_key(self):
+        return page_cache.detail_key(self.kwargs['slug'])
+
+    def get_queryset(self):
+        return Post.objects.visible_to(self.request.user)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         post = context.get('post')
         if post:
             context['page_title'] = post.title
-            context['meta_description'] = post.meta_description or post.summary[:160]
+            context['meta_description'] = post.meta_description or post.excerpt
             context['meta_keywords'] = post.keywords
+            context['related_posts'] = related_posts(post)
         return context
 
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+class PostCreateView(RetryOnLockedMixin, LoginRequiredMixin, CreateView):
+    query_budget = 16
     model = Post
     form_class = PostForm
     template_name = 'blog_app/post_form.html'
 
     def form_valid(self, form):
         form.instance.author = self.request.user
+        response = super().form_valid(form)
         messages.success(self.request, "¡Post creado exitosamente!")
-        return super().form_valid(form)
+        return response
 
     def get_success_url(self):
         return reverse_lazy('blog:post_detail', kwargs={'slug': self.object.slug})
@@ -120,16 +178,15 @@ class PostCreateView(LoginRequiredMixin, CreateView):
         return context
 
 
-class PostUpdateView(LoginRequiredMixin, AuthorRequiredMixin, UpdateView):
-    model = Post
+class PostUpdateView(RetryOnLockedMixin, LoginRequiredMixin, PostObjectMixin, AuthorRequiredMixin, UpdateView):
+    query_budget = 14
     form_class = PostForm
     template_name = 'blog_app/post_form.html'
-    slug_field = 'slug'
-    slug_url_kwarg = 'slug'
 
     def form_valid(self, form):
+        response = super().form_valid(form)
         messages.success(self.request, "¡Post actualizado exitosamente!")
-        return super().form_valid(form)
+        return response
 
     def get_success_url(self):
         return reverse_lazy('blog:post_detail', kwargs={'slug': self.object.slug})
@@ -141,13 +198,10 @@ class PostUpdateView(LoginRequiredMixin, AuthorRequiredMixin, UpdateView):
         return context
 
 
-class PostDeleteView(LoginRequiredMixin, AuthorRequiredMixin, DeleteView):
-    model = Post
+class PostDeleteView(RetryOnLockedMixin, LoginRequiredMixin, PostObjectMixin, AuthorRequiredMixin, DeleteView):
+    query_budget = 14
     template_name = 'blog_app/post_confirm_delete.html'
     success_url = reverse_lazy('blog:post_list') 
-    context_object_name = 'post'
-    slug_field = 'slug'
-    slug_url_kwarg = 'slug'
 
     def post(self, request, *args, **kwargs):
         response = super().post(request, *args, **kwargs)
@@ -158,3 +212,138 @@ class PostDeleteView(LoginRequiredMixin, AuthorRequiredMixin, DeleteView):
         context = super().get_context_data(**kwargs)
         context['page_title'] = f"Confirmar Eliminación: {self.object.title}"
         return context
+
+
+class RequestStatsView(StaffRequiredMixin, View):
+    query_budget = 2
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({'enabled': instrumentation_enabled(), 'views': get_stats()})
+
+    def post(self, request, *args, **kwargs):
+        reset_stats()
+        return JsonResponse({'enabled': instrumentation_enabled(), 'views': []})
+
+
+class ProfileListView(StaffRequiredMixin, TemplateView):
+    query_budget = 2
+    template_name = 'blog_app/profile_list.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page_title'] = "Perfiles de Peticiones"
+        context['profiles'] = profiling.list_profiles()
+        context['sample_rate'] = profiling.sample_rate()
+        context['keep'] = profiling.profile_keep()
+        return context
+
+
+class ProfileDownloadView(StaffRequiredMixin, View):
+    query_budget = 2
+
+    def get(self, request, name, *args, **kwargs):
+        if not profiling.is_profile_name(name):
+            raise Http404("El perfil no existe.")
+        path = profiling.profile_path(name, '.prof')
+        if not path.is_file():
+            raise Http404("El perfil no existe.")
+        output = request.GET.get('format', 'prof')
+        if output == 'prof':
+            return FileResponse(path.open('rb'), as_attachment=True, filename=f'{name}.prof')
+        if output == 'collapsed':
+            # Entrada de flamegraph.pl o speedscope.
+            response = HttpResponse(profiling.collapsed_stacks(profiling.load_stats(name)), content_type='text/plain; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="{name}.folded"'
+            return response
+        if output == 'text':
+            stream = io.StringIO()
+            profiling.load_stats(name, stream=stream).sort_stats('cumulative').print_stats(50)
+            return HttpResponse(stream.getvalue(), content_type='text/plain; charset=utf-8')
+        raise Http404("Formato de perfil desconocido.")
+
+
+class PopularPostsView(TemplateView):
+    query_budget = 3
+    template_name = 'blog_app/popular_posts.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        windows = dict(PopularPost.WINDOW_CHOICES)
+        window = self.request.GET.get('window')
+        if window not in windows:
+            window = 'day'
+        context['page_title'] = "Los Más Leídos"
+        context['window'] = window
+        context['windows'] = PopularPost.WINDOW_CHOICES
+        context['popular_posts'] = counters.popular_posts(window, limit=10)
+        return context
+
+
+class TagListView(ListView):
+    query_budget = 4
+    template_name = 'blog_app/tag_list.html'
+    context_object_name = 'tags'
+
+    def get_queryset(self):
+        refresh_due_tags()
+        return Tag.objects.filter(post_count__gt=0).order_by('-post_count', 'name')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page_title'] = "Etiquetas"
+        return context
+
+
+class TagDetailView(ConditionalGetMixin, AnonymousPageCacheMixin, ListView):
+    query_budget = 6
+    template_name = 'blog_app/tag_detail.html'
+    context_object_name = 'posts'
+    paginate_by = 5
+    page_cache_params = (CURSOR_PARAM,)
+
+    def get_conditional_validators(self):
+        return page_cache.listing_validators()
+
+    def get_page_cache_key(self):
+        return page_cache.tag_key(self.kwargs['slug'], self.request.GET.get(CURSOR_PARAM, ''))
+
+    def get_tag(self):
+        if not hasattr(self, '_tag'):
+            self._tag = get_object_or_404(Tag, slug=self.kwargs['slug'])
+        return self._tag
+
+    def get_queryset(self):
+        return Post.objects.published().filter(tags=self.get_tag()).select_related('author')
+
+    def paginate_queryset(self, queryset, page_size):
+        # Siempre por cursor: cada página es un rango sobre el join indexado, sin COUNT(*).
+        page = paginate_by_cursor(self.request, queryset, page_size)
+        return (None, page, page.object_list, page.has_other_pages())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['tag'] = self.get_tag()
+        context['page_title'] = f"Posts sobre {context['tag'].name}"
+        return context
+
+
+class FeedView(View):
+    # Un artefacto vigente cuesta una consulta; regenerarlo, unas pocas más.
+    query_budget = 6
+    feed_format = 'rss'
+
+    def get(self, request, username=None, *args, **kwargs):
+        author = get_object_or_404(User, username=username) if username is not None else None
+        return feeds.artifact_response(request, feeds.get_feed(self.feed_format, author))
+
+
+class SitemapView(View):
+    query_budget = 5
+
+    def get(self, request, page=None, *args, **kwargs):
+        if page is not None and page < 1:
+            raise Http404("La página del sitemap no existe.")
+        artifact = feeds.get_sitemap(page)
+        if artifact is None:
+            raise Http404("La página del sitemap no existe.")
+        return feeds.artifact_response(request, artifact)